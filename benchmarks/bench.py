@@ -0,0 +1,326 @@
+"""
+Microbenchmarks for the routing hot paths
+
+Usage (from the repo root):
+    python -m benchmarks.bench                      # full suite -> benchmarks/results/<commit>.json
+    python -m benchmarks.bench --quick -k search    # smaller sizes, only matching cases
+    python -m benchmarks.bench --compare benchmarks/results/abc1234.json
+
+Cases that need the embedding model are skipped (and marked as such in the
+JSON) when sentence-transformers is not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import generators
+from core.log import configure_logging
+from core.stage_metrics import percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# name -> (setup(size) -> fn, full sizes, quick sizes, repeats)
+CASES = {}
+
+def case(name, sizes, quick_sizes=None, repeat=20):
+    """
+    Register a benchmark; setup(size) returns the zero-arg callable to time
+    (a dict in its `extra` attribute is stored with the timings, e.g. recall)
+    """
+    def register(setup):
+        CASES[name] = (setup, sizes, quick_sizes or sizes[:1], repeat)
+        return setup
+    return register
+
+
+def measure(fn, repeat, warmup=1, min_time=0.005, max_time=10.0, min_repeat=3):
+    """
+    Time fn and return per-call statistics in seconds
+
+    Calls are batched so each timing sample runs for at least min_time,
+    which keeps timer resolution out of sub-microsecond cases. Slow cases
+    stop after max_time seconds (but take at least min_repeat samples).
+    """
+    for _ in range(warmup):
+        fn()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time or number >= 1 << 16:
+            break
+        number *= 2
+
+    samples = []
+    deadline = time.perf_counter() + max_time
+    while len(samples) < repeat and (len(samples) < min_repeat or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+
+    samples.sort()
+    return {
+        "min": samples[0],
+        "median": samples[len(samples) // 2],
+        "p95": percentile(samples, 95),
+        "mean": sum(samples) / len(samples),
+        "repeat": len(samples),
+        "number": number
+    }
+
+
+_embedding_service = None
+
+def _shared_embedding_service():
+    global _embedding_service
+    if _embedding_service is None:
+        from core.embeddings import EmbeddingService
+        _embedding_service = EmbeddingService()
+    return _embedding_service
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+
+@case("embeddings.create_embedding", sizes=[1], repeat=30)
+def _create_embedding(size):
+    service = _shared_embedding_service()
+    prompt = generators.prompts(1)[0]
+    return lambda: service.create_embedding(prompt)
+
+
+@case("embeddings.create_embeddings_batch", sizes=[8, 32, 128], quick_sizes=[8], repeat=10)
+def _create_embeddings_batch(size):
+    service = _shared_embedding_service()
+    texts = generators.prompts(size)
+    return lambda: service.create_embeddings_batch(texts)
+
+
+@case("memory_bank.search", sizes=[10, 1000, 100000], quick_sizes=[10, 1000], repeat=10)
+def _memory_bank_search(size):
+    from core.memory_bank import MemoryBank
+
+    bank = MemoryBank(bank_file=os.path.join(_scratch(), "memory_bank.json"))
+    bank.specialists = generators.specialists(size)
+    query = generators.embeddings(1, seed=1)[0].tolist()
+    return lambda: bank.search(query)
+
+
+@case("memory_bank.search_hierarchical", sizes=[10000, 100000], quick_sizes=[10000], repeat=10)
+def _memory_bank_search_hierarchical(size):
+    return _clustered_bank_search(size, hierarchical=True)
+
+
+@case("memory_bank.search_flat", sizes=[10000, 100000], quick_sizes=[10000], repeat=10)
+def _memory_bank_search_flat(size):
+    return _clustered_bank_search(size, hierarchical=False)
+
+
+def _clustered_bank_search(size, hierarchical):
+    """Topical bank and queries near its specialists; recall is measured against a flat scan"""
+    import numpy as np
+    from core.memory_bank import MemoryBank
+
+    specialists = generators.specialists(size, clustered=True)
+    bank = MemoryBank(bank_file=os.path.join(_scratch(), "memory_bank.json"))
+    bank.specialists = specialists
+    bank.hierarchical = hierarchical
+    queries = generators.nearby(np.array([spec['embedding'] for spec in specialists], dtype=np.float32), 200, seed=1)
+
+    calls = iter(range(1 << 62))
+    fn = lambda: bank.search(queries[next(calls) % len(queries)])
+    fn.extra = bank.measure_recall(queries)
+    return fn
+
+
+@case("memory_bank.search_exact", sizes=[1000000], quick_sizes=[100000], repeat=10)
+def _search_exact(size):
+    return _compressed_bank_search(size, None, None)
+
+
+@case("memory_bank.search_pca128", sizes=[1000000], quick_sizes=[100000], repeat=10)
+def _search_pca(size):
+    return _compressed_bank_search(size, "pca", None)
+
+
+@case("memory_bank.search_int8", sizes=[1000000], quick_sizes=[100000], repeat=10)
+def _search_int8(size):
+    return _compressed_bank_search(size, None, "int8")
+
+
+@case("memory_bank.search_pca128_int8", sizes=[1000000], quick_sizes=[100000], repeat=10)
+def _search_pca_int8(size):
+    return _compressed_bank_search(size, "pca", "int8")
+
+
+@case("memory_bank.search_pca128_pq16", sizes=[1000000], quick_sizes=[100000], repeat=10)
+def _search_pca_pq(size):
+    return _compressed_bank_search(size, "pca", "pq")
+
+
+_bank_matrices = {}
+
+def _compressed_bank_search(size, reduction, method):
+    """
+    Flat bank searched through a compressed index (see QuantizedIndex) with exact re-rank
+
+    The index is built straight from a generated matrix: a million specialist
+    records with their embeddings as JSON lists would not fit in memory here.
+    """
+    from core.memory_bank import MemoryBank
+    from core.quantization import QuantizedIndex
+
+    if size not in _bank_matrices:
+        _bank_matrices.clear()
+        _bank_matrices[size] = generators.clustered_embeddings(size)
+    matrix = _bank_matrices[size]
+    quantized = QuantizedIndex.build(matrix, reduction, 128, method, 16) if reduction or method else None
+
+    bank = MemoryBank.from_matrix(matrix, range(size), os.path.join(_scratch(), "memory_bank.json"), quantized)
+    queries = generators.nearby(matrix, 100, seed=1)
+
+    calls = iter(range(1 << 62))
+    fn = lambda: bank.search(queries[next(calls) % len(queries)])
+    fn.extra = dict(bank.measure_recall(queries), matrix_mb=round(matrix.nbytes / 1e6, 1), rerank=bank.rerank)
+    return fn
+
+
+@case("query_logger.log_query", sizes=[100, 1000, 10000], quick_sizes=[100, 1000], repeat=10)
+def _log_query(size):
+    from core.query_logger import QueryLogger
+
+    log_file = os.path.join(_scratch(), f"query_logs_{size}.json")
+    with open(log_file, 'w') as f:
+        json.dump(generators.query_history(size), f)
+    query_logger = QueryLogger(log_file=log_file)
+    return lambda: query_logger.log_query("intent_0", "Synthetic intent intent_0", "benchmark prompt")
+
+
+@case("intent_merger.find_duplicates", sizes=[10, 25, 50], quick_sizes=[10], repeat=3)
+def _find_duplicates(size):
+    from intent_merger import IntentMerger
+
+    merger = IntentMerger(embedding_model=_shared_embedding_service().model)
+    intents = generators.intents(size)
+    return lambda: merger.find_duplicates(intents)
+
+
+_scratch_dir = None
+
+def _scratch():
+    global _scratch_dir
+    if _scratch_dir is None:
+        _scratch_dir = tempfile.mkdtemp(prefix="findingnemo-bench-")
+    return _scratch_dir
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def run(quick=False, pattern=None):
+    """
+    Run the registered cases
+
+    Returns:
+        dict: {commit, timestamp, machine, results: {case: {size: stats}}}
+    """
+    results = {}
+    for name, (setup, sizes, quick_sizes, repeat) in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = {}
+        for size in (quick_sizes if quick else sizes):
+            try:
+                fn = setup(size)
+            except ImportError as e:
+                results[name][str(size)] = {"skipped": f"missing dependency: {e.name}"}
+                print(f"{name}[{size}]: skipped ({e.name} not installed)")
+                continue
+            stats = measure(fn, repeat)
+            stats.update(getattr(fn, 'extra', {}))
+            results[name][str(size)] = stats
+            extra = "".join(f"  {key} {value:.3g}" for key, value in getattr(fn, 'extra', {}).items())
+            print(f"{name}[{size}]: median {stats['median'] * 1000:.3f}ms  p95 {stats['p95'] * 1000:.3f}ms{extra}")
+
+    if _scratch_dir:
+        shutil.rmtree(_scratch_dir, ignore_errors=True)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "quick": quick,
+        "results": results
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    """
+    Median ratios current/baseline per case and size
+
+    Returns:
+        list: (case, size, ratio, regressed) for cases present in both runs
+    """
+    rows = []
+    for name, sizes in current['results'].items():
+        for size, stats in sizes.items():
+            before = baseline['results'].get(name, {}).get(size)
+            if not before or "median" not in before or "median" not in stats:
+                continue
+            ratio = stats['median'] / before['median']
+            rows.append((name, size, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing hot path microbenchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes for a fast check")
+    parser.add_argument("-k", dest="pattern", help="Only run cases containing this string")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    configure_logging()
+    report = run(quick=args.quick, pattern=args.pattern)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {baseline['commit']}:")
+        regressions = 0
+        for name, size, ratio, regressed in compare(baseline, report, args.tolerance):
+            regressions += regressed
+            print(f"  {'REGRESSION ' if regressed else ''}{name}[{size}]: {ratio:.2f}x")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
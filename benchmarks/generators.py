@@ -0,0 +1,100 @@
+"""
+Synthetic data for the routing benchmarks
+Everything is seeded so runs on different commits see the same inputs
+"""
+import random
+import numpy as np
+
+DIMENSIONS = 384  # all-MiniLM-L6-v2
+
+TOPICS = ["python", "sql", "japan", "travel", "poetry", "cars", "finance", "cooking",
+          "fitness", "history", "music", "chemistry", "law", "gardening", "networking"]
+ACTIONS = ["explain", "write code for", "compare options for", "give tips about",
+           "debug a problem with", "summarize", "plan", "list resources on"]
+
+def embeddings(n, dimensions=DIMENSIONS, seed=0):
+    """n random unit vectors, as float32 array"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def clustered_embeddings(n, topics=None, spread=0.6, dimensions=DIMENSIONS, seed=0):
+    """
+    n unit vectors grouped around `topics` random centers (default sqrt(n)),
+    closer to how real intent embeddings bunch up than uniform vectors
+    """
+    rng = np.random.default_rng(seed)
+    topics = topics or max(1, int(np.sqrt(n)))
+    centers = embeddings(topics, dimensions, seed=seed + 1)
+    assignments = rng.integers(topics, size=n)
+    vectors = np.empty((n, dimensions), dtype=np.float32)
+    # In chunks (same random stream) so a 1M-row bank needs no multi-GB float64 temporaries
+    for start in range(0, n, 65536):
+        picked = centers[assignments[start:start + 65536]]
+        chunk = picked + spread * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(dimensions)
+        vectors[start:start + 65536] = chunk / np.linalg.norm(chunk, axis=1, keepdims=True)
+    return vectors
+
+
+def nearby(vectors, n, noise=0.3, seed=0):
+    """n queries, each a noisy copy of a random row of vectors (unit length)"""
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.integers(len(vectors), size=n)]
+    queries = picked + noise * rng.standard_normal(picked.shape).astype(np.float32) / np.sqrt(picked.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def specialists(n, dimensions=DIMENSIONS, seed=0, clustered=False):
+    """n memory bank entries in the same shape as data/memory_bank.json"""
+    vectors = clustered_embeddings(n, dimensions=dimensions, seed=seed) if clustered else \
+        embeddings(n, dimensions, seed)
+    return [
+        {
+            "intent_label": f"specialist_{i}",
+            "description": f"Synthetic specialist {i}",
+            "endpoint": f"mock/specialist-{i}",
+            "embedding": vector.tolist(),
+            "metadata": {}
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def prompts(n, seed=0):
+    """n short user prompts"""
+    rng = random.Random(seed)
+    return [f"Please {rng.choice(ACTIONS)} {rng.choice(TOPICS)} ({i})" for i in range(n)]
+
+
+def intents(n, seed=0):
+    """n intents with descriptions, with some near-duplicates so merging has work to do"""
+    rng = random.Random(seed)
+    result = []
+    for i in range(n):
+        topic, action = rng.choice(TOPICS), rng.choice(ACTIONS)
+        result.append({
+            "intent_label": f"{topic}_{i}",
+            "description": f"User wants to {action} {topic}."
+        })
+    return result
+
+
+def query_history(n_queries, n_intents=20, seed=0):
+    """QueryLogger.logs dict holding n_queries logged queries spread over n_intents"""
+    rng = random.Random(seed)
+    logs = {}
+    for i, prompt in enumerate(prompts(n_queries, seed)):
+        label = f"intent_{rng.randrange(n_intents)}"
+        timestamp = f"2025-01-01T00:{(i // 60) % 60:02d}:{i % 60:02d}"
+        entry = logs.setdefault(label, {
+            "count": 0,
+            "canonical_description": f"Synthetic intent {label}",
+            "first_seen": timestamp,
+            "last_seen": timestamp,
+            "queries": []
+        })
+        entry['count'] += 1
+        entry['last_seen'] = timestamp
+        entry['queries'].append({"prompt": prompt, "timestamp": timestamp})
+    return logs
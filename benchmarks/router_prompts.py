@@ -0,0 +1,157 @@
+"""
+Accuracy vs input tokens of the router prompt modes (see core/router.py)
+
+Every prompt of a labeled set is classified once per mode. A label counts
+as correct if it matches one of the prompt's accepted labels (case and
+spacing ignored); agreement is how often a mode picks the same label as
+the first one, which is what keeps existing query logs and specialists
+lined up when switching. Token numbers are what the server reported.
+
+Usage (from the repo root):
+    python -m benchmarks.router_prompts                    # against NVIDIA_API_BASE / ROUTER_MODEL
+    python -m benchmarks.router_prompts --mock             # offline, against mock_nim (tokens only)
+    python -m benchmarks.router_prompts --labeled my_set.jsonl --output router_prompts.json
+"""
+import argparse
+import json
+import os
+import time
+
+DEFAULT_LABELED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "router_labeled.jsonl")
+
+def load_labeled(path=DEFAULT_LABELED):
+    """
+    Labeled prompts, one JSON object per line: {"prompt", "labels": [accepted labels]}
+    ("intent_label" is accepted for a single label)
+    """
+    labeled = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                labels = item.get('labels') or [item['intent_label']]
+                labeled.append({"prompt": item['prompt'], "labels": labels})
+    return labeled
+
+
+def normalize(label):
+    return " ".join(str(label).lower().split())
+
+
+def evaluate_mode(router, labeled):
+    """
+    Classify every labeled prompt with one router
+
+    Returns:
+        list: Per prompt {prompt, intent_label, correct, error, prompt_tokens, cached_tokens,
+              completion_tokens, latency}
+    """
+    results = []
+    for item in labeled:
+        start = time.perf_counter()
+        intent = router.generate_intent(item['prompt'])
+        latency = time.perf_counter() - start
+        results.append({
+            "prompt": item['prompt'],
+            "intent_label": intent['intent_label'],
+            "correct": normalize(intent['intent_label']) in {normalize(label) for label in item['labels']},
+            "error": intent.get('error'),
+            "prompt_tokens": intent.get('prompt_tokens', 0),
+            "cached_tokens": intent.get('cached_tokens', 0),
+            "completion_tokens": intent.get('completion_tokens', 0),
+            "latency": latency
+        })
+    return results
+
+
+def compare_modes(labeled, modes=("full", "compact"), make_router=None):
+    """
+    Accuracy/token trade-off of router prompt modes over a labeled set
+
+    Args:
+        labeled (list): load_labeled() items
+        modes (tuple): Prompt modes, the first is the reference for agreement and savings
+        make_router (callable): mode -> router (default IntentRouter(prompt_mode=mode))
+
+    Returns:
+        dict: mode -> {accuracy, agreement, errors, prompt_tokens, cached_tokens, completion_tokens,
+              latency_p50, saved_tokens_per_query, saved_cost_per_1k_queries}
+    """
+    from config import COSTS
+
+    if make_router is None:
+        from core.router import IntentRouter
+        make_router = lambda mode: IntentRouter(prompt_mode=mode)
+
+    runs = {mode: evaluate_mode(make_router(mode), labeled) for mode in modes}
+    reference = runs[modes[0]]
+    mean = lambda results, field: sum(r[field] for r in results) / len(results) if results else 0.0
+
+    report = {}
+    for mode, results in runs.items():
+        latencies = sorted(r['latency'] for r in results)
+        ok = [r for r in results if not r['error']]
+        agreeing = [r for r, ref in zip(results, reference)
+                    if not r['error'] and not ref['error'] and normalize(r['intent_label']) == normalize(ref['intent_label'])]
+        prompt_tokens = mean(results, 'prompt_tokens')
+        saved = mean(reference, 'prompt_tokens') - prompt_tokens
+        report[mode] = {
+            "queries": len(results),
+            "accuracy": round(sum(r['correct'] for r in ok) / len(results), 3) if results else None,
+            "agreement": round(len(agreeing) / len(results), 3) if results else None,
+            "errors": len(results) - len(ok),
+            "prompt_tokens": round(prompt_tokens, 1),
+            "cached_tokens": round(mean(results, 'cached_tokens'), 1),
+            "completion_tokens": round(mean(results, 'completion_tokens'), 1),
+            "latency_p50": round(latencies[len(latencies) // 2], 4) if latencies else None,
+            "saved_tokens_per_query": round(saved, 1),
+            "saved_cost_per_1k_queries": round(saved * COSTS['router'] / 1_000_000 * 1000, 6)
+        }
+    return report
+
+
+def print_report(report):
+    print("\n" + "="*60)
+    print("ROUTER PROMPT MODES")
+    print("="*60 + "\n")
+    for mode, stats in report.items():
+        print(f"{mode}: accuracy {stats['accuracy']}, agreement {stats['agreement']}, {stats['errors']} errors")
+        print(f"  tokens/query: {stats['prompt_tokens']} in ({stats['cached_tokens']} cached), "
+              f"{stats['completion_tokens']} out; p50 {stats['latency_p50']}s")
+        print(f"  saved/query: {stats['saved_tokens_per_query']} tokens "
+              f"(${stats['saved_cost_per_1k_queries']:.4f} per 1k queries)")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare router prompt modes on a labeled set")
+    parser.add_argument("--labeled", default=DEFAULT_LABELED)
+    parser.add_argument("--modes", nargs="+", default=["full", "compact"])
+    parser.add_argument("--mock", action="store_true", help="Run against a local mock_nim server")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    if args.mock:
+        from mock_nim import MockNIMConfig, MockNIMServer
+        server = MockNIMServer(MockNIMConfig(router_latency_ms=1, latency_sigma=0, prompt_tokens=None)).start()
+        os.environ["NVIDIA_API_BASE"] = server.base_url
+        os.environ.setdefault("NVIDIA_API_KEY", "mock")
+        os.environ.setdefault("ROUTER_MODEL", "mock/router")
+
+    try:
+        # Import after the environment is set - config reads it at import time
+        from core.log import configure_logging
+        configure_logging()
+        report = compare_modes(load_labeled(args.labeled), tuple(args.modes))
+    finally:
+        if server:
+            server.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
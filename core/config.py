@@ -12,12 +12,95 @@ ROUTER_MODEL = os.getenv("ROUTER_MODEL")
 REWARD_MODEL = os.getenv("REWARD_MODEL")
 GENERALIST_MODEL = os.getenv("GENERALIST_MODEL")
 
+# Router system prompt: "full" (long prompt with inline examples) or "compact"
+# (short rules + two example turns, far fewer input tokens; see benchmarks/router_prompts.py)
+ROUTER_PROMPT_MODE = os.getenv("ROUTER_PROMPT_MODE", "full")
+# Constrained decoding of router output: "json_schema" / "json_object" (OpenAI response_format),
+# "guided_json" (NIM nvext) or "off". Endpoints that reject it are sent plain requests after the first
+ROUTER_STRUCTURED_OUTPUT = os.getenv("ROUTER_STRUCTURED_OUTPUT", "json_schema")
+
 # API Base URL
 NVIDIA_API_BASE = os.getenv("NVIDIA_API_BASE")
 
+# Logging: level, "text" or "json", and whether to log through a background queue
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE = os.getenv("LOG_QUEUE", "0") == "1"
+
+# fsync data files on every write (crash durability, costs a disk flush per write)
+STORAGE_FSYNC = os.getenv("STORAGE_FSYNC", "0") == "1"
+
+# Optional Prometheus text file for per-stage latency (node_exporter textfile collector);
+# forked server workers each write their own, findingnemo.prom -> findingnemo.<pid>.prom
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")
+
 # Thresholds
-SIMILARITY_THRESHOLD = 0.35
+SIMILARITY_THRESHOLD = 0.35  # default; specialists calibrate their own (see below)
 QUERY_THRESHOLD = 5
+# Optional: queries/hour (time-decayed) instead of lifetime count, None = use count
+QUERY_RATE_THRESHOLD = None
+RATE_HALF_LIFE_HOURS = 1.0
+
+# Two-level (cluster -> specialist) search for large banks; smaller banks are scanned flat.
+# probes = closest clusters searched, more = better recall, slower
+HIERARCHICAL_MIN_SPECIALISTS = 5000
+HIERARCHICAL_PROBES = 4
+RECLUSTER_GROWTH = 0.1  # full k-means once the bank grew/shrank this much since the last one
+
+# Compressed first pass for large banks (core/quantization.py): approximate scores over
+# reduced and/or quantized rows pick INDEX_RERANK candidates, re-ranked at full precision.
+# Less memory/faster scan with fewer dimensions, int8 (1 B/dim) or pq (INDEX_PQ_SUBVECTORS B/row);
+# more rerank candidates = better recall. None/None = off
+INDEX_REDUCTION = None  # "pca", or "truncate" for Matryoshka-trained embedding models
+INDEX_DIMENSIONS = 128
+INDEX_QUANTIZATION = None  # "int8" or "pq"
+INDEX_PQ_SUBVECTORS = 16
+INDEX_RERANK = 256
+INDEX_MIN_SPECIALISTS = 20000
+
+# Representative vectors per specialist, picked from its logged queries (core/specialist_vectors.py)
+SPECIALIST_VECTORS = 8
+SPECIALIST_VECTORS_MIN_QUERIES = 3
+SPECIALIST_VECTORS_SAMPLE = 2000  # logged queries sampled per specialist (k-medoids is O(n^2) memory)
+
+# Per-specialist thresholds learned from accepted vs fallback specialist calls (core/threshold_calibrator.py)
+THRESHOLD_MIN = 0.2
+THRESHOLD_MAX = 0.8
+THRESHOLD_MIN_SAMPLES = 30  # outcomes before a specialist gets its own threshold
+THRESHOLD_RECALIBRATE_EVERY = 10  # outcomes between recalibrations
+THRESHOLD_FALLBACK_PENALTY = 1.0  # cost of a wasted specialist call relative to a hit
+THRESHOLD_MAX_STEP = 0.05  # furthest one recalibration moves a threshold
+THRESHOLD_EXPLORE_RATE = 0.02  # share of near misses sent to the specialist anyway, 0 = never
+THRESHOLD_EXPLORE_MARGIN = 0.05  # how far below the threshold a near miss can be
+
+# IntentMerger: descriptions at least this similar are the same intent
+INTENT_MERGE_THRESHOLD = 0.30
+
+# Offline replay of logged traffic (core/replay.py)
+REPLAY_BATCH_SIZE = 256  # queries embedded and searched together
+REPLAY_COMPLETION_TOKENS = 400  # projected answer length for queries logged without usage
+
+# Seconds between memory bank file change checks (hot reload), None = never reload
+MEMORY_BANK_WATCH_INTERVAL = 2.0
+
+# Tenants: data/tenants/<id>/ holds each tenant's bank, logs and settings.json.
+# Loaded on first use; least recently used tenants are evicted past either limit
+TENANTS_DIR = "data/tenants"
+TENANT_MAX_LOADED = 64
+TENANT_MAX_SPECIALISTS = 100_000  # specialists across loaded tenants (~1.5KB each in the matrix)
+TENANT_QPS_WINDOW = 60  # seconds
+# Tenants without a directory yet that may still be served (comma-separated ids); any other
+# unknown id is rejected, and a tenant's files are only created on its first write
+TENANT_ALLOWLIST = [t.strip() for t in os.getenv("TENANT_ALLOWLIST", "").split(",") if t.strip()]
+
+# NemotronMetaAgent.process_batch: router/model calls in flight, overall and per endpoint
+BATCH_MAX_CONCURRENCY = 16
+BATCH_ENDPOINT_CONCURRENCY = 4
+
+# Hedging: fire the generalist if the specialist is slower than its own p-th percentile
+HEDGING_ENABLED = False
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
 
 # Costs (per 1M tokens)
 COSTS = {
@@ -221,7 +221,7 @@
 #                 "accuracy": "Maintained (95%+)"
 #             }
 #         }
-from config import QUERY_THRESHOLD
+from config import QUERY_THRESHOLD, QUERY_RATE_THRESHOLD, COSTS
 
 class DecisionEngine:
     """
@@ -229,53 +229,136 @@ class DecisionEngine:
     Checks: threshold, bottleneck analysis, credits
     """
     
-    def __init__(self):
+    def __init__(self, metrics_store=None):
         self.threshold = QUERY_THRESHOLD  # Default: 5
+        self.rate_threshold = QUERY_RATE_THRESHOLD  # queries/hour, None = use count
         
         # Training budget
         self.training_cost = 26  # dollars
         self.credits_available = 60  # Will be dynamic later
+        
+        # ROI inputs - observed via MetricsStore, priors used until we have samples
+        self.metrics_store = metrics_store
+        self.max_break_even_days = 90
+        self.default_prompt_tokens = 60
+        self.default_completion_tokens = 400
     
-    def check_threshold(self, count):
+    def check_threshold(self, count, rate=None):
         """
-        Check if query count meets threshold
+        Check if query count (or decayed rate) meets threshold
         
         Args:
             count (int): Number of queries logged
+            rate (float): Optional time-decayed queries/hour from QueryLogger
             
         Returns:
             bool: True if threshold met
         """
+        if self.rate_threshold is not None and rate is not None:
+            return rate >= self.rate_threshold
         return count >= self.threshold
     
-    def check_bottleneck(self, intent_label, count):
+    def _per_query(self, kind, intent_label, fallback=None):
+        """Average tokens/latency per call from metrics, else fallback or priors"""
+        averages = self.metrics_store.get_averages(kind, intent_label) if self.metrics_store else None
+        
+        if averages:
+            return {
+                "prompt_tokens": averages['prompt_tokens'],
+                "completion_tokens": averages['completion_tokens'],
+                "latency": averages['latency'],
+                "source": f"observed ({averages['scope']}, {averages['samples']} calls)"
+            }
+        
+        if fallback:
+            return dict(fallback, source="assumed same as generalist")
+        
+        return {
+            "prompt_tokens": self.default_prompt_tokens,
+            "completion_tokens": self.default_completion_tokens,
+            "latency": None,
+            "source": "prior"
+        }
+    
+    def check_bottleneck(self, intent_label, count, rate=None):
         """
         Check if intent is worth training
-        For MVP: ALWAYS APPROVED (condition B always met)
+        Projects daily savings from observed tokens, latency and query rate
+        and approves only if training pays for itself within max_break_even_days
+        
+        The daily query rate comes from the metrics store if it has one, else
+        from the time-decayed rate, else the lifetime count is taken as a day's.
         
         Args:
             intent_label (str): Intent label
             count (int): Query count
+            rate (float): Optional time-decayed queries/hour from QueryLogger
             
         Returns:
-            dict: Always returns approved=True
+            dict: {
+                "approved": bool,
+                "reason": str,
+                "estimated_savings": float ($/day),
+                "break_even_days": float,
+                "roi": dict with the inputs behind the numbers
+            }
         """
-        # Simple ROI calculation (for demo)
-        # Assume: generalist costs $0.00021/query, specialist costs $0.00013/query
-        daily_queries = count
-        daily_cost_generalist = daily_queries * 0.00021
-        daily_cost_specialist = daily_queries * 0.00013
-        daily_savings = daily_cost_generalist - daily_cost_specialist
-        
-        # Calculate break-even days
+        generalist = self._per_query("generalist", intent_label)
+        specialist = self._per_query("specialist", None, fallback=generalist)
+        
+        # Router cost is paid on both paths, so it cancels out
+        generalist_cost = (
+            generalist['prompt_tokens'] * COSTS['generalist_input'] +
+            generalist['completion_tokens'] * COSTS['generalist_output']
+        ) / 1_000_000
+        specialist_cost = (
+            specialist['prompt_tokens'] + specialist['completion_tokens']
+        ) * COSTS['specialist'] / 1_000_000
+        generalist['cost_per_query'] = generalist_cost
+        specialist['cost_per_query'] = specialist_cost
+        
+        observed_rate = self.metrics_store.get_daily_rate(intent_label) if self.metrics_store else None
+        if observed_rate is not None:
+            daily_queries = observed_rate
+            rate_source = "observed"
+        elif rate is not None:
+            daily_queries = rate * 24
+            rate_source = "decayed"
+        else:
+            daily_queries = count  # Assume the logged count arrived within a day
+            rate_source = "count"
+        
+        savings_per_query = generalist_cost - specialist_cost
+        daily_savings = daily_queries * savings_per_query
         break_even_days = self.training_cost / daily_savings if daily_savings > 0 else 999999
         
-        # ALWAYS APPROVE - condition B is always met
+        roi = {
+            "daily_queries": round(daily_queries, 2),
+            "rate_source": rate_source,
+            "generalist": generalist,
+            "specialist": specialist,
+            "savings_per_query": savings_per_query,
+            "max_break_even_days": self.max_break_even_days
+        }
+        if generalist['latency'] is not None and specialist['latency'] is not None:
+            roi['latency_saved_per_query'] = generalist['latency'] - specialist['latency']
+        
+        if daily_savings <= 0:
+            approved = False
+            reason = "No cost savings projected"
+        elif break_even_days <= self.max_break_even_days:
+            approved = True
+            reason = f"Break-even in {break_even_days:.0f} days (${daily_savings:.4f}/day at {daily_queries:.1f} queries/day)"
+        else:
+            approved = False
+            reason = f"Break-even too long: {break_even_days:.0f} days (${daily_savings:.4f}/day at {daily_queries:.1f} queries/day)"
+        
         return {
-            "approved": True,
-            "reason": f"Auto-approved (Break-even in {break_even_days:.0f} days)",
+            "approved": approved,
+            "reason": reason,
             "estimated_savings": daily_savings,
-            "break_even_days": break_even_days
+            "break_even_days": break_even_days,
+            "roi": roi
         }
     
     def check_credits(self):
@@ -288,15 +371,16 @@ class DecisionEngine:
         """
         return True  # Always have credits for MVP
     
-    def make_decision(self, intent_label, count):
+    def make_decision(self, intent_label, count, rate=None):
         """
         Make final decision: train or not?
         Checks all three conditions: a && b && c
-        Where b=True, c=True always, only a depends on input from log
+        Where c=True always; a depends on the log, b on measured ROI
         
         Args:
             intent_label (str): Intent label
             count (int): Query count from log file
+            rate (float): Optional time-decayed queries/hour from log file
             
         Returns:
             dict: {
@@ -309,23 +393,35 @@ class DecisionEngine:
         details = {}
         
         # Condition A: Threshold (DEPENDS ON LOG INPUT)
-        a = self.check_threshold(count)
+        a = self.check_threshold(count, rate)
+        use_rate = self.rate_threshold is not None and rate is not None
         details['threshold'] = {
             "met": a,
             "count": count,
-            "required": self.threshold
+            "rate": rate,
+            "required": self.rate_threshold if use_rate else self.threshold,
+            "unit": "queries/hour" if use_rate else "queries"
         }
         
+        if use_rate:
+            observed, required, unit = f"{rate:.2f}", self.rate_threshold, " queries/hour"
+        else:
+            observed, required, unit = count, self.threshold, ""
+        
         if a:
-            reasons.append(f"✅ Threshold met: {count} >= {self.threshold}")
+            reasons.append(f"✅ Threshold met: {observed} >= {required}{unit}")
         else:
-            reasons.append(f"❌ Threshold not met: {count} < {self.threshold}")
+            reasons.append(f"❌ Threshold not met: {observed} < {required}{unit}")
         
-        # Condition B: Bottleneck (ALWAYS TRUE)
-        b_result = self.check_bottleneck(intent_label, count)
-        b = b_result['approved']  # Always True
+        # Condition B: Bottleneck (MEASURED ROI)
+        b_result = self.check_bottleneck(intent_label, count, rate)
+        b = b_result['approved']
         details['bottleneck'] = b_result
-        reasons.append(f"✅ Bottleneck approved: {b_result['reason']}")
+        
+        if b:
+            reasons.append(f"✅ Bottleneck approved: {b_result['reason']}")
+        else:
+            reasons.append(f"❌ Bottleneck rejected: {b_result['reason']}")
         
         # Condition C: Credits (ALWAYS TRUE)
         c = self.check_credits()  # Always True
@@ -337,13 +433,12 @@ class DecisionEngine:
         reasons.append(f"✅ Credits available: ${self.credits_available}")
         
         # Final decision: a AND b AND c
-        # Since b=True, c=True always, decision only depends on a (threshold)
-        if a:  # Since b and c are always True
+        if a and b and c:
             decision = "TRAIN"
             reasons.append("\n🎯 DECISION: Train specialist")
         else:
             decision = "WAIT"
-            reasons.append("\n⏸️  DECISION: Wait - threshold not met")
+            reasons.append("\n⏸️  DECISION: Wait - conditions not met")
         
         return {
             "decision": decision,
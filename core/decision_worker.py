@@ -0,0 +1,179 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+class DecisionWorker:
+    """
+    SINGLE RESPONSIBILITY: Log queries and make training decisions off the request path
+    Consumes a stream of log events, evaluates thresholds on counter crossings
+    and periodically, and publishes decisions to subscribers
+    """
+
+    _STOP = object()
+
+    def __init__(self, query_logger, decision_engine, interval=60.0):
+        """
+        Args:
+            query_logger: QueryLogger instance (only this worker writes to it)
+            decision_engine: DecisionEngine instance
+            interval (float): Seconds between periodic sweeps over all bottlenecks
+        """
+        self.query_logger = query_logger
+        self.decision_engine = decision_engine
+        self.interval = interval
+
+        self.events = queue.Queue()
+        self.decisions = {}  # intent_label -> latest published decision
+        self.subscribers = []
+        self._last_sweep = time.monotonic()
+        self._stopped = False
+        self._submit_lock = threading.Lock()  # nothing is queued behind the stop marker
+
+        self._thread = threading.Thread(target=self._run, name="decision-worker", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """
+        Register a callback for published decisions
+
+        Args:
+            callback (callable): fn(intent_label, description, decision)
+        """
+        self.subscribers.append(callback)
+
+    def submit(self, intent_label, intent_description, user_prompt):
+        """Queue a log event - returns immediately (RuntimeError if the worker is stopped or dead)"""
+        self._put({
+            "intent_label": intent_label,
+            "description": intent_description,
+            "prompt": user_prompt,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    def submit_batch(self, events):
+        """
+        Queue many log events as one - they are written with a single log flush
+
+        Args:
+            events (list): (intent_label, intent_description, user_prompt) tuples
+        """
+        if not events:
+            return
+        timestamp = datetime.now().isoformat()
+        self._put({"batch": [
+            {"intent_label": label, "description": description, "prompt": prompt, "timestamp": timestamp}
+            for label, description, prompt in events
+        ]})
+
+    def get_decision(self, intent_label):
+        """Latest published decision for an intent, or None"""
+        return self.decisions.get(intent_label)
+
+    def flush(self):
+        """Block until every queued event has been logged and evaluated (RuntimeError if the worker died)"""
+        with self.events.all_tasks_done:
+            while self.events.unfinished_tasks:
+                if not self._thread.is_alive():
+                    raise RuntimeError(f"Decision worker died with {self.events.unfinished_tasks} events queued")
+                self.events.all_tasks_done.wait(timeout=0.5)
+
+    def stop(self):
+        """Drain the queue and stop the worker thread"""
+        with self._submit_lock:
+            if not self._stopped:
+                self._stopped = True
+                self.events.put(self._STOP)
+        self._thread.join()
+
+    def is_running(self):
+        return not self._stopped and self._thread.is_alive()
+
+    def _put(self, event):
+        with self._submit_lock:
+            if not self.is_running():
+                raise RuntimeError("Decision worker is not running - event not logged")
+            self.events.put(event)
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, self.interval - (time.monotonic() - self._last_sweep))
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                self._sweep()
+                continue
+
+            try:
+                if event is self._STOP:
+                    return
+                self._handle(event)
+            except Exception as e:
+                logger.exception("Decision worker error: %s", e)
+            finally:
+                self.events.task_done()
+
+            if time.monotonic() - self._last_sweep >= self.interval:
+                self._sweep()
+
+    def _handle(self, event):
+        """Log one event (or a batch) and evaluate intents whose count crossed the threshold"""
+        if 'batch' in event:
+            batch = event['batch']
+            self.query_logger.log_queries([(e['intent_label'], e['description'], e['prompt'], e['timestamp'])
+                                           for e in batch])
+            # Once per intent, with the description of its last query
+            for intent_label, description in {e['intent_label']: e['description'] for e in batch}.items():
+                self._check(intent_label, description)
+            return
+        self.query_logger.log_query(event['intent_label'], event['description'], event['prompt'], event['timestamp'])
+        self._check(event['intent_label'], event['description'])
+
+    def _check(self, intent_label, description):
+        """Evaluate an intent if it is new or its count crossed the threshold, else refresh its numbers"""
+        count = self.query_logger.get_count(intent_label)
+        rate = self.query_logger.get_rate(intent_label)
+
+        previous = self.decisions.get(intent_label)
+        crossed = self.decision_engine.check_threshold(count, rate)
+        if previous is None or (crossed and previous['decision'] != "TRAIN"):
+            self._evaluate(intent_label, description, count, rate)
+        else:
+            previous['count'] = count
+            previous['rate'] = rate
+
+    def _sweep(self):
+        """Periodic re-evaluation of every intent over the threshold - errors are logged, the worker keeps going"""
+        self._last_sweep = time.monotonic()
+        try:
+            bottlenecks = self.query_logger.get_bottlenecks(
+                threshold=self.decision_engine.threshold,
+                min_rate=self.decision_engine.rate_threshold
+            )
+            for bottleneck in bottlenecks:
+                self._evaluate(bottleneck['intent_label'], bottleneck['description'],
+                               bottleneck['count'], bottleneck['rate'])
+        except Exception as e:
+            logger.exception("Decision worker sweep error: %s", e)
+
+    def _evaluate(self, intent_label, description, count, rate=None):
+        """Run the decision engine and publish the result"""
+        decision = self.decision_engine.make_decision(intent_label, count, rate)
+        published = {
+            "decision": decision['decision'],
+            "count": count,
+            "rate": rate,
+            "evaluated_at": datetime.now().isoformat()
+        }
+        if decision['decision'] == "TRAIN":
+            published['plan'] = self.decision_engine.get_training_plan(intent_label, description)
+        self.decisions[intent_label] = published
+
+        for callback in self.subscribers:
+            try:
+                callback(intent_label, description, decision)
+            except Exception as e:
+                logger.exception("Decision subscriber error: %s", e)
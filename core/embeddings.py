@@ -1,5 +1,8 @@
 
 from sentence_transformers import SentenceTransformer
+from core.log import get_logger
+
+logger = get_logger(__name__)
 
 class EmbeddingService:
     """
@@ -8,9 +11,9 @@ class EmbeddingService:
     """
     
     def __init__(self):
-        print("Loading embedding model...")
+        logger.info("Loading embedding model...")
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("✅ Embedding model loaded")
+        logger.info("Embedding model loaded")
     
     def create_embedding(self, text):
         """
@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import deque
+from core.log import get_logger
+from core.stage_metrics import percentile as _percentile
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class EndpointHealth:
+    """
+    SINGLE RESPONSIBILITY: Track specialist endpoint health and trip circuit breakers
+    closed -> open after too many errors, open -> half_open after a cooldown,
+    half_open -> closed on a successful probe (or back to open on failure);
+    a probe that never reports back is replaced after probe_timeout
+    """
+
+    def __init__(self, window_size=20, min_requests=5, error_rate_threshold=0.5,
+                 consecutive_failures=3, cooldown=30.0, ewma_alpha=0.2, histogram_size=200,
+                 probe_timeout=60.0):
+        """
+        Args:
+            window_size (int): Recent calls used for the rolling error rate
+            min_requests (int): Calls needed before the error rate can trip the breaker
+            error_rate_threshold (float): Rolling error rate that opens the circuit
+            consecutive_failures (int): Failures in a row that open the circuit
+            cooldown (float): Seconds an open circuit waits before a half-open probe
+            ewma_alpha (float): Weight of the newest latency in the EWMA
+            histogram_size (int): Successful latencies kept for percentiles
+            probe_timeout (float): Seconds before an unanswered half-open probe lets another one through
+        """
+        self.window_size = window_size
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.consecutive_failures = consecutive_failures
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.histogram_size = histogram_size
+        self.probe_timeout = probe_timeout
+
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint):
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {
+                "state": CLOSED,
+                "outcomes": deque(maxlen=self.window_size),
+                "failures_in_row": 0,
+                "latency_ewma": None,
+                "latencies": deque(maxlen=self.histogram_size),
+                "opened_at": None,
+                "probe_in_flight": False,
+                "probe_started": None
+            }
+        return self.endpoints[endpoint]
+
+    def allow_request(self, endpoint):
+        """
+        Should we call this endpoint right now?
+
+        Args:
+            endpoint (str): Specialist endpoint
+
+        Returns:
+            bool: False while the circuit is open (or a half-open probe is already out)
+        """
+        with self._lock:
+            health = self._get(endpoint)
+
+            if health['state'] == OPEN:
+                if time.monotonic() - health['opened_at'] < self.cooldown:
+                    return False
+                health['state'] = HALF_OPEN
+                health['probe_in_flight'] = False
+                logger.info("Circuit half-open for %s, probing", endpoint)
+
+            if health['state'] == HALF_OPEN:
+                if health['probe_in_flight']:
+                    if time.monotonic() - health['probe_started'] < self.probe_timeout:
+                        return False
+                    logger.warning("Half-open probe of %s never reported back, probing again", endpoint)
+                health['probe_in_flight'] = True
+                health['probe_started'] = time.monotonic()
+
+            return True
+
+    def release(self, endpoint):
+        """
+        A call was abandoned without an outcome (e.g. the client went away
+        before the first token) - free the half-open probe slot it held
+        """
+        with self._lock:
+            self._get(endpoint)['probe_in_flight'] = False
+
+    def record(self, endpoint, success, latency=None):
+        """
+        Record the outcome of a call
+
+        Args:
+            endpoint (str): Specialist endpoint
+            success (bool): Whether the call returned a usable answer
+            latency (float): Seconds the call took
+        """
+        with self._lock:
+            health = self._get(endpoint)
+            health['outcomes'].append(success)
+
+            if latency is not None:
+                if health['latency_ewma'] is None:
+                    health['latency_ewma'] = latency
+                else:
+                    health['latency_ewma'] += self.ewma_alpha * (latency - health['latency_ewma'])
+
+            if success:
+                if latency is not None:
+                    health['latencies'].append(latency)
+                health['failures_in_row'] = 0
+                if health['state'] == HALF_OPEN:
+                    health['state'] = CLOSED
+                    health['outcomes'].clear()
+                    health['outcomes'].append(True)
+                    logger.info("Circuit closed for %s", endpoint)
+                health['probe_in_flight'] = False
+                return
+
+            health['failures_in_row'] += 1
+            outcomes = health['outcomes']
+            error_rate = outcomes.count(False) / len(outcomes)
+
+            trip = (
+                health['state'] == HALF_OPEN or
+                health['failures_in_row'] >= self.consecutive_failures or
+                (len(outcomes) >= self.min_requests and error_rate >= self.error_rate_threshold)
+            )
+            if trip and health['state'] != OPEN:
+                health['state'] = OPEN
+                health['opened_at'] = time.monotonic()
+                health['probe_in_flight'] = False
+                logger.warning("Circuit opened for %s (error rate %.0f%%)", endpoint, error_rate * 100)
+
+    def latency_percentile(self, endpoint, percentile, min_samples=20):
+        """
+        Latency percentile from recent successful calls
+
+        Args:
+            endpoint (str): Specialist endpoint
+            percentile (float): 0-100
+            min_samples (int): Return None until this many samples exist
+
+        Returns:
+            float or None: Seconds
+        """
+        with self._lock:
+            latencies = list(self._get(endpoint)['latencies'])
+
+        if len(latencies) < min_samples:
+            return None
+        return _percentile(latencies, percentile)
+
+    def get_status(self):
+        """Per-endpoint health summary"""
+        with self._lock:
+            status = {}
+            for endpoint, health in self.endpoints.items():
+                outcomes = health['outcomes']
+                p95 = _percentile(health['latencies'], 95)
+                status[endpoint] = {
+                    "state": health['state'],
+                    "error_rate": round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+                    "requests": len(outcomes),
+                    "latency_ewma": round(health['latency_ewma'], 3) if health['latency_ewma'] is not None else None,
+                    "latency_p95": round(p95, 3) if p95 is not None else None
+                }
+            return status
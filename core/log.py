@@ -0,0 +1,101 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE
+
+ROOT_LOGGER = "findingnemo"
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed via extra={...}"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name):
+    """
+    Get a component logger under the findingnemo namespace
+
+    Args:
+        name (str): Usually __name__
+
+    Returns:
+        logging.Logger
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, use_queue=LOG_QUEUE, stream=None):
+    """
+    Configure the findingnemo loggers once (later calls only change the level)
+
+    Args:
+        level (str): DEBUG, INFO, WARNING, ERROR
+        fmt (str): "text" or "json"
+        use_queue (bool): Hand records to a background thread so slow stdout never blocks callers
+        stream: Output stream (defaults to stdout)
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if root.handlers:
+        return root
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"))
+
+    if use_queue:
+        _start_listener(root, [handler])
+    else:
+        root.addHandler(handler)
+
+    root.propagate = False
+    return root
+
+
+def _start_listener(root, handlers):
+    """Route root's records through a queue to handlers on a background thread"""
+    global _listener
+
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    root.addHandler(logging.handlers.QueueHandler(records))
+
+
+def reconfigure_after_fork():
+    """
+    Restart the queue listener in a forked child
+
+    The listener thread doesn't survive fork() but the QueueHandler does, so
+    without this a child's records pile up in a queue nothing reads. Direct
+    handlers (use_queue off) work as inherited and are left alone.
+    """
+    if _listener is None:
+        return
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    _start_listener(root, _listener.handlers)
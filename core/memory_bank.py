@@ -1,68 +1,388 @@
 
-import json
+import os
+import threading
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from config import SIMILARITY_THRESHOLD
+from config import (SIMILARITY_THRESHOLD, HIERARCHICAL_MIN_SPECIALISTS, HIERARCHICAL_PROBES, RECLUSTER_GROWTH,
+                    INDEX_REDUCTION, INDEX_DIMENSIONS, INDEX_QUANTIZATION, INDEX_PQ_SUBVECTORS, INDEX_RERANK,
+                    INDEX_MIN_SPECIALISTS)
+from core.log import get_logger
+from core.quantization import QuantizedIndex
+from core.specialist_clusters import SpecialistClusters
+from core.storage import JsonStore
+
+logger = get_logger(__name__)
+
+_BATCH_SCORES = 1 << 24  # similarities per chunk of closest_batch (64 MB of float32)
+THRESHOLD_FIELDS = ('threshold', 'calibration')  # kept in the thresholds file, see MemoryBank
+
+def thresholds_file(bank_file):
+    """Calibrated thresholds live next to the bank: data/memory_bank.json -> data/memory_bank.thresholds.json"""
+    return f"{os.path.splitext(bank_file)[0]}.thresholds.json"
 
 class MemoryBank:
     """
     SINGLE RESPONSIBILITY: Store specialists and search for matches
     Does NOT create embeddings (uses EmbeddingService for that)
+    
+    Specialists and their normalized embedding matrix live in one tuple that
+    is replaced as a whole, so search never sees a half-updated bank and
+    forked server workers share the matrix copy-on-write. watch() reloads the
+    bank when something else rewrites the file (e.g. core/japan.py).
+    
+    Banks of HIERARCHICAL_MIN_SPECIALISTS or more are also clustered (see
+    SpecialistClusters) and searched two-level: closest centroids first,
+    then only their members. With INDEX_REDUCTION / INDEX_QUANTIZATION set,
+    banks of INDEX_MIN_SPECIALISTS or more rows also keep a compressed copy
+    (see QuantizedIndex) that picks `rerank` candidates for an exact re-rank.
+    Setting `hierarchical` to False searches a clustered bank flat (e.g. to
+    compare the two); setting `calibrated_thresholds` to False holds every
+    specialist to the bank `threshold` (e.g. to try another one in replay).
+    
+    Per-specialist "threshold" / "calibration" fields change often (see
+    ThresholdCalibrator), so they are written to their own small file
+    (thresholds_file) and overlaid on the records; a change swaps the
+    thresholds array only, without rebuilding the index or rewriting the
+    bank. Entries there win over the same fields in the bank file.
     """
     
-    def __init__(self, bank_file='data/memory_bank.json'):
+    def __init__(self, bank_file='data/memory_bank.json', create=True):
+        """
+        Args:
+            bank_file (str): JSON bank file
+            create (bool): Write an empty bank if the file is missing (False = only on the first write)
+        """
         self.bank_file = bank_file
-        self.specialists = []
+        self.create = create
+        self.store = JsonStore(bank_file, indent=2, backup=True)
+        self.thresholds_store = JsonStore(thresholds_file(bank_file), indent=2)
+        self._thresholds = {}  # intent_label -> {threshold, calibration}
+        self.threshold = SIMILARITY_THRESHOLD
+        self.probes = HIERARCHICAL_PROBES
+        self.rerank = INDEX_RERANK
+        self.hierarchical = True
+        self.calibrated_thresholds = True
+        # (specialists, float32 matrix of unit rows, SpecialistClusters or None, row -> specialist,
+        #  per-row thresholds or None, QuantizedIndex or None)
+        self._index = ([], None, None, None, None, None)
+        self._write_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
         self.load()
     
+    @classmethod
+    def from_matrix(cls, matrix, specialists, bank_file, quantized=None):
+        """
+        In-memory bank over a prepared matrix, one row per specialist
+        
+        For benchmarks and experiments on banks too large for JSON records;
+        nothing is written unless the bank is saved.
+        
+        Args:
+            matrix (np.ndarray): (n, d) float32 unit rows
+            specialists (list): n specialist records (or placeholders)
+            bank_file (str): File the bank would be saved to
+            quantized (QuantizedIndex): Compressed index over matrix, None = exact scan
+        """
+        bank = cls(bank_file=bank_file, create=False)
+        bank._index = (list(specialists), matrix, None, np.arange(len(matrix), dtype=np.int32), None, quantized)
+        return bank
+    
+    @property
+    def specialists(self):
+        return self._index[0]
+    
+    @specialists.setter
+    def specialists(self, specialists):
+        self._index = self._build_index(self._with_thresholds(specialists), self._index)
+    
+    def _with_thresholds(self, specialists):
+        """Records with the thresholds file overlaid"""
+        return [dict(spec, **self._thresholds[spec['intent_label']]) if spec['intent_label'] in self._thresholds
+                else spec for spec in specialists]
+    
+    def _apply_thresholds(self):
+        """Swap in the current thresholds, keeping the matrix, clusters and compressed index"""
+        specialists, matrix, clusters, owners, _, quantized = self._index
+        specialists = self._with_thresholds(specialists)
+        self._index = (specialists, matrix, clusters, owners, self._row_thresholds(specialists, owners), quantized)
+    
+    @staticmethod
+    def _rows(spec):
+        """Vectors a specialist is matched on: its description embedding plus any representatives"""
+        return [spec['embedding']] + spec.get('vectors', [])
+    
+    @staticmethod
+    def _row_thresholds(specialists, owners):
+        """Per-row specialist thresholds (NaN = bank default), None if no specialist has its own"""
+        if not any('threshold' in spec for spec in specialists):
+            return None
+        thresholds = np.array([spec.get('threshold', np.nan) for spec in specialists], dtype=np.float64)
+        return thresholds[owners]
+    
+    @classmethod
+    def _build_index(cls, specialists, previous=None):
+        """
+        Stack embeddings into a row-normalized matrix for one-shot cosine search
+        
+        A specialist with representative `vectors` (see core/specialist_vectors.py)
+        owns several consecutive rows; owners maps each row back to its
+        specialist, so the best row is the max-sim over a specialist's vectors.
+        
+        Rows of specialists whose vectors are unchanged in the previous index
+        are reused, so reloading a bank with a few new entries stays cheap.
+        Large banks are re-clustered on every change (incrementally, see
+        SpecialistClusters.build) and re-compressed (reusing the fitted
+        projection and codebooks, and the codes of unchanged rows, see
+        QuantizedIndex.build).
+        """
+        specialists = list(specialists)
+        if not specialists:
+            return specialists, None, None, None, None, None
+        
+        old_specialists, old_matrix, old_clusters, old_owners, _, old_quantized = \
+            previous or ([], None, None, None, None, None)
+        old_blocks = {}
+        if old_specialists and old_matrix is not None and 'embedding' in old_specialists[0]:
+            starts = np.searchsorted(old_owners, np.arange(len(old_specialists) + 1))
+            old_blocks = {spec['intent_label']: (spec, starts[i], starts[i + 1])
+                          for i, spec in enumerate(old_specialists) if 'embedding' in spec}
+        
+        counts = [1 + len(spec.get('vectors', [])) for spec in specialists]
+        owners = np.repeat(np.arange(len(specialists), dtype=np.int32), counts)
+        matrix = np.empty((len(owners), len(specialists[0]['embedding'])), dtype=np.float32)
+        reuse = np.full(len(owners), -1, dtype=np.int64)  # row -> its row in old_matrix, -1 = new
+        fresh = []
+        row = 0
+        for spec, count in zip(specialists, counts):
+            old = old_blocks.get(spec['intent_label'])
+            if old is not None and old[0]['embedding'] == spec['embedding'] and \
+                    old[0].get('vectors', []) == spec.get('vectors', []) and old_matrix.shape[1] == matrix.shape[1]:
+                matrix[row:row + count] = old_matrix[old[1]:old[2]]
+                reuse[row:row + count] = np.arange(old[1], old[2])
+            else:
+                matrix[row:row + count] = cls._rows(spec)
+                fresh.extend(range(row, row + count))
+            row += count
+        
+        if fresh:
+            rows = matrix[fresh]
+            norms = np.linalg.norm(rows, axis=1, keepdims=True)
+            matrix[fresh] = rows / np.where(norms == 0, 1, norms)
+        
+        clusters = None
+        if len(matrix) >= HIERARCHICAL_MIN_SPECIALISTS:
+            clusters = SpecialistClusters.build(matrix, old_clusters, growth=RECLUSTER_GROWTH)
+        quantized = None
+        if (INDEX_REDUCTION or INDEX_QUANTIZATION) and len(matrix) >= INDEX_MIN_SPECIALISTS:
+            quantized = QuantizedIndex.build(matrix, INDEX_REDUCTION, INDEX_DIMENSIONS, INDEX_QUANTIZATION,
+                                             INDEX_PQ_SUBVECTORS, previous=old_quantized, growth=RECLUSTER_GROWTH,
+                                             reuse=reuse)
+        return specialists, matrix, clusters, owners, cls._row_thresholds(specialists, owners), quantized
+    
     def load(self):
-        """Load specialists from disk"""
-        try:
-            with open(self.bank_file, 'r') as f:
-                data = json.load(f)
-                self.specialists = data.get('specialists', [])
-            print(f"✅ Loaded {len(self.specialists)} specialists")
-        except FileNotFoundError:
-            print(f"⚠️  Memory bank not found, creating new")
-            self.specialists = []
-            self.save()
+        """Load specialists from disk (also used to reload; the swap is atomic)"""
+        with self._write_lock:
+            self._thresholds = self.thresholds_store.read({})
+            data = self.store.read()
+            if data is None:
+                logger.warning("Memory bank not found, creating new")
+                self.specialists = []
+                if self.create:
+                    self.save()
+                return
+            self.specialists = data.get('specialists', [])
+            logger.info("Loaded %d specialists", len(self.specialists))
     
     def save(self):
-        """Save specialists to disk"""
-        data = {"specialists": self.specialists}
-        with open(self.bank_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Save specialists to disk (atomic, see JsonStore)"""
+        self.store.write({"specialists": self.specialists})
     
-    def search(self, query_embedding):
+    def _sync(self):
+        """Pick up writes from other processes before a read-modify-write (store lock held)"""
+        if self.store.modified():
+            data = self.store.read()
+            self.specialists = data.get('specialists', []) if data else []
+            logger.debug("Reloaded memory bank changed by another process")
+    
+    def _set_thresholds(self, fields_by_label):
+        """Write threshold fields to the thresholds file and swap them in (write lock held)"""
+        with self.thresholds_store.lock():
+            if self.thresholds_store.modified():
+                self._thresholds = self.thresholds_store.read({})
+            thresholds = dict(self._thresholds)
+            for label, fields in fields_by_label.items():
+                thresholds[label] = dict(thresholds.get(label, {}), **fields)
+            self._thresholds = thresholds
+            self.thresholds_store.write(thresholds)
+        self._apply_thresholds()
+    
+    def reload_if_changed(self):
         """
-        Find matching specialist using semantic similarity
+        Reload if the bank file changed since we last read or wrote it
+        
+        Returns:
+            bool: True if a new bank was swapped in
+        """
+        if not os.path.exists(self.bank_file):
+            return False
+        if not self.store.modified():
+            if self.thresholds_store is None or not self.thresholds_store.modified():
+                return False
+            with self._write_lock:
+                self._thresholds = self.thresholds_store.read({})
+                self._apply_thresholds()
+            return True
+        try:
+            self.load()
+        except (ValueError, OSError) as e:
+            # An external writer caught mid-write with no usable backup - keep serving, retry next poll
+            logger.warning("Memory bank reload failed, keeping current bank: %s", e)
+            return False
+        return True
+    
+    def watch(self, interval=2.0):
+        """
+        Poll the bank file from a daemon thread and hot-reload on change
+        The new index is built on that thread; searches keep using the old one until the swap
+        
+        Args:
+            interval (float): Seconds between mtime checks
+        """
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, args=(interval,),
+                                         name="memory-bank-watch", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        self._stop_watching.set()
+    
+    def _watch_loop(self, interval):
+        while not self._stop_watching.wait(interval):
+            self.reload_if_changed()
+    
+    def closest(self, query_embedding):
+        """
+        Best specialist for a query, whether or not it clears its threshold
+        
+        Each specialist is held to its own calibrated "threshold" if it has one
+        (see ThresholdCalibrator), else to the bank's. The best specialist that
+        clears its threshold wins; if none does, the most similar one is returned.
         
         Args:
             query_embedding (list): 384-dim vector from EmbeddingService
             
         Returns:
-            dict or None: {specialist: dict, similarity: float} if match found
+            dict or None: {specialist, similarity, threshold, matched (bool)}, None if the bank is empty
         """
-        if not self.specialists:
+        specialists, matrix, _, owners, thresholds, _ = index = self._index
+        if not specialists:
+            return None
+        thresholds = thresholds if self.calibrated_thresholds else None
+        
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_vec)
+        if norm == 0:
             return None
+        query_vec = query_vec / norm
+        
+        rows = self._candidate_rows(index, query_vec)
+        similarities = matrix[rows] @ query_vec if rows is not None else matrix @ query_vec
         
-        query_vec = np.array(query_embedding).reshape(1, -1)
+        if thresholds is None:
+            best = int(np.argmax(similarities))
+            limit = self.threshold
+        else:
+            limits = thresholds[rows] if rows is not None else thresholds
+            limits = np.where(np.isnan(limits), self.threshold, limits)
+            passing = similarities >= limits
+            best = int(np.argmax(np.where(passing, similarities, -np.inf) if passing.any() else similarities))
+            limit = float(limits[best])
         
-        best_match = None
-        best_similarity = 0
+        best_similarity = float(similarities[best])
+        row = int(rows[best]) if rows is not None else best
+        return {
+            "specialist": specialists[owners[row]],
+            "similarity": best_similarity,
+            "threshold": limit,
+            "matched": best_similarity >= limit
+        }
+    
+    def closest_batch(self, query_embeddings):
+        """
+        closest() for many queries at once
         
-        for specialist in self.specialists:
-            spec_vec = np.array(specialist['embedding']).reshape(1, -1)
-            similarity = cosine_similarity(query_vec, spec_vec)[0][0]
+        Flat banks score a chunk of queries with one matrix product; clustered
+        or compressed banks go query by query, since each query has its own
+        candidate rows.
+        
+        Args:
+            query_embeddings (array-like): (m, d) query vectors
             
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = specialist
+        Returns:
+            list: closest() result (or None) per query
+        """
+        specialists, matrix, clusters, owners, thresholds, quantized = self._index
+        if not specialists or (clusters is not None and self.hierarchical) or quantized is not None:
+            return [self.closest(query_embedding) for query_embedding in query_embeddings]
+        
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, matrix.shape[1])
+        norms = np.linalg.norm(queries, axis=1)
+        queries = queries / np.where(norms == 0, 1, norms)[:, None]
+        if thresholds is None or not self.calibrated_thresholds:
+            limits = None
+        else:
+            limits = np.where(np.isnan(thresholds), self.threshold, thresholds)
+        
+        results = []
+        chunk = max(1, _BATCH_SCORES // len(matrix))
+        for start in range(0, len(queries), chunk):
+            similarities = queries[start:start + chunk] @ matrix.T
+            if limits is None:
+                best = np.argmax(similarities, axis=1)
+            else:
+                passing = similarities >= limits
+                best = np.where(passing.any(axis=1), np.argmax(np.where(passing, similarities, -np.inf), axis=1),
+                                np.argmax(similarities, axis=1))
+            best_similarities = similarities[np.arange(len(best)), best]
+            for row, similarity, norm in zip(best, best_similarities, norms[start:start + chunk]):
+                if norm == 0:
+                    results.append(None)
+                    continue
+                limit = float(limits[row]) if limits is not None else self.threshold
+                results.append({
+                    "specialist": specialists[owners[row]],
+                    "similarity": float(similarity),
+                    "threshold": limit,
+                    "matched": float(similarity) >= limit
+                })
+        return results
+    
+    def _candidate_rows(self, index, query_vec):
+        """Rows to score exactly: cluster members, narrowed by the compressed index; None = all"""
+        _, _, clusters, _, _, quantized = index
+        rows = clusters.candidates(query_vec, self.probes) if clusters is not None and self.hierarchical else None
+        if quantized is not None:
+            # Sorted so the exact re-rank reads the (possibly mmap'd) matrix front to back
+            rows = np.sort(quantized.candidates(query_vec, self.rerank, rows))
+        return rows
+    
+    def search(self, query_embedding):
+        """
+        Find matching specialist using semantic similarity
         
-        if best_similarity >= SIMILARITY_THRESHOLD:
+        Args:
+            query_embedding (list): 384-dim vector from EmbeddingService
+            
+        Returns:
+            dict or None: {specialist: dict, similarity: float} if match found
+        """
+        candidate = self.closest(query_embedding)
+        if candidate and candidate['matched']:
             return {
-                "specialist": best_match,
-                "similarity": float(best_similarity)
+                "specialist": candidate['specialist'],
+                "similarity": candidate['similarity']
             }
         
         return None
@@ -78,24 +398,101 @@ class MemoryBank:
             embedding (list): Pre-computed 384-dim vector
             metadata (dict): Optional metadata
         """
-        # Check duplicate
-        for spec in self.specialists:
-            if spec['intent_label'] == intent_label:
-                print(f"⚠️  Specialist '{intent_label}' already exists")
-                return False
+        with self._write_lock, self.store.lock():
+            self._sync()
+            # Check duplicate
+            for spec in self.specialists:
+                if spec['intent_label'] == intent_label:
+                    logger.warning("Specialist '%s' already exists", intent_label)
+                    return False
+            
+            specialist = {
+                "intent_label": intent_label,
+                "description": description,
+                "endpoint": endpoint,
+                "embedding": embedding,
+                "metadata": metadata or {}
+            }
+            
+            self.specialists = self.specialists + [specialist]
+            self.save()
+        logger.info("Added specialist: %s", intent_label)
+        return True
+    
+    def update_specialist(self, intent_label, **fields):
+        """
+        Replace fields of an existing specialist (e.g. its representative vectors)
         
-        specialist = {
-            "intent_label": intent_label,
-            "description": description,
-            "endpoint": endpoint,
-            "embedding": embedding,
-            "metadata": metadata or {}
-        }
+        Returns:
+            bool: False if no specialist has this label
+        """
+        return bool(self.update_specialists({intent_label: fields}))
+    
+    def update_specialists(self, fields_by_label):
+        """
+        Replace fields of several specialists with one index rebuild and one write
         
-        self.specialists.append(specialist)
-        self.save()
-        print(f"✅ Added specialist: {intent_label}")
-        return True
+        THRESHOLD_FIELDS go to the thresholds file; an update of only those
+        leaves the index and the bank file alone.
+        
+        Args:
+            fields_by_label (dict): intent_label -> fields to replace
+            
+        Returns:
+            list: Labels that were updated (unknown ones are skipped)
+        """
+        with self._write_lock, self.store.lock():
+            self._sync()
+            known = {spec['intent_label'] for spec in self.specialists}
+            for label in fields_by_label:
+                if label not in known:
+                    logger.warning("Specialist '%s' not found", label)
+            updated = [label for label in fields_by_label if label in known]
+            bank = {label: {name: value for name, value in fields_by_label[label].items()
+                            if name not in THRESHOLD_FIELDS} for label in updated}
+            thresholds = {label: {name: value for name, value in fields_by_label[label].items()
+                                  if name in THRESHOLD_FIELDS} for label in updated}
+            if any(bank.values()):
+                self.specialists = [dict(spec, **bank[spec['intent_label']]) if bank.get(spec['intent_label'])
+                                    else spec for spec in self.specialists]
+                self.save()
+            if any(thresholds.values()):
+                self._set_thresholds({label: fields for label, fields in thresholds.items() if fields})
+        for label in updated:
+            logger.info("Updated specialist: %s (%s)", label, ", ".join(fields_by_label[label]))
+        return updated
+    
+    def measure_recall(self, query_embeddings):
+        """
+        How often two-level / compressed search finds the same best specialist as a flat scan
+        
+        Args:
+            query_embeddings (array-like): (m, d) query vectors
+            
+        Returns:
+            dict: {recall, candidates (mean fraction of the bank compared exactly), clusters,
+                   index_mb (compressed index, 0 without one)}
+        """
+        index = self._index
+        _, matrix, clusters, owners, _, quantized = index
+        clusters = clusters if self.hierarchical else None
+        if clusters is None and quantized is None:
+            return {"recall": 1.0, "candidates": 1.0, "clusters": 0, "index_mb": 0}
+        
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        hits, compared = 0, 0
+        for query_vec in queries:
+            expected = owners[np.argmax(matrix @ query_vec)]  # one query at a time, (m, n) scores can be GBs
+            rows = self._candidate_rows(index, query_vec)
+            hits += owners[rows[np.argmax(matrix[rows] @ query_vec)]] == expected
+            compared += len(rows)
+        return {
+            "recall": float(hits) / len(queries),
+            "candidates": compared / (len(queries) * len(matrix)),
+            "clusters": len(clusters.centroids) if clusters is not None else 0,
+            "index_mb": round(quantized.nbytes / 1e6, 1) if quantized is not None else 0
+        }
     
     def get_all_specialists(self):
         """Return list of all specialists"""
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import deque
+
+class MetricsStore:
+    """
+    SINGLE RESPONSIBILITY: Keep rolling measurements of model calls
+    Fed with ModelCaller results, read by DecisionEngine for ROI
+    """
+
+    def __init__(self, window_size=500, min_rate_window=3600):
+        """
+        Args:
+            window_size (int): Calls kept per (intent, model kind) and per model kind
+            min_rate_window (float): Seconds - rates are never extrapolated from a shorter span
+        """
+        self.window_size = window_size
+        self.min_rate_window = min_rate_window
+        self.by_intent = {}  # (intent_label, kind) -> deque of samples
+        self.by_kind = {}  # kind -> deque of samples
+        self._lock = threading.Lock()
+
+    def record(self, intent_label, kind, response):
+        """
+        Record one model call
+
+        Args:
+            intent_label (str): Intent the call served
+            kind (str): "generalist" or "specialist"
+            response (dict): ModelCaller result
+        """
+        if response.get('error'):
+            return
+
+        sample = {
+            "time": time.time(),
+            "prompt_tokens": response.get('prompt_tokens', 0),
+            "completion_tokens": response.get('completion_tokens', 0),
+            "latency": response.get('latency', 0.0)
+        }
+
+        with self._lock:
+            for key, table in (((intent_label, kind), self.by_intent), (kind, self.by_kind)):
+                if key not in table:
+                    table[key] = deque(maxlen=self.window_size)
+                table[key].append(sample)
+
+    def _summarize(self, samples):
+        n = len(samples)
+        return {
+            "samples": n,
+            "prompt_tokens": sum(s['prompt_tokens'] for s in samples) / n,
+            "completion_tokens": sum(s['completion_tokens'] for s in samples) / n,
+            "latency": sum(s['latency'] for s in samples) / n
+        }
+
+    def get_averages(self, kind, intent_label=None):
+        """
+        Average tokens and latency per call
+
+        Args:
+            kind (str): "generalist" or "specialist"
+            intent_label (str): Prefer this intent's samples, fall back to all of kind
+
+        Returns:
+            dict or None: {samples, prompt_tokens, completion_tokens, latency, scope}
+        """
+        with self._lock:
+            samples = list(self.by_intent.get((intent_label, kind), ()))
+            scope = "intent"
+            if not samples:
+                samples = list(self.by_kind.get(kind, ()))
+                scope = "global"
+
+        if not samples:
+            return None
+
+        summary = self._summarize(samples)
+        summary['scope'] = scope
+        return summary
+
+    def get_daily_rate(self, intent_label):
+        """
+        Observed queries/day for an intent across all model kinds
+
+        Returns:
+            float or None: None if the intent was never recorded
+        """
+        with self._lock:
+            times = [
+                s['time']
+                for (label, _), samples in self.by_intent.items() if label == intent_label
+                for s in samples
+            ]
+
+        if not times:
+            return None
+
+        span = max(time.time() - min(times), self.min_rate_window)
+        return len(times) / span * 86400
@@ -1,6 +1,18 @@
 import requests
 import json
+import logging
+import time
 from config import NVIDIA_API_KEY, NVIDIA_API_BASE, GENERALIST_MODEL
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Statuses that say the endpoint (not the request or the answer) is in trouble
+TRANSPORT_ERROR_STATUSES = {408, 429}
+
+def is_transport_status(status):
+    """Timeouts, rate limits and 5xx - the call failed on the way, not on its content"""
+    return status >= 500 or status in TRANSPORT_ERROR_STATUSES
 
 class ModelCaller:
     """
@@ -21,8 +33,8 @@ class ModelCaller:
         if not self.generalist_model:
             raise ValueError("GENERALIST_MODEL is not set in .env file")
         
-        print(f"   Using API: {self.base_url}")
-        print(f"   Generalist Model: {self.generalist_model}")
+        logger.info("Using API: %s", self.base_url)
+        logger.info("Generalist model: %s", self.generalist_model)
     
     def call_specialist(self, endpoint, user_prompt, max_tokens=500):
         """
@@ -38,11 +50,22 @@ class ModelCaller:
                 "answer": str,
                 "model": str,
                 "tokens_used": int,
-                "error": str (if any)
+                "prompt_tokens": int,
+                "completion_tokens": int,
+                "latency": float (seconds),
+                "error": str (if any),
+                "transport_error": bool (timeout, connection, 408/429/5xx - not the answer's fault)
             }
         """
+        start = time.perf_counter()
+        result = self._call_specialist(endpoint, user_prompt, max_tokens)
+        result['latency'] = round(time.perf_counter() - start, 3)
+        return result
+    
+    def _call_specialist(self, endpoint, user_prompt, max_tokens):
+        """Make the specialist request and parse the response"""
         try:
-            print(f"   Calling specialist: {endpoint}")
+            logger.debug("Calling specialist: %s", endpoint)
             
             response = requests.post(
                 f"{self.base_url}/chat/completions",
@@ -59,14 +82,12 @@ class ModelCaller:
                 timeout=60
             )
             
-            # Print response for debugging
-            print(f"   Response status: {response.status_code}")
+            logger.debug("Response status: %s", response.status_code)
             
             response.raise_for_status()
             data = response.json()
             
-            # DEBUG: Print response structure
-            print(f"   Response keys: {data.keys()}")
+            logger.debug("Response keys: %s", list(data.keys()))
             
             # Extract answer with fallbacks
             answer = None
@@ -84,12 +105,13 @@ class ModelCaller:
                     answer = choice['text']
             
             if not answer:
-                print(f"   ⚠️  Could not extract answer from response: {data}")
+                logger.warning("Could not extract answer from response: %s", data)
                 return {
                     "answer": f"Error: Invalid response format",
                     "model": endpoint,
                     "tokens_used": 0,
-                    "error": "Invalid response format"
+                    "error": "Invalid response format",
+                    "transport_error": False
                 }
             
             usage = data.get('usage', {})
@@ -98,7 +120,10 @@ class ModelCaller:
                 "answer": answer,
                 "model": endpoint,
                 "tokens_used": usage.get('total_tokens', 0),
-                "error": None
+                "prompt_tokens": usage.get('prompt_tokens', 0),
+                "completion_tokens": usage.get('completion_tokens', 0),
+                "error": None,
+                "transport_error": False
             }
             
         except requests.exceptions.HTTPError as e:
@@ -109,23 +134,23 @@ class ModelCaller:
             except:
                 error_msg += f": {response.text}"
             
-            print(f"❌ Specialist call failed: {error_msg}")
+            logger.error("Specialist call failed: %s", error_msg)
             return {
                 "answer": f"Error calling specialist: {error_msg}",
                 "model": endpoint,
                 "tokens_used": 0,
-                "error": error_msg
+                "error": error_msg,
+                "transport_error": is_transport_status(response.status_code)
             }
             
         except Exception as e:
-            print(f"❌ Specialist call failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Specialist call failed: %s", e)
             return {
                 "answer": f"Error: {str(e)}",
                 "model": endpoint,
                 "tokens_used": 0,
-                "error": str(e)
+                "error": str(e),
+                "transport_error": isinstance(e, requests.exceptions.RequestException)
             }
     
     def call_generalist(self, user_prompt, max_tokens=500):
@@ -141,12 +166,21 @@ class ModelCaller:
                 "answer": str,
                 "model": str,
                 "tokens_used": int,
+                "prompt_tokens": int,
+                "completion_tokens": int,
+                "latency": float (seconds),
                 "error": str (if any)
             }
         """
+        start = time.perf_counter()
+        result = self._call_generalist(user_prompt, max_tokens)
+        result['latency'] = round(time.perf_counter() - start, 3)
+        return result
+    
+    def _call_generalist(self, user_prompt, max_tokens):
+        """Make the generalist request and parse the response"""
         try:
-            print(f"   Making API request to: {self.base_url}/chat/completions")
-            print(f"   Model: {self.generalist_model}")
+            logger.debug("Making API request to: %s/chat/completions (model %s)", self.base_url, self.generalist_model)
             
             response = requests.post(
                 f"{self.base_url}/chat/completions",
@@ -163,20 +197,15 @@ class ModelCaller:
                 timeout=60
             )
             
-            # Print response for debugging
-            print(f"   Response status: {response.status_code}")
+            logger.debug("Response status: %s", response.status_code)
             
             # Check for errors
             response.raise_for_status()
             data = response.json()
             
-            # DEBUG: Print FULL response to see what we're getting
-            print(f"\n   === FULL API RESPONSE ===")
-            print(json.dumps(data, indent=2))
-            print(f"   === END RESPONSE ===\n")
-            
-            # DEBUG: Print response structure
-            print(f"   Response keys: {list(data.keys())}")
+            # Full response dump is only serialized when DEBUG is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Full API response:\n%s", json.dumps(data, indent=2))
             
             # Extract answer with multiple fallback strategies
             answer = None
@@ -184,40 +213,35 @@ class ModelCaller:
             # Strategy 1: Standard OpenAI format
             if 'choices' in data and len(data['choices']) > 0:
                 choice = data['choices'][0]
-                print(f"   Choice keys: {list(choice.keys())}")
+                logger.debug("Choice keys: %s", list(choice.keys()))
                 
                 if 'message' in choice:
                     message = choice['message']
                     # Try reasoning_content first (for Ultra 253B model)
                     if 'reasoning_content' in message and message['reasoning_content']:
                         answer = message['reasoning_content']
-                        print(f"   ✅ Extracted from reasoning_content")
+                        logger.debug("Extracted from reasoning_content")
                     # Then try regular content
                     elif 'content' in message and message['content']:
                         answer = message['content']
-                        print(f"   ✅ Extracted from message.content")
-                    print(f"   DEBUG: answer type={type(answer)}, length={len(answer) if answer else 0}")
+                        logger.debug("Extracted from message.content")
                 elif 'text' in choice:
                     answer = choice['text']
-                    print(f"   ✅ Extracted from text")
+                    logger.debug("Extracted from text")
             
             # Strategy 2: Direct content field
             elif 'content' in data:
                 answer = data['content']
-                print(f"   ✅ Extracted from direct content field")
-                print(f"   DEBUG: answer type={type(answer)}, value={repr(answer[:100]) if answer else answer}")
+                logger.debug("Extracted from direct content field")
             
             # Strategy 3: Response field
             elif 'response' in data:
                 answer = data['response']
-                print(f"   ✅ Extracted from response field")
-                print(f"   DEBUG: answer type={type(answer)}, value={repr(answer[:100]) if answer else answer}")
+                logger.debug("Extracted from response field")
             
             # Check if answer is None or empty (but allow empty string as valid)
             if answer is None:
-                # Print full response for debugging
-                print(f"   ⚠️  Could not extract answer. Full response:")
-                print(json.dumps(data, indent=2)[:500])  # First 500 chars
+                logger.warning("Could not extract answer. Response keys: %s", list(data.keys()))
                 return {
                     "answer": f"Error: Could not extract answer from API response. Response keys: {list(data.keys())}",
                     "model": self.generalist_model,
@@ -226,13 +250,14 @@ class ModelCaller:
                 }
             
             usage = data.get('usage', {})
-            answer_length = len(answer) if answer else 0
-            print(f"   ✅ Got response ({answer_length} chars)")
+            logger.debug("Got response (%d chars)", len(answer) if answer else 0)
             
             return {
                 "answer": answer,
                 "model": self.generalist_model,
                 "tokens_used": usage.get('total_tokens', 0),
+                "prompt_tokens": usage.get('prompt_tokens', 0),
+                "completion_tokens": usage.get('completion_tokens', 0),
                 "error": None
             }
             
@@ -241,12 +266,10 @@ class ModelCaller:
             try:
                 error_detail = response.json()
                 error_msg += f": {error_detail}"
-                print(f"❌ API Error Response: {error_detail}")
             except:
                 error_msg += f": {response.text[:200]}"
-                print(f"❌ API Error Text: {response.text[:200]}")
             
-            print(f"❌ Generalist call failed: {error_msg}")
+            logger.error("Generalist call failed: %s", error_msg)
             return {
                 "answer": f"API Error: {error_msg}",
                 "model": self.generalist_model,
@@ -256,7 +279,7 @@ class ModelCaller:
             
         except requests.exceptions.Timeout:
             error_msg = "Request timeout (60s)"
-            print(f"❌ Generalist call failed: {error_msg}")
+            logger.error("Generalist call failed: %s", error_msg)
             return {
                 "answer": f"Error: Request timed out after 60 seconds",
                 "model": self.generalist_model,
@@ -266,7 +289,7 @@ class ModelCaller:
             
         except requests.exceptions.RequestException as e:
             error_msg = f"Request error: {str(e)}"
-            print(f"❌ Generalist call failed: {error_msg}")
+            logger.error("Generalist call failed: %s", error_msg)
             return {
                 "answer": f"Error: {str(e)}",
                 "model": self.generalist_model,
@@ -276,9 +299,9 @@ class ModelCaller:
             
         except KeyError as e:
             error_msg = f"Invalid API response format: missing {str(e)}"
-            print(f"❌ Generalist call failed: {error_msg}")
+            logger.error("Generalist call failed: %s", error_msg)
             if 'data' in locals():
-                print(f"   Response data keys: {list(data.keys())}")
+                logger.debug("Response data keys: %s", list(data.keys()))
             return {
                 "answer": f"Error: Invalid API response format - missing {str(e)}",
                 "model": self.generalist_model,
@@ -288,12 +311,116 @@ class ModelCaller:
             
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
-            print(f"❌ Generalist call failed: {error_msg}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Generalist call failed: %s", error_msg)
             return {
                 "answer": f"Error: {str(e)}",
                 "model": self.generalist_model,
                 "tokens_used": 0,
                 "error": error_msg
-            }
\ No newline at end of file
+            }
+    
+    def stream_specialist(self, endpoint, user_prompt, max_tokens=500):
+        """
+        Stream a specialist response (see _stream for the events)
+        """
+        return self._stream(endpoint, user_prompt, max_tokens, temperature=0.1)
+    
+    def stream_generalist(self, user_prompt, max_tokens=500):
+        """
+        Stream a generalist response (see _stream for the events)
+        """
+        return self._stream(self.generalist_model, user_prompt, max_tokens, temperature=0.7)
+    
+    def _stream(self, model, user_prompt, max_tokens, temperature):
+        """
+        Call a model with stream=True and parse the server-sent events
+        
+        Args:
+            model (str): Model ID or specialist endpoint
+            user_prompt (str): User's query
+            max_tokens (int): Max tokens in response
+            temperature (float): Sampling temperature
+            
+        Yields:
+            dict: {"type": "chunk", "text": str} per content delta, then one
+                  {"type": "done", "answer", "model", "tokens_used", "prompt_tokens",
+                   "completion_tokens", "ttft", "latency", "error", "transport_error"}
+        """
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        usage = {}
+        error = None
+        transport_error = False
+        
+        try:
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream"
+                },
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": user_prompt}],
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "stream": True,
+                    "stream_options": {"include_usage": True}
+                },
+                timeout=60,
+                stream=True
+            )
+            
+            with response:
+                response.raise_for_status()
+                
+                for line in response.iter_lines(decode_unicode=True):
+                    # SSE: blank lines separate events, ':' lines are comments
+                    if not line or not line.startswith("data:"):
+                        continue
+                    
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    
+                    data = json.loads(payload)
+                    usage = data.get('usage') or usage
+                    
+                    for choice in data.get('choices', []):
+                        delta = choice.get('delta', {})
+                        text = delta.get('content') or delta.get('reasoning_content')
+                        if not text:
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        parts.append(text)
+                        yield {"type": "chunk", "text": text}
+        
+        except requests.exceptions.HTTPError as e:
+            error = f"HTTP Error {e.response.status_code}: {e.response.text[:200]}"
+            transport_error = is_transport_status(e.response.status_code)
+        except requests.exceptions.Timeout:
+            error = "Request timeout (60s)"
+            transport_error = True
+        except Exception as e:
+            error = f"Stream error: {str(e)}"
+            transport_error = isinstance(e, requests.exceptions.RequestException)
+        
+        if error:
+            logger.error("Streaming call to %s failed: %s", model, error)
+        
+        answer = "".join(parts)
+        yield {
+            "type": "done",
+            "answer": answer if answer or not error else f"Error: {error}",
+            "model": model,
+            "tokens_used": usage.get('total_tokens', 0),
+            "prompt_tokens": usage.get('prompt_tokens', 0),
+            "completion_tokens": usage.get('completion_tokens', 0),
+            "ttft": round(ttft, 3) if ttft is not None else None,
+            "latency": round(time.perf_counter() - start, 3),
+            "error": error,
+            "transport_error": transport_error
+        }
@@ -1,120 +1,527 @@
-from core.router import IntentRouter
+from core.router import IntentRouter, FALLBACK_INTENT_LABEL
 from core.embeddings import EmbeddingService
 from core.memory_bank import MemoryBank
 from core.model_caller import ModelCaller
 from core.query_logger import QueryLogger
 from core.decision_engine import DecisionEngine
+from core.training_scheduler import TrainingScheduler
+from core.decision_worker import DecisionWorker
+from core.metrics_store import MetricsStore
+from core.endpoint_health import EndpointHealth
+from core.stage_metrics import StageTimer, StageMetrics
+from core.tenants import Tenant, TenantRegistry, DEFAULT_TENANT, open_tenant
+from core.log import get_logger, configure_logging
+from config import (HEDGING_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, METRICS_TEXTFILE,
+                    MEMORY_BANK_WATCH_INTERVAL, BATCH_MAX_CONCURRENCY, BATCH_ENDPOINT_CONCURRENCY)
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+import itertools
+import threading
 import time
 
+logger = get_logger(__name__)
+
 class NemotronMetaAgent:
     """
     Main orchestrator - ties all components together
     This is the complete pipeline from user query to response
     """
     
-    def __init__(self):
-        print("\n" + "="*60)
-        print("INITIALIZING NEMOTRON META-AGENT")
-        print("="*60 + "\n")
+    def __init__(self, embedding_service=None, memory_bank=None, worker=None):
+        """
+        Args:
+            embedding_service (EmbeddingService): Optional preloaded service (shared by forked workers)
+            memory_bank (MemoryBank): Optional preloaded bank (shared by forked workers)
+            worker (int): Worker id (pid) when forked workers serve together - metrics are per worker
+        """
+        configure_logging()
+        logger.info("Initializing Nemotron meta-agent")
         
         # Initialize all components
-        print("Loading components...")
         self.router = IntentRouter()
-        self.embedding_service = EmbeddingService()
-        self.memory_bank = MemoryBank()
+        self.embedding_service = embedding_service or EmbeddingService()
+        if memory_bank is None:
+            # Our own bank - pick up edits to data/memory_bank.json without a restart
+            memory_bank = MemoryBank()
+            if MEMORY_BANK_WATCH_INTERVAL:
+                memory_bank.watch(MEMORY_BANK_WATCH_INTERVAL)
+        self.memory_bank = memory_bank
         self.model_caller = ModelCaller()
+        self.endpoint_health = EndpointHealth()
+        
+        # Hedged specialist calls (optional) - race the generalist on slow responses
+        self.hedging_enabled = HEDGING_ENABLED
+        self.hedge_stats = {"eligible": 0, "fired": 0}
+        self._hedge_lock = threading.Lock()
         self.query_logger = QueryLogger()
-        self.decision_engine = DecisionEngine()
+        self.metrics_store = MetricsStore()
+        self.stage_metrics = StageMetrics(textfile=METRICS_TEXTFILE, worker=worker)
+        self.decision_engine = DecisionEngine(metrics_store=self.metrics_store)
+        self.training_scheduler = TrainingScheduler(
+            credits_available=self.decision_engine.credits_available,
+            training_cost=self.decision_engine.training_cost
+        )
+        
+        # Logging and training decisions run in the background
+        self.decision_worker = DecisionWorker(self.query_logger, self.decision_engine)
+        self.decision_worker.subscribe(self._on_decision)
         
-        print("\n✅ All components loaded\n")
+        # Other tenants get their own bank, logs and thresholds, loaded on first use
+        self.tenants = TenantRegistry(self._open_tenant, default=Tenant(
+            DEFAULT_TENANT, self.memory_bank, self.query_logger, self.metrics_store,
+            self.decision_engine, self.decision_worker
+        ))
+        
+        logger.info("All components loaded")
+    
+    def _open_tenant(self, tenant_id):
+        """TenantRegistry factory - training jobs go to the shared scheduler under tenant:intent keys"""
+        tenant = open_tenant(tenant_id)
+        tenant.decision_worker.subscribe(
+            lambda intent_label, description, decision:
+                self._on_decision(tenant.job_key(intent_label), description, decision)
+        )
+        return tenant
     
-    def process_query(self, user_prompt):
+    def process_query(self, user_prompt, tenant_id=None):
         """
         Main pipeline: process a user query end-to-end
         
         Args:
             user_prompt (str): User's question
+            tenant_id (str): Tenant whose specialists, logs and thresholds apply (None = default)
             
         Returns:
             dict: Complete response with metadata
         """
-        print("\n" + "="*60)
-        print(f"PROCESSING QUERY: {user_prompt}")
-        print("="*60 + "\n")
+        logger.debug("Processing query: %s", user_prompt)
         
         start_time = time.time()
+        timer = StageTimer()
+        hedge = None
+        failed = None
+        tenant = self.tenants.get(tenant_id)
         
-        # STEP 1: Generate Intent
-        print("Step 1: Generating intent...")
-        intent = self.router.generate_intent(user_prompt)
-        print(f"✅ Intent: {intent['intent_label']}")
-        print(f"   Description: {intent['description']}\n")
-        
-        intent_label = intent['intent_label']
-        intent_description = intent['description']
-        
-        # STEP 2: Create Embedding
-        print("Step 2: Creating embedding...")
-        query_embedding = self.embedding_service.create_embedding(intent_description)
-        print(f"✅ Embedding created (384 dimensions)\n")
+        # STEPS 1-3: Intent, embedding, memory bank search
+        intent_label, intent_description, search_result = self._classify(user_prompt, timer, tenant)
         
-        # STEP 3: Search Memory Bank
-        print("Step 3: Searching for specialist...")
-        search_result = self.memory_bank.search(query_embedding)
-        
-        if search_result:
+        if search_result and not self.endpoint_health.allow_request(search_result['specialist']['endpoint']):
+            # SPECIALIST FOUND, BUT ITS CIRCUIT IS OPEN
+            logger.info("Specialist circuit open, going straight to generalist")
+            with timer.stage("model"):
+                response = self.model_caller.call_generalist(user_prompt)
+            routed_to = "generalist (circuit open)"
+            
+        elif search_result:
             # SPECIALIST FOUND
             specialist = search_result['specialist']
-            similarity = search_result['similarity']
-            
-            print(f"✅ Specialist found: {specialist['intent_label']}")
-            print(f"   Similarity: {similarity:.3f}\n")
             
             # STEP 4A: Call Specialist
-            print("Step 4: Calling specialist...")
-            response = self.model_caller.call_specialist(
-                specialist['endpoint'],
-                user_prompt
-            )
+            logger.debug("Step 4: Calling specialist %s", specialist['endpoint'])
+            with timer.stage("model"):
+                if self.hedging_enabled:
+                    response, routed_to, hedge = self._call_specialist_hedged(specialist['endpoint'], user_prompt)
+                else:
+                    response = self.model_caller.call_specialist(
+                        specialist['endpoint'],
+                        user_prompt
+                    )
+                    self.endpoint_health.record(specialist['endpoint'], not response['error'], response.get('latency'))
+                    routed_to = "specialist"
             
-            if response['error']:
-                print(f"⚠️  Specialist failed, falling back to generalist")
-                response = self.model_caller.call_generalist(user_prompt)
+            if routed_to != "specialist":
+                if response['error']:
+                    logger.warning("Specialist and hedged generalist both failed")
+                else:
+                    logger.debug("Answered by hedged generalist")
+            elif response['error']:
+                logger.warning("Specialist failed, falling back to generalist")
+                failed = response
+                with timer.stage("model"):
+                    response = self.model_caller.call_generalist(user_prompt)
                 routed_to = "generalist (fallback)"
             else:
-                routed_to = "specialist"
-                print(f"✅ Specialist responded\n")
-            
-            # No logging needed - specialist handled it
-            training_decision = None
+                logger.debug("Specialist responded")
             
         else:
-            # NO SPECIALIST FOUND
-            print(f"❌ No specialist found\n")
-            
             # STEP 4B: Call Generalist
-            print("Step 4: Calling generalist...")
-            response = self.model_caller.call_generalist(user_prompt)
+            logger.debug("Step 4: Calling generalist")
+            with timer.stage("model"):
+                response = self.model_caller.call_generalist(user_prompt)
             routed_to = "generalist"
-            print(f"✅ Generalist responded\n")
+            logger.debug("Generalist responded")
+        
+        result = self._build_result(user_prompt, intent_label, intent_description,
+                                    routed_to, response, start_time, timer, tenant)
+        self._record_match(tenant, search_result, routed_to, result, failed)
+        
+        if hedge:
+            with self._hedge_lock:
+                hedge['rate'] = round(self.hedge_stats['fired'] / self.hedge_stats['eligible'], 3)
+            result['metadata']['hedge'] = hedge
+        
+        logger.info("Query routed to %s in %.3fs (intent '%s')",
+                    routed_to, result['metadata']['latency'], intent_label)
+        
+        return result
+    
+    def process_batch(self, prompts, tenant_id=None, max_concurrency=BATCH_MAX_CONCURRENCY,
+                      endpoint_concurrency=BATCH_ENDPOINT_CONCURRENCY):
+        """
+        Batch pipeline for bulk ingestion (nightly jobs, evaluations)
+        
+        Same routing as process_query with the per-query overheads paid once:
+        intents are generated in parallel, all descriptions are embedded with
+        one create_embeddings_batch call and matched with one closest_batch
+        search, model calls are grouped by endpoint with at most
+        endpoint_concurrency in flight per endpoint, and the generalist-routed
+        queries are logged with a single write. Specialist calls are not hedged.
+        
+        Args:
+            prompts (list): User prompts
+            tenant_id (str): Tenant whose specialists, logs and thresholds apply (None = default)
+            max_concurrency (int): Router/model calls in flight overall
+            endpoint_concurrency (int): Model calls in flight per endpoint (the generalist is one endpoint)
+            
+        Returns:
+            list: process_query-shaped results, in prompt order
+        """
+        prompts = list(prompts)
+        if not prompts:
+            return []
+        
+        start_time = time.time()
+        tenant = self.tenants.get(tenant_id)
+        timers = [StageTimer() for _ in prompts]
+        
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts)), thread_name_prefix="batch") as pool:
+            # STEP 1: Intents, in parallel
+            def classify(i):
+                with timers[i].stage("router"):
+                    return self.router.generate_intent(prompts[i])
+            intents = list(pool.map(classify, range(len(prompts))))
+            
+            # STEPS 2-3: One embedding call and one bank search for every query the router labeled
+            routable = [i for i, intent in enumerate(intents) if not intent.get('error')]
+            search_results = [None] * len(prompts)
+            batch_timer = StageTimer()
+            if routable:
+                with batch_timer.stage("embedding"):
+                    embeddings = self.embedding_service.create_embeddings_batch(
+                        [intents[i]['description'] for i in routable]
+                    )
+                with batch_timer.stage("memory_search"):
+                    matches = tenant.memory_bank.closest_batch(embeddings)
+                for i, match in zip(routable, matches):
+                    search_results[i] = self._accept_match(tenant, match)
+            for timer in timers:
+                # Every query waited for the whole batch step
+                timer.timings.update(batch_timer.timings)
+            
+            # STEP 4: Model calls grouped by endpoint, interleaved so no endpoint's group holds every worker
+            groups = {}
+            for i, search_result in enumerate(search_results):
+                groups.setdefault(search_result['specialist']['endpoint'] if search_result else None, []).append(i)
+            limits = {endpoint: threading.Semaphore(endpoint_concurrency) for endpoint in list(groups) + [None]}
+            order = [i for row in itertools.zip_longest(*groups.values()) for i in row if i is not None]
+            futures = {i: pool.submit(self._call_batched, prompts[i], search_results[i], timers[i], limits)
+                       for i in order}
+            outcomes = [futures[i].result() for i in range(len(prompts))]
+        
+        results = []
+        pending_logs = []
+        for i, (response, routed_to, failed) in enumerate(outcomes):
+            result = self._build_result(prompts[i], intents[i]['intent_label'], intents[i]['description'],
+                                        routed_to, response, start_time, timers[i], tenant, pending_logs)
+            self._record_match(tenant, search_results[i], routed_to, result, failed)
+            result['metadata']['batch'] = {"size": len(prompts), "index": i}
+            results.append(result)
+        
+        # STEP 5: One log write (and one round of training decisions) for the whole batch
+        tenant.submit_batch(pending_logs)
+        
+        logger.info("Batch of %d routed in %.3fs (%d to specialists, %d logged)", len(prompts),
+                    time.time() - start_time, sum(1 for r in results if r['metadata']['routed_to'] == "specialist"),
+                    len(pending_logs))
+        return results
+    
+    def _call_batched(self, user_prompt, search_result, timer, limits):
+        """
+        Model call of one batched query, holding its endpoint's slot
+        
+        Returns:
+            tuple: (response, routed_to, failed specialist response or None)
+        """
+        endpoint = search_result['specialist']['endpoint'] if search_result else None
+        failed = None
+        if endpoint and not self.endpoint_health.allow_request(endpoint):
+            routed_to = "generalist (circuit open)"
+        elif endpoint:
+            with limits[endpoint], timer.stage("model"):
+                response = self.model_caller.call_specialist(endpoint, user_prompt)
+            self.endpoint_health.record(endpoint, not response['error'], response.get('latency'))
+            if not response['error']:
+                return response, "specialist", None
+            routed_to = "generalist (fallback)"
+            failed = response
+        else:
+            routed_to = "generalist"
+        
+        with limits[None], timer.stage("model"):
+            return self.model_caller.call_generalist(user_prompt), routed_to, failed
+    
+    def process_query_stream(self, user_prompt, tenant_id=None):
+        """
+        Streaming pipeline: same routing as process_query, but yields answer
+        chunks as they arrive. Logging and decisions happen after the stream ends.
+        
+        Args:
+            user_prompt (str): User's question
+            tenant_id (str): Tenant whose specialists, logs and thresholds apply (None = default)
             
-            # STEP 5: Log Query
-            print("Step 5: Logging query...")
-            self.query_logger.log_query(intent_label, intent_description, user_prompt)
+        Yields:
+            dict: {"type": "chunk", "text": str} for each piece of the answer,
+                  then one {"type": "result", "answer": str, "metadata": dict}
+        """
+        start_time = time.time()
+        timer = StageTimer()
+        state = {"first_chunk": None}
+        tenant = self.tenants.get(tenant_id)
+        
+        intent_label, intent_description, search_result = self._classify(user_prompt, timer, tenant)
+        
+        response = None
+        failed = None
+        if search_result and not self.endpoint_health.allow_request(search_result['specialist']['endpoint']):
+            logger.info("Specialist circuit open, going straight to generalist")
+            routed_to = "generalist (circuit open)"
+        elif search_result:
+            specialist = search_result['specialist']
+            try:
+                # Includes time the consumer spends between chunks
+                with timer.stage("model"):
+                    response = yield from self._relay(
+                        self.model_caller.stream_specialist(specialist['endpoint'], user_prompt), state
+                    )
+            finally:
+                if response is None:
+                    # Closed mid-stream (GeneratorExit - the client went away) or the relay raised: settle
+                    # the call anyway, a half-open probe left in flight would keep the circuit from closing
+                    if state['first_chunk'] is not None:
+                        self.endpoint_health.record(specialist['endpoint'], True)
+                    else:
+                        self.endpoint_health.release(specialist['endpoint'])
+            self.endpoint_health.record(specialist['endpoint'], not response['error'], response.get('latency'))
+            routed_to = "specialist"
             
-            # Get current count
-            count = self.query_logger.get_count(intent_label)
-            print(f"   Total queries for '{intent_label}': {count}\n")
+            # Fall back only if nothing reached the user yet
+            if response['error']:
+                failed = response
+            if response['error'] and state['first_chunk'] is None:
+                logger.warning("Specialist failed, falling back to generalist")
+                response = None
+                routed_to = "generalist (fallback)"
+        else:
+            routed_to = "generalist"
+        
+        if response is None:
+            with timer.stage("model"):
+                response = yield from self._relay(
+                    self.model_caller.stream_generalist(user_prompt), state
+                )
+        
+        result = self._build_result(user_prompt, intent_label, intent_description,
+                                    routed_to, response, start_time, timer, tenant)
+        self._record_match(tenant, search_result, routed_to, result, failed)
+        
+        # Time to first token as the user saw it, plus the model-side number
+        ttft = state['first_chunk'] - start_time if state['first_chunk'] else None
+        result['metadata']['ttft'] = round(ttft, 3) if ttft is not None else None
+        result['metadata']['model_ttft'] = response.get('ttft')
+        
+        yield {"type": "result", **result}
+    
+    def _call_specialist_hedged(self, endpoint, user_prompt):
+        """
+        Call the specialist; if it is slower than its own latency percentile,
+        fire the generalist too and take the first successful answer
+        
+        Both calls run on threads of their own, so the deadline counts from
+        the moment the specialist request starts and the generalist never
+        queues behind other queries' calls.
+        
+        Returns:
+            tuple: (response, routed_to, hedge info dict)
+        """
+        deadline = self.endpoint_health.latency_percentile(
+            endpoint, HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES
+        )
+        hedge = {"fired": False, "deadline": deadline, "winner": "specialist"}
+        
+        def record_health(future):
+            # Whenever the specialist finishes, even if it lost the race
+            response = future.result()
+            self.endpoint_health.record(endpoint, not response['error'], response.get('latency'))
+        
+        specialist_future = self._start(self.model_caller.call_specialist, endpoint, user_prompt)
+        specialist_future.add_done_callback(record_health)
+        
+        with self._hedge_lock:
+            self.hedge_stats['eligible'] += 1
+        
+        # Not enough latency history yet - no hedge
+        if deadline is None:
+            return specialist_future.result(), "specialist", hedge
+        
+        done, _ = wait([specialist_future], timeout=deadline)
+        if done:
+            return specialist_future.result(), "specialist", hedge
+        
+        hedge['fired'] = True
+        with self._hedge_lock:
+            self.hedge_stats['fired'] += 1
+        logger.info("Specialist slower than p%s (%.2fs), hedging with generalist", HEDGE_PERCENTILE, deadline)
+        
+        generalist_future = self._start(self.model_caller.call_generalist, user_prompt)
+        pending = {specialist_future: "specialist", generalist_future: "generalist (hedged)"}
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                routed_to = pending.pop(future)
+                response = future.result()
+                if not response['error']:
+                    # The loser can't be interrupted mid-request; its thread finishes and the answer is ignored
+                    hedge['winner'] = "specialist" if routed_to == "specialist" else "generalist"
+                    return response, routed_to, hedge
+        
+        # Both failed - report the generalist error so we don't fall back a second time
+        hedge['winner'] = None
+        return generalist_future.result(), "generalist (hedged)", hedge
+    
+    def _start(self, fn, *args):
+        """Run fn(*args) on a thread of its own, returning a Future for its result"""
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, name="hedge", daemon=True).start()
+        return future
+    
+    def _relay(self, stream, state):
+        """Pass chunk events through and return the final "done" event"""
+        for event in stream:
+            if event['type'] == "chunk":
+                if state['first_chunk'] is None:
+                    state['first_chunk'] = time.time()
+                yield event
+            else:
+                return event
+    
+    def _classify(self, user_prompt, timer, tenant):
+        """
+        Steps 1-3: generate intent, embed the description, search the tenant's memory bank
+        
+        Args:
+            user_prompt (str): User's question
+            timer (StageTimer): Collects router/embedding/memory_search timings
+            tenant (Tenant): Only this tenant's specialists are searched
             
-            # STEP 6: Check if Training Needed
-            print("Step 6: Checking if training needed...")
-            training_decision = self.decision_engine.make_decision(intent_label, count)
+        Returns:
+            tuple: (intent_label, intent_description, search_result or None)
+        """
+        # STEP 1: Generate Intent
+        with timer.stage("router"):
+            intent = self.router.generate_intent(user_prompt)
+        logger.debug("Step 1: Intent %s (%s)", intent['intent_label'], intent['description'])
+        
+        intent_label = intent['intent_label']
+        intent_description = intent['description']
+        
+        if intent.get('error'):
+            # No intent to match on - straight to the generalist
+            logger.debug("Steps 2-3 skipped: router failed")
+            return intent_label, intent_description, None
+        
+        # STEP 2: Create Embedding
+        with timer.stage("embedding"):
+            query_embedding = self.embedding_service.create_embedding(intent_description)
+        logger.debug("Step 2: Embedding created (%d dimensions)", len(query_embedding))
+        
+        # STEP 3: Search Memory Bank (each specialist against its own threshold)
+        with timer.stage("memory_search"):
+            search_result = self._accept_match(tenant, tenant.memory_bank.closest(query_embedding))
+        
+        if search_result:
+            logger.debug("Step 3: Specialist found: %s (similarity %.3f, threshold %.3f)",
+                         search_result['specialist']['intent_label'], search_result['similarity'],
+                         search_result['threshold'])
+        else:
+            logger.debug("Step 3: No specialist found")
+        
+        return intent_label, intent_description, search_result
+    
+    def _accept_match(self, tenant, search_result):
+        """MemoryBank.closest() result -> the match to route on, None = generalist"""
+        if search_result and not search_result['matched']:
+            # Near misses are occasionally tried so thresholds can also come down
+            if tenant.threshold_calibrator.explore(search_result):
+                return dict(search_result, explored=True)
+            return None
+        return search_result
+    
+    def _record_match(self, tenant, search_result, routed_to, result, failed=None):
+        """
+        Feed the specialist call's outcome to the threshold calibrator and report the match
+        
+        failed is the specialist's error response (the query fell back, or its stream broke off).
+        The router's intent for the query tells the calibrator whether the match was the right one.
+        """
+        if not search_result:
+            return
+        result['metadata']['match'] = {
+            "specialist": search_result['specialist']['intent_label'],
+            "similarity": round(search_result['similarity'], 3),
+            "threshold": round(search_result['threshold'], 3),
+            "explored": search_result.get('explored', False)
+        }
+        # Circuit-open and hedged-generalist answers say nothing about the match, nor do outages
+        if routed_to in ("specialist", "generalist (fallback)"):
+            intent_label = result['metadata']['intent_label']
+            tenant.threshold_calibrator.record(
+                search_result, failed is None, transport_error=bool(failed and failed.get('transport_error')),
+                intent_label=None if intent_label == FALLBACK_INTENT_LABEL else intent_label
+            )
+    
+    def _build_result(self, user_prompt, intent_label, intent_description, routed_to, response, start_time, timer,
+                      tenant, pending_logs=None):
+        """
+        Record metrics and usage, hand off logging for generalist-routed
+        queries to the tenant's worker and assemble the response dict
+        
+        With pending_logs (a list) the log event is appended there instead,
+        for the caller to submit as one batch.
+        """
+        with timer.stage("logging"):
+            kind = "specialist" if routed_to == "specialist" else "generalist"
+            tenant.metrics_store.record(intent_label, kind, response)
+            self.tenants.record(tenant, routed_to, response)
             
-            print(f"   Decision: {training_decision['decision']}")
-            for reason in training_decision['reasons'][:3]:  # Show first 3 reasons
-                print(f"   {reason}")
-            print()
+            training_decision = None
+            if routed_to == "generalist" and intent_label != FALLBACK_INTENT_LABEL:
+                # STEP 5: Hand off logging + training decision to the background worker
+                if pending_logs is None:
+                    tenant.submit(intent_label, intent_description, user_prompt)
+                else:
+                    pending_logs.append((intent_label, intent_description, user_prompt))
+                training_decision = tenant.decision_worker.get_decision(intent_label) or {
+                    "decision": "PENDING",
+                    "count": tenant.query_logger.get_count(intent_label)
+                }
         
         # Calculate metrics
         end_time = time.time()
@@ -126,33 +533,87 @@ class NemotronMetaAgent:
             "metadata": {
                 "intent_label": intent_label,
                 "intent_description": intent_description,
+                "tenant": tenant.tenant_id,
                 "routed_to": routed_to,
                 "latency": round(latency, 3),
                 "tokens_used": response.get('tokens_used', 0),
+                "stages": timer.as_metadata(),
                 "timestamp": datetime.now().isoformat()
             }
         }
+        self.stage_metrics.observe(timer.timings, {"routed_to": routed_to})
         
-        # Add training info if applicable
+        # Add last published training info (decided asynchronously)
         if training_decision:
             result['metadata']['training'] = {
                 "decision": training_decision['decision'],
-                "count": self.query_logger.get_count(intent_label)
+                "count": training_decision['count']
             }
             
-            if training_decision['decision'] == "TRAIN":
-                result['metadata']['training']['plan'] = self.decision_engine.get_training_plan(
-                    intent_label, intent_description
-                )
-        
-        print("="*60)
-        print("QUERY PROCESSING COMPLETE")
-        print("="*60 + "\n")
+            job = self.training_scheduler.jobs.get(tenant.job_key(intent_label))
+            if job:
+                result['metadata']['training']['job_status'] = job['status']
         
         return result
     
+    def _on_decision(self, intent_label, description, decision):
+        """Decision worker callback - queue approved intents for training"""
+        if decision['decision'] == "TRAIN":
+            self.training_scheduler.submit(intent_label, description, decision)
+    
+    def check_bottlenecks(self, tenant_id=None):
+        """
+        Check for bottlenecks in a tenant's query logs (with its own thresholds)
+        Queues approved intents with the training scheduler
+        Returns list of intents ready for training
+        """
+        tenant = self.tenants.get(tenant_id)
+        tenant.decision_worker.flush()
+        bottlenecks = tenant.query_logger.get_bottlenecks(
+            threshold=tenant.decision_engine.threshold,
+            min_rate=tenant.decision_engine.rate_threshold
+        )
+        
+        if not bottlenecks:
+            logger.info("No bottlenecks found")
+            return []
+        
+        logger.info("Found %d bottleneck(s)", len(bottlenecks))
+        
+        training_candidates = []
+        
+        for bottleneck in bottlenecks:
+            # Run decision engine
+            decision = tenant.decision_engine.make_decision(
+                bottleneck['intent_label'],
+                bottleneck['count'],
+                bottleneck['rate']
+            )
+            
+            logger.info("Bottleneck '%s': %d queries (%.2f/hour) -> %s", bottleneck['intent_label'],
+                        bottleneck['count'], bottleneck['rate'], decision['decision'])
+            
+            if decision['decision'] == "TRAIN":
+                job = self.training_scheduler.submit(
+                    tenant.job_key(bottleneck['intent_label']),
+                    bottleneck['description'],
+                    decision
+                )
+                training_candidates.append({
+                    "intent_label": bottleneck['intent_label'],
+                    "description": bottleneck['description'],
+                    "count": bottleneck['count'],
+                    "rate": bottleneck['rate'],
+                    "decision": decision,
+                    "job": job
+                })
+                logger.info("'%s' ready for training (job %s)", bottleneck['intent_label'], job['status'])
+        
+        return training_candidates
+    
     def get_system_status(self):
         """Get current system status"""
+        self.decision_worker.flush()
         specialists = self.memory_bank.get_all_specialists()
         logs = self.query_logger.get_all_logs()
         
@@ -164,7 +625,14 @@ class NemotronMetaAgent:
             "logs": {
                 "intent_types": len(logs),
                 "total_queries": sum(log['count'] for log in logs.values())
-            }
+            },
+            "bottlenecks": self.query_logger.get_bottlenecks(),
+            "endpoints": self.endpoint_health.get_status(),
+            "stages": self.stage_metrics.summary(),
+            "training": self.training_scheduler.get_status(),
+            "tenants": self.tenants.get_status(),
+            "router": self.router.get_status(),
+            "thresholds": self.tenants.default.threshold_calibrator.get_status()
         }
         
         return status
@@ -185,4 +653,30 @@ class NemotronMetaAgent:
             print("  (none)")
         
         print(f"\nIntent Types Logged: {status['logs']['intent_types']}")
-        print(f"Total Queries Logged: {status['logs']['total_queries']}\n")
\ No newline at end of file
+        print(f"Total Queries Logged: {status['logs']['total_queries']}")
+        
+        print(f"\nBottlenecks (≥{self.decision_engine.threshold} queries):")
+        if status['bottlenecks']:
+            for b in status['bottlenecks']:
+                print(f"  - {b['intent_label']}: {b['count']} queries ({b['rate']:.2f}/hour)")
+        else:
+            print("  (none)")
+        
+        if status['endpoints']:
+            print(f"\nSpecialist Endpoints:")
+            for endpoint, health in status['endpoints'].items():
+                print(f"  - {endpoint}: {health['state']} "
+                      f"(errors {health['error_rate']:.0%}, latency {health['latency_ewma']}s)")
+        
+        if status['stages']:
+            print(f"\nStage Latency (p50 / p95):")
+            for stage, stats in status['stages'].items():
+                print(f"  - {stage}: {stats['p50']}s / {stats['p95']}s ({stats['count']} requests)")
+        
+        training = status['training']
+        print(f"\nTraining Jobs: {training['jobs'] or '(none)'}")
+        print(f"Training Budget: ${training['spent']} spent, ${training['remaining_budget']} remaining")
+        if training['queue']:
+            print(f"Queue: {', '.join(training['queue'])}")
+        
+        print()
\ No newline at end of file
@@ -0,0 +1,227 @@
+import numpy as np
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+_CHUNK = 65536  # rows encoded / projected at a time, bounds float32 scratch
+_SCAN_CHUNK = 512  # int8 rows decoded per step of a scan; small enough that the float32 copy stays in cache
+
+def _train_codebook(vectors, k, iterations=15, seed=0):
+    """Euclidean k-means for one product quantization subspace"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    codebook = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _nearest(vectors, codebook)
+        sums = np.zeros_like(codebook)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)[:, None]
+        codebook = np.where(counts > 0, sums / np.maximum(counts, 1), codebook)
+    return codebook.astype(np.float32)
+
+
+def _nearest(vectors, codebook):
+    """Index of the closest codeword for each vector (||c||^2 - 2 x.c, in chunks)"""
+    sq = (codebook ** 2).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _CHUNK):
+        chunk = vectors[start:start + _CHUNK]
+        labels[start:start + _CHUNK] = np.argmin(sq - 2 * chunk @ codebook.T, axis=1)
+    return labels
+
+
+class QuantizedIndex:
+    """
+    SINGLE RESPONSIBILITY: Compressed copy of the bank matrix for a fast first pass
+
+    Rows are optionally reduced to fewer dimensions, either by PCA fitted on the
+    bank or by truncation (Matryoshka-style, only meaningful for embedding
+    models trained for it), and optionally quantized:
+
+    - int8: one scale per dimension, 1 byte per dimension
+    - pq: product quantization, `subvectors` bytes per row (256 codewords per subspace)
+
+    Scores against the compressed rows are approximate, so MemoryBank re-ranks
+    the best `rerank` candidates against the full-precision matrix.
+    """
+
+    def __init__(self, reduction, mean, components, method, codes, scale=None, codebooks=None,
+                 fitted_size=0):
+        self.reduction = reduction  # None, "pca" or "truncate"
+        self.mean = mean
+        self.components = components  # (dimensions, d) for pca, None otherwise
+        self.method = method  # None (float32), "int8" or "pq"
+        self.codes = codes
+        self.scale = scale
+        self.codebooks = codebooks  # (subvectors, 256, sub_dim) for pq
+        self.fitted_size = fitted_size
+
+    @property
+    def dimensions(self):
+        if self.codebooks is not None:
+            return self.codebooks.shape[0] * self.codebooks.shape[2]
+        return self.codes.shape[1]
+
+    @property
+    def nbytes(self):
+        """Memory held by the compressed index"""
+        return sum(array.nbytes for array in (self.codes, self.mean, self.components, self.scale, self.codebooks)
+                   if array is not None)
+
+    @classmethod
+    def build(cls, matrix, reduction=None, dimensions=128, method="int8", subvectors=16, previous=None,
+              growth=0.1, sample_size=50000, seed=0, reuse=None):
+        """
+        Compress matrix rows
+
+        While the bank stays within `growth` of the size the previous index was
+        fitted at, its projection, scales and codebooks are reused and only the
+        encoding is redone - and with `reuse`, only for rows that are new.
+
+        Args:
+            matrix (np.ndarray): (n, d) float32 unit rows
+            reduction (str): None, "pca" or "truncate"
+            dimensions (int): Target dimensions for the reduction
+            method (str): None (reduced float32), "int8" or "pq"
+            subvectors (int): PQ subspaces (must divide the reduced dimensions)
+            previous (QuantizedIndex): Index of the previous bank, fitted parameters reused if close
+            growth (float): Relative size change that triggers a refit
+            sample_size (int): Rows used to fit PCA and PQ codebooks
+            seed (int): Sampling / k-means seed
+            reuse (np.ndarray): Per row, its row in `previous` if unchanged, -1 if new
+
+        Returns:
+            QuantizedIndex
+        """
+        n, d = matrix.shape
+        fitted = previous is not None and previous.reduction == reduction and previous.method == method and \
+            abs(n - previous.fitted_size) <= growth * previous.fitted_size and \
+            (previous.components is None or previous.components.shape[1] == d)
+
+        if fitted:
+            index = cls(reduction, previous.mean, previous.components, method, None, previous.scale,
+                        previous.codebooks, previous.fitted_size)
+            if reuse is None:
+                index.codes = index._encode(cls._reduce(matrix, reduction, dimensions, index.mean, index.components))
+                return index
+            fresh = np.flatnonzero(reuse < 0)
+            kept = np.flatnonzero(reuse >= 0)
+            codes = index._encode(cls._reduce(matrix[fresh], reduction, dimensions, index.mean, index.components))
+            if method == "pq":
+                index.codes = np.empty((previous.codes.shape[0], n), dtype=previous.codes.dtype)
+                index.codes[:, kept] = previous.codes[:, reuse[kept]]
+                index.codes[:, fresh] = codes
+            else:
+                index.codes = np.empty((n, previous.codes.shape[1]), dtype=previous.codes.dtype)
+                index.codes[kept] = previous.codes[reuse[kept]]
+                index.codes[fresh] = codes
+            return index
+
+        rng = np.random.default_rng(seed)
+        sample = matrix[np.sort(rng.choice(n, size=min(n, sample_size), replace=False))]
+        mean = components = scale = codebooks = None
+        if reduction == "pca":
+            mean = sample.mean(axis=0)
+            _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+            components = vt[:min(dimensions, d)].astype(np.float32)
+
+        reduced = cls._reduce(matrix, reduction, dimensions, mean, components)
+
+        if method == "int8":
+            scale = np.maximum(np.abs(reduced).max(axis=0), 1e-6).astype(np.float32) / 127
+        elif method == "pq":
+            sub_dim = reduced.shape[1] // subvectors
+            if sub_dim * subvectors != reduced.shape[1]:
+                raise ValueError(f"{subvectors} subvectors don't divide {reduced.shape[1]} dimensions")
+            rng = np.random.default_rng(seed)
+            sample = reduced[rng.choice(n, size=min(n, sample_size), replace=False)]
+            codebooks = np.stack([
+                _train_codebook(np.ascontiguousarray(sample[:, m * sub_dim:(m + 1) * sub_dim]), 256, seed=seed + m)
+                for m in range(subvectors)
+            ])
+
+        index = cls(reduction, mean, components, method, None, scale, codebooks, n)
+        index.codes = index._encode(reduced)
+        logger.info("Fitted %s/%s index: %d rows, %d -> %d dims, %.1f MB",
+                    reduction or "full", method or "float32", n, d, reduced.shape[1], index.codes.nbytes / 1e6)
+        return index
+
+    def _encode(self, reduced):
+        """Codes for reduced rows with the fitted scales / codebooks"""
+        if self.method == "int8":
+            codes = np.empty(reduced.shape, dtype=np.int8)
+            for start in range(0, len(reduced), _CHUNK):
+                codes[start:start + _CHUNK] = np.clip(np.rint(reduced[start:start + _CHUNK] / self.scale), -127, 127)
+            return codes
+        if self.method == "pq":
+            sub_dim = self.codebooks.shape[2]
+            # Stored subspace-major, (subvectors, n), so each lookup gathers from a contiguous row
+            return np.stack([
+                _nearest(np.ascontiguousarray(reduced[:, m * sub_dim:(m + 1) * sub_dim]), self.codebooks[m])
+                for m in range(len(self.codebooks))
+            ]).astype(np.uint8)
+        return np.ascontiguousarray(reduced, dtype=np.float32)
+
+    @staticmethod
+    def _reduce(vectors, reduction, dimensions, mean, components):
+        if reduction == "pca":
+            out = np.empty((len(vectors), len(components)), dtype=np.float32)
+            for start in range(0, len(vectors), _CHUNK):
+                out[start:start + _CHUNK] = (vectors[start:start + _CHUNK] - mean) @ components.T
+            return out
+        if reduction == "truncate":
+            # Matryoshka: the leading dimensions are an embedding of their own, compare them by cosine
+            head = vectors[:, :dimensions]
+            norms = np.linalg.norm(head, axis=1, keepdims=True)
+            return (head / np.where(norms == 0, 1, norms)).astype(np.float32)
+        return vectors
+
+    def scores(self, query_vec, rows=None):
+        """
+        Approximate similarities of a (unit) query with all rows, or the given ones
+
+        With PCA the query is projected without centering: (x - mean).q only
+        differs from x.q by mean.q, the same for every row, so the ranking holds.
+        """
+        if self.reduction == "pca":
+            query = self.components @ query_vec
+        else:
+            query = self._reduce(query_vec[None, :], self.reduction, self.dimensions, None, None)[0]
+
+        if self.method == "pq":
+            codes = self.codes if rows is None else self.codes[:, rows]
+            sub_dim = self.codebooks.shape[2]
+            # Asymmetric distance: one lookup table per subspace, then gather and sum
+            tables = np.einsum('mkd,md->mk', self.codebooks, query.reshape(-1, sub_dim))
+            scores = np.zeros(codes.shape[1], dtype=np.float32)
+            for m in range(len(tables)):
+                scores += tables[m][codes[m]]
+            return scores
+
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.method is None:
+            return codes @ query
+        query = (query * self.scale).astype(np.float32)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _SCAN_CHUNK):
+            scores[start:start + _SCAN_CHUNK] = codes[start:start + _SCAN_CHUNK].astype(np.float32) @ query
+        return scores
+
+    def candidates(self, query_vec, count, rows=None):
+        """
+        Rows worth re-ranking at full precision
+
+        Args:
+            query_vec (np.ndarray): Unit query
+            count (int): Candidates to keep
+            rows (np.ndarray): Restrict to these rows (e.g. cluster members), None = all
+
+        Returns:
+            np.ndarray: Row indices of the `count` best approximate scores
+        """
+        scores = self.scores(query_vec, rows)
+        if count < len(scores):
+            best = np.argpartition(scores, -count)[-count:]
+        else:
+            best = np.arange(len(scores))
+        return best if rows is None else rows[best]
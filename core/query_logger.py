@@ -1,33 +1,55 @@
-import json
+import math
+import threading
+import time
 from datetime import datetime
+from config import RATE_HALF_LIFE_HOURS
+from core.log import get_logger
+from core.storage import JsonStore
+
+logger = get_logger(__name__)
 
 class QueryLogger:
     """
     SINGLE RESPONSIBILITY: Log queries and track counts
+    Also keeps an exponentially decayed count per intent so rates are O(1)
     """
     
-    def __init__(self, log_file='data/query_logs.json'):
+    def __init__(self, log_file='data/query_logs.json', half_life_hours=RATE_HALF_LIFE_HOURS, create=True):
         self.log_file = log_file
+        self.create = create  # write an empty log if the file is missing (False = only on the first write)
+        self.half_life = half_life_hours * 3600  # seconds
+        # Mean lifetime of a decayed query - decayed_count / tau = steady-state rate
+        self.tau = self.half_life / math.log(2)
         self.logs = {}
+        self.store = JsonStore(log_file)
+        self._lock = threading.RLock()  # DecisionWorker writes from a background thread
         self.load()
     
     def load(self):
         """Load logs from disk"""
-        try:
-            with open(self.log_file, 'r') as f:
-                self.logs = json.load(f)
-            print(f"✅ Loaded logs for {len(self.logs)} intent types")
-        except FileNotFoundError:
-            print(f"⚠️  Log file not found, creating new")
-            self.logs = {}
-            self.save()
+        with self._lock:
+            logs = self.store.read()
+            if logs is None:
+                logger.warning("Log file not found, creating new")
+                self.logs = {}
+                if self.create:
+                    self.save()
+                return
+            self.logs = logs
+        logger.info("Loaded logs for %d intent types", len(self.logs))
     
     def save(self):
-        """Save logs to disk"""
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+        """Save logs to disk (atomic, see JsonStore)"""
+        with self._lock:
+            self.store.write(self.logs)
+    
+    def _sync(self):
+        """Pick up writes from other processes before a read-modify-write (store lock held)"""
+        if self.store.modified():
+            self.logs = self.store.read({})
+            logger.debug("Reloaded query logs changed by another process")
     
-    def log_query(self, intent_label, intent_description, user_prompt):
+    def log_query(self, intent_label, intent_description, user_prompt, timestamp=None):
         """
         Log a query for an intent
         
@@ -35,15 +57,42 @@ class QueryLogger:
             intent_label (str): Intent label (e.g., "sql_generation")
             intent_description (str): Description of intent
             user_prompt (str): User's original query
+            timestamp (str): When the query was seen, ISO format (None = now)
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = timestamp or datetime.now().isoformat()
         
+        with self._lock, self.store.lock():
+            self._sync()
+            self._append(intent_label, intent_description, user_prompt, timestamp)
+            self.save()
+        logger.debug("Logged query for '%s' (count: %d)", intent_label, self.logs[intent_label]['count'])
+    
+    def log_queries(self, queries):
+        """
+        Log many queries with a single write (batch ingestion)
+        
+        Args:
+            queries (list): (intent_label, intent_description, user_prompt, timestamp or None) tuples
+        """
+        if not queries:
+            return
+        now = datetime.now().isoformat()
+        with self._lock, self.store.lock():
+            self._sync()
+            for intent_label, intent_description, user_prompt, timestamp in queries:
+                self._append(intent_label, intent_description, user_prompt, timestamp or now)
+            self.save()
+        logger.debug("Logged %d queries in one write", len(queries))
+    
+    def _append(self, intent_label, intent_description, user_prompt, timestamp):
+        """Add one query to the in-memory logs"""
         if intent_label in self.logs:
             # Intent exists - increment count
             self.logs[intent_label]['count'] += 1
             self.logs[intent_label]['last_seen'] = timestamp
             self.logs[intent_label]['queries'].append({
                 "prompt": user_prompt,
+                "description": intent_description,
                 "timestamp": timestamp
             })
         else:
@@ -55,12 +104,65 @@ class QueryLogger:
                 "last_seen": timestamp,
                 "queries": [{
                     "prompt": user_prompt,
+                    "description": intent_description,
                     "timestamp": timestamp
                 }]
             }
         
-        self.save()
-        print(f"✅ Logged query for '{intent_label}' (count: {self.logs[intent_label]['count']})")
+        # Batched and replayed queries count at their own time, not as "now"
+        try:
+            seen = datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            seen = time.time()
+        self._update_rate(self.logs[intent_label], seen)
+    
+    def _decay(self, entry, now):
+        """Decayed count of an entry as of now (seeded from history for old logs)"""
+        if 'decayed_count' not in entry:
+            # Logs written before rate tracking - replay stored timestamps once
+            entry['decayed_count'] = 0.0
+            entry['decay_updated'] = now
+            for query in entry.get('queries', []):
+                try:
+                    seen = datetime.fromisoformat(query['timestamp']).timestamp()
+                except (KeyError, ValueError):
+                    continue
+                entry['decayed_count'] += 0.5 ** (max(0.0, now - seen) / self.half_life)
+            return entry['decayed_count']
+        
+        elapsed = max(0.0, now - entry['decay_updated'])
+        return entry['decayed_count'] * 0.5 ** (elapsed / self.half_life)
+    
+    def _update_rate(self, entry, seen):
+        """O(1): add a query seen at epoch seconds seen to the running count"""
+        if 'decayed_count' not in entry:
+            # Seeding replays the query we just appended, so don't count it twice
+            self._decay(entry, seen)
+            return
+        if seen < entry['decay_updated']:
+            # Older than the count (a late batch): add it already decayed, the count stays dated
+            entry['decayed_count'] += 0.5 ** ((entry['decay_updated'] - seen) / self.half_life)
+            return
+        entry['decayed_count'] = self._decay(entry, seen) + 1.0
+        entry['decay_updated'] = seen
+    
+    def get_rate(self, intent_label, now=None):
+        """
+        Get time-decayed query rate for an intent
+        
+        Args:
+            intent_label (str): Intent label
+            now (float): Optional epoch seconds (defaults to current time)
+            
+        Returns:
+            float: Queries per hour
+        """
+        with self._lock:
+            entry = self.logs.get(intent_label)
+            if not isinstance(entry, dict):
+                return 0.0
+            decayed = self._decay(entry, now if now is not None else time.time())
+        return decayed / self.tau * 3600
     
     def get_count(self, intent_label):
         """Get count for specific intent"""
@@ -68,36 +170,45 @@ class QueryLogger:
             return self.logs[intent_label]['count']
         return 0
     
-    def get_bottlenecks(self, threshold=5):
+    def get_bottlenecks(self, threshold=5, min_rate=None):
         """
         Get intents that have crossed the threshold
         
         Args:
             threshold (int): Minimum count to be considered bottleneck
+            min_rate (float): If set, minimum queries/hour instead of count
             
         Returns:
-            list: List of intents with count >= threshold
+            list: List of intents with count >= threshold (or rate >= min_rate)
         """
         bottlenecks = []
         
-        for intent_label, data in self.logs.items():
-            if data['count'] >= threshold:
+        with self._lock:
+            items = list(self.logs.items())
+        
+        for intent_label, data in items:
+            rate = self.get_rate(intent_label)
+            crossed = rate >= min_rate if min_rate is not None else data['count'] >= threshold
+            if crossed:
                 bottlenecks.append({
                     "intent_label": intent_label,
                     "description": data['canonical_description'],
-                    "count": data['count']
+                    "count": data['count'],
+                    "rate": round(rate, 3)
                 })
         
         return bottlenecks
     
     def delete_log(self, intent_label):
         """Delete log entry (when specialist is created)"""
-        if intent_label in self.logs:
+        with self._lock, self.store.lock():
+            self._sync()
+            if intent_label not in self.logs:
+                return False
             del self.logs[intent_label]
             self.save()
-            print(f"✅ Deleted logs for '{intent_label}'")
-            return True
-        return False
+        logger.info("Deleted logs for '%s'", intent_label)
+        return True
     
     def get_all_logs(self):
         """Return all logs"""
@@ -0,0 +1,353 @@
+"""
+Offline replay of recorded traffic through the local routing stages
+
+Recorded prompts (QueryLogger storage and/or JSONL request files) are
+embedded and searched against a memory bank in batches, without calling
+the model: the answer doesn't matter for routing, and the cost of each
+call is projected from token counts. The router is replaced by the intent
+logged with the query, or one cached from an earlier run (IntentCache);
+it is only called for prompts with neither, and only if one is given.
+
+That makes it cheap to try a new SIMILARITY_THRESHOLD, a candidate bank
+or an index setting against real traffic before deploying it. --threshold
+replaces the calibrated per-specialist thresholds as well, unless
+--keep-calibrated is given (the specialists it leaves alone are listed).
+
+Usage (from the repo root):
+    python -m core.replay                                    # data/query_logs.json vs data/memory_bank.json
+    python -m core.replay --threshold 0.4 --requests traffic.jsonl --decisions decisions.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from config import REPLAY_BATCH_SIZE, REPLAY_COMPLETION_TOKENS
+from core.memory_bank import MemoryBank
+from core.storage import JsonStore
+from core.tenants import request_cost
+from core.threshold_calibrator import served_intents
+from core.log import get_logger, configure_logging
+
+logger = get_logger(__name__)
+
+def query_log_records(logs):
+    """
+    Replay records for every query in QueryLogger storage
+
+    Only generalist-routed queries are logged, so that is their baseline.
+
+    Args:
+        logs (dict): QueryLogger.get_all_logs()
+
+    Yields:
+        dict: {prompt, intent_label, description (None in older logs), routed_to, source}
+    """
+    for intent_label, entry in logs.items():
+        if not isinstance(entry, dict):
+            continue
+        for query in entry.get('queries', []):
+            yield {
+                "prompt": query['prompt'],
+                "intent_label": intent_label,
+                "description": query.get('description'),
+                "routed_to": "generalist",
+                "source": "query_logs"
+            }
+
+
+def jsonl_records(path):
+    """
+    Replay records from a JSONL file, one request per line
+
+    A line needs a "prompt" (or "title" and/or "body", as in requests.jsonl);
+    "intent_label", "description", "routed_to" (baseline, default generalist),
+    "prompt_tokens" and "completion_tokens" are used when present.
+
+    Yields:
+        dict: Record with at least prompt and source
+    """
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                logger.warning("%s:%d is not valid JSON, skipped", path, number)
+                continue
+            prompt = request.get('prompt') or "\n\n".join(
+                request[field] for field in ('title', 'body') if request.get(field))
+            if not prompt:
+                logger.warning("%s:%d has no prompt, skipped", path, number)
+                continue
+            yield dict(request, prompt=prompt, source=path)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for records without usage"""
+    return len(text) // 4 + 1
+
+
+class IntentCache:
+    """
+    SINGLE RESPONSIBILITY: Remember router intents per prompt across replays
+
+    Backed by a JSON file, so a prompt is classified by the router at most
+    once no matter how often it is replayed.
+    """
+
+    def __init__(self, cache_file='data/replay_intents.json', router=None):
+        """
+        Args:
+            cache_file (str): JSON file of prompt -> {intent_label, description}
+            router (IntentRouter): Classifies prompts missing from the cache (None = never call it)
+        """
+        self.store = JsonStore(cache_file)
+        self.intents = self.store.read({})
+        self.router = router
+        self.router_calls = 0
+        self._dirty = False
+
+    def get(self, prompt):
+        """
+        Cached intent for a prompt, asking the router on a miss if there is one
+
+        Returns:
+            dict or None: {intent_label, description}
+        """
+        intent = self.intents.get(prompt)
+        if intent is None and self.router is not None:
+            result = self.router.generate_intent(prompt)
+            self.router_calls += 1
+            intent = {"intent_label": result['intent_label'], "description": result['description']}
+            self.intents[prompt] = intent
+            self._dirty = True
+        return intent
+
+    def save(self):
+        if self._dirty:
+            self.store.write(self.intents)
+            self._dirty = False
+
+
+class ReplayEngine:
+    """
+    SINGLE RESPONSIBILITY: Route recorded queries offline and report the outcome
+
+    Records are processed in batches: one create_embeddings_batch call and
+    one MemoryBank.closest_batch call per batch. Thresholds are applied as
+    in production, minus exploration, so a replay is deterministic.
+    """
+
+    def __init__(self, memory_bank, embedding_service, intent_cache=None, batch_size=REPLAY_BATCH_SIZE,
+                 completion_tokens=REPLAY_COMPLETION_TOKENS):
+        """
+        Args:
+            memory_bank (MemoryBank): Bank to route against (threshold/index settings as configured on it)
+            embedding_service (EmbeddingService): Anything with create_embeddings_batch
+            intent_cache (IntentCache): Intents for records that weren't logged with one
+            batch_size (int): Records embedded and searched together
+            completion_tokens (int): Projected answer length for records without usage
+        """
+        self.memory_bank = memory_bank
+        self.embedding_service = embedding_service
+        self.intent_cache = intent_cache
+        self.batch_size = batch_size
+        self.completion_tokens = completion_tokens
+
+    def _intent(self, record):
+        """(intent_label, description, where the intent came from) for a record"""
+        if record.get('description'):
+            return record.get('intent_label'), record['description'], "logged"
+        intent = self.intent_cache.get(record['prompt']) if self.intent_cache else None
+        if intent:
+            return record.get('intent_label') or intent['intent_label'], intent['description'], "cached"
+        # No intent anywhere - embed the prompt itself
+        return record.get('intent_label'), record['prompt'], "prompt"
+
+    def run(self, records, decisions_file=None):
+        """
+        Replay records and summarize routing and projected cost
+
+        Args:
+            records (iterable): Records from query_log_records / jsonl_records (streamed)
+            decisions_file (str): Optional JSONL file for the per-query routing decisions
+
+        Returns:
+            dict: {queries, elapsed, queries_per_second, intents (by source), routed_to, by_specialist,
+                   hit_rate, baseline_hit_rate, covered, covered_hit_rate, misroutes, cost}
+        """
+        served_by = {}
+        for spec in self.memory_bank.get_all_specialists():
+            for label in served_intents(spec):
+                served_by.setdefault(label, spec['intent_label'])
+
+        report = {
+            "queries": 0,
+            "intents": {"logged": 0, "cached": 0, "prompt": 0},
+            "routed_to": {"specialist": 0, "generalist": 0},
+            "by_specialist": {},
+            "baseline_specialist": 0,
+            "covered": 0,
+            "covered_hits": 0,
+            "misroutes": 0,
+            "cost": {"baseline": 0.0, "replay": 0.0}
+        }
+        decisions = open(decisions_file, 'w') if decisions_file else None
+        start = time.perf_counter()
+        try:
+            records = iter(records)
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                intents = [self._intent(record) for record in batch]
+                embeddings = self.embedding_service.create_embeddings_batch([intent[1] for intent in intents])
+                matches = self.memory_bank.closest_batch(embeddings)
+                for record, intent, match in zip(batch, intents, matches):
+                    decision = self._route(record, intent, match, served_by, report)
+                    if decisions:
+                        decisions.write(json.dumps(decision) + "\n")
+        finally:
+            if decisions:
+                decisions.close()
+            if self.intent_cache:
+                self.intent_cache.save()
+        return self._summarize(report, time.perf_counter() - start)
+
+    def _route(self, record, intent, match, served_by, report):
+        """Route one record, add it to the report and return its decision"""
+        intent_label, description, intent_source = intent
+        specialist = match['specialist']['intent_label'] if match and match['matched'] else None
+        routed_to = "specialist" if specialist else "generalist"
+        baseline = "specialist" if record.get('routed_to', "generalist") == "specialist" else "generalist"
+
+        usage = {
+            "prompt_tokens": record.get('prompt_tokens', estimate_tokens(record['prompt'])),
+            "completion_tokens": record.get('completion_tokens', self.completion_tokens)
+        }
+        report['cost']['baseline'] += request_cost(baseline, usage)
+        report['cost']['replay'] += request_cost(routed_to, usage)
+
+        report['queries'] += 1
+        report['intents'][intent_source] += 1
+        report['routed_to'][routed_to] += 1
+        report['baseline_specialist'] += baseline == "specialist"
+        if specialist:
+            report['by_specialist'][specialist] = report['by_specialist'].get(specialist, 0) + 1
+        expected = served_by.get(intent_label)
+        if expected:
+            report['covered'] += 1
+            report['covered_hits'] += specialist == expected
+        if specialist and intent_label and specialist != expected:
+            report['misroutes'] += 1
+
+        return {
+            "prompt": record['prompt'],
+            "intent_label": intent_label,
+            "intent_source": intent_source,
+            "description": description,
+            "routed_to": routed_to,
+            "baseline": baseline,
+            "specialist": match['specialist']['intent_label'] if match else None,
+            "similarity": round(match['similarity'], 4) if match else None,
+            "threshold": round(match['threshold'], 4) if match else None
+        }
+
+    @staticmethod
+    def _summarize(report, elapsed):
+        queries = report['queries']
+        rate = lambda count, total: round(count / total, 4) if total else None
+        cost = report['cost']
+        return {
+            "queries": queries,
+            "elapsed": round(elapsed, 3),
+            "queries_per_second": round(queries / elapsed, 1) if elapsed else None,
+            "intents": report['intents'],
+            "routed_to": report['routed_to'],
+            "by_specialist": dict(sorted(report['by_specialist'].items(), key=lambda item: -item[1])),
+            "hit_rate": rate(report['routed_to']['specialist'], queries),
+            "baseline_hit_rate": rate(report['baseline_specialist'], queries),
+            "covered": report['covered'],
+            "covered_hit_rate": rate(report['covered_hits'], report['covered']),
+            "misroutes": report['misroutes'],
+            "cost": {
+                "baseline": round(cost['baseline'], 6),
+                "replay": round(cost['replay'], 6),
+                "delta": round(cost['replay'] - cost['baseline'], 6),
+                "delta_per_1k_queries": round((cost['replay'] - cost['baseline']) / queries * 1000, 6) if queries else None
+            }
+        }
+
+
+def print_report(report):
+    print("\n" + "="*60)
+    print("REPLAY REPORT")
+    print("="*60 + "\n")
+    print(f"Queries: {report['queries']} in {report['elapsed']}s ({report['queries_per_second']}/s)")
+    print(f"Intents: {report['intents']['logged']} logged, {report['intents']['cached']} cached, "
+          f"{report['intents']['prompt']} from the raw prompt")
+    print(f"Routed to: {report['routed_to']['specialist']} specialist, {report['routed_to']['generalist']} generalist")
+    print(f"Hit rate: {report['hit_rate']} (baseline {report['baseline_hit_rate']})")
+    print(f"Intents with a specialist: {report['covered']} queries, hit rate {report['covered_hit_rate']}, "
+          f"{report['misroutes']} misroutes")
+    if report['by_specialist']:
+        print("\nBy specialist:")
+        for label, count in report['by_specialist'].items():
+            print(f"  - {label}: {count}")
+    cost = report['cost']
+    print(f"\nProjected cost: ${cost['replay']:.4f} vs ${cost['baseline']:.4f} baseline "
+          f"(delta ${cost['delta']:+.4f}, ${cost['delta_per_1k_queries'] or 0:+.4f} per 1k queries)")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded queries through the local routing stages")
+    parser.add_argument("--bank", default="data/memory_bank.json")
+    parser.add_argument("--logs", default="data/query_logs.json", help="QueryLogger file ('' to skip)")
+    parser.add_argument("--requests", action="append", default=[], help="JSONL request file (repeatable)")
+    parser.add_argument("--threshold", type=float, help="Similarity threshold to try, for every specialist")
+    parser.add_argument("--keep-calibrated", action="store_true",
+                        help="With --threshold: specialists with a calibrated threshold keep it")
+    parser.add_argument("--cache", default="data/replay_intents.json", help="Intent cache file")
+    parser.add_argument("--live-router", action="store_true", help="Call the router for uncached prompts")
+    parser.add_argument("--decisions", help="Write per-query decisions to this JSONL file")
+    parser.add_argument("--batch-size", type=int, default=REPLAY_BATCH_SIZE)
+    parser.add_argument("--completion-tokens", type=int, default=REPLAY_COMPLETION_TOKENS)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if not os.path.exists(args.bank):
+        parser.error(f"memory bank not found: {args.bank}")
+
+    from core.embeddings import EmbeddingService
+    from core.query_logger import QueryLogger
+
+    configure_logging()
+    memory_bank = MemoryBank(bank_file=args.bank, create=False)
+    if args.threshold is not None:
+        memory_bank.threshold = args.threshold
+        memory_bank.calibrated_thresholds = not args.keep_calibrated
+        calibrated = [spec['intent_label'] for spec in memory_bank.specialists if 'threshold' in spec]
+        if args.keep_calibrated and calibrated:
+            logger.warning("--threshold %.3f does not apply to %d specialist(s) with a calibrated threshold: %s",
+                           args.threshold, len(calibrated), ", ".join(calibrated))
+
+    router = None
+    if args.live_router:
+        from core.router import IntentRouter
+        router = IntentRouter()
+
+    sources = [query_log_records(QueryLogger(log_file=args.logs).get_all_logs())] if args.logs else []
+    sources += [jsonl_records(path) for path in args.requests]
+
+    engine = ReplayEngine(memory_bank, EmbeddingService(), IntentCache(args.cache, router),
+                          batch_size=args.batch_size, completion_tokens=args.completion_tokens)
+    report = engine.run(itertools.chain(*sources), decisions_file=args.decisions)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,13 @@
+import re
+import threading
 import requests
 import json
-from config import NVIDIA_API_KEY, NVIDIA_API_BASE, ROUTER_MODEL
+from config import NVIDIA_API_KEY, NVIDIA_API_BASE, ROUTER_MODEL, ROUTER_PROMPT_MODE, ROUTER_STRUCTURED_OUTPUT
+from core.log import get_logger
 
-class IntentRouter:
-    """
-    SINGLE RESPONSIBILITY: Generate intent from user prompt
-    """
-    
-    def __init__(self):
-        self.model = ROUTER_MODEL
-        self.api_key = NVIDIA_API_KEY
-        self.base_url = NVIDIA_API_BASE
-    
-    def generate_intent(self, user_prompt):
-        """
-        Generate intent label and description from user prompt
-        
-        Args:
-            user_prompt (str): User's input query
-            
-        Returns:
-            dict: {
-                "intent_label": str,
-                "description": str,
-                "confidence": float
-            }
-        """
-        
-        system_prompt = """
-        You are an expert 'Intent and Action' classification agent. Your sole purpose is to analyze a user's prompt and respond ONLY with a single, valid JSON object.
+logger = get_logger(__name__)
+
+FULL_SYSTEM_PROMPT = """You are an expert 'Intent and Action' classification agent. Your sole purpose is to analyze a user's prompt and respond ONLY with a single, valid JSON object.
 
 Your JSON output MUST have this exact structure:
 {
@@ -105,50 +84,280 @@ This field is a *detailed, self-contained description of the user's full request
   "description": "Request for a creative writing piece, specifically a short poem, about the subject of a lonely robot."
 }
 """
-        try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "temperature": 0.0,
-                    "max_tokens": 200
-                },
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            content = response.json()['choices'][0]['message']['content']
-            
-            # Extract JSON
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            intent_data = json.loads(content)
-            
-            # Validate
-            if "intent_label" not in intent_data or "description" not in intent_data:
-                raise ValueError("Missing required fields")
+
+# Same contract in a fraction of the tokens; the rules are stated once and
+# the examples are real chat turns instead of prose
+COMPACT_SYSTEM_PROMPT = """Classify the user's prompt. Reply with one JSON object only: {"intent_label": "...", "description": "..."}
+intent_label: normalized 2-5 word topic noun phrase, always the same phrase for the same topic ("Global Warming", not "the effects of global warming").
+description: the full request rephrased as one self-contained sentence or question for vector search - keep every constraint, detail and feeling, drop fillers like "Hey" or "Can you"."""
+
+COMPACT_EXAMPLES = [
+    ("Can you write me a python script to sort a list?",
+     {"intent_label": "Python Programming",
+      "description": "Request for a Python code snippet that demonstrates how to sort a list."}),
+    ("I'm feeling overwhelmed by Japanese culture and customs and need some help.",
+     {"intent_label": "Japanese Culture",
+      "description": "User is feeling overwhelmed by Japanese culture and customs and is requesting resources or "
+                     "tips to understand them better."}),
+]
+
+
+def prompt_prefix(mode):
+    """
+    Messages sent ahead of the user prompt, identical on every call
+
+    Keeping everything fixed before the one variable message lets servers
+    with prefix caching reuse the prefill of the whole prefix.
+
+    Args:
+        mode (str): "full" (original prompt with inline examples) or "compact"
+
+    Returns:
+        list: Chat messages
+    """
+    if mode == "full":
+        return [{"role": "system", "content": FULL_SYSTEM_PROMPT}]
+    if mode == "compact":
+        messages = [{"role": "system", "content": COMPACT_SYSTEM_PROMPT}]
+        for prompt, intent in COMPACT_EXAMPLES:
+            messages.append({"role": "user", "content": prompt})
+            messages.append({"role": "assistant", "content": json.dumps(intent, separators=(",", ":"))})
+        return messages
+    raise ValueError(f"Unknown router prompt mode: {mode!r}")
+
+
+# Label returned when no intent could be generated; such queries are neither searched nor logged
+FALLBACK_INTENT_LABEL = "general_query"
+
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent_label": {"type": "string"},
+        "description": {"type": "string"}
+    },
+    "required": ["intent_label", "description"],
+    "additionalProperties": False
+}
+
+# Second chance for unparseable output: no long prefix, just the prompt and what came back
+REPAIR_SYSTEM_PROMPT = """Rewrite the router output below as one JSON object only: {"intent_label": "...", "description": "..."}
+intent_label: normalized 2-5 word topic of the prompt. description: the prompt's full request as one self-contained sentence."""
+
+# An error body naming one of these may be a rejection of the structured output field itself
+STRUCTURED_FIELDS = re.compile(r"response_format|nvext|guided_json")
+
+
+def structured_output_params(style):
+    """
+    Request fields that constrain decoding to INTENT_SCHEMA
+
+    Args:
+        style (str): "json_schema" (OpenAI response_format), "json_object",
+                     "guided_json" (NIM nvext) or None/"off"
+
+    Returns:
+        dict: Fields to merge into the chat completion request
+    """
+    if style in (None, "", "off"):
+        return {}
+    if style == "json_schema":
+        return {"response_format": {"type": "json_schema",
+                                    "json_schema": {"name": "intent", "schema": INTENT_SCHEMA, "strict": True}}}
+    if style == "json_object":
+        return {"response_format": {"type": "json_object"}}
+    if style == "guided_json":
+        return {"nvext": {"guided_json": INTENT_SCHEMA}}
+    raise ValueError(f"Unknown structured output style: {style!r}")
+
+
+_DECODER = json.JSONDecoder()
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+def _repairs(text):
+    """text as is, then with trailing commas dropped, then closed as if cut off by max_tokens"""
+    yield text
+    yield _TRAILING_COMMA.sub(r"\1", text)
+    for closer in ('"}', '}'):
+        yield _TRAILING_COMMA.sub(r"\1", text.rstrip() + closer)
+
+
+def parse_intent(content):
+    """
+    Intent fields from router output, tolerating what models wrap around the JSON
+
+    Decodes one object at each "{" in turn; raw_decode stops at the end of
+    the object, so code fences and prose before or after it don't matter.
+    Trailing commas and output truncated mid-object are patched up. The first
+    object with a non-empty intent_label and description wins.
+
+    Args:
+        content (str): Model output
+
+    Returns:
+        dict: The object, labels stripped, confidence 0.9 unless given
+
+    Raises:
+        ValueError: No usable intent object in the output
+    """
+    if not isinstance(content, str):
+        raise ValueError("Router output is not text")
+
+    start = content.find("{")
+    while start != -1:
+        for candidate in _repairs(content[start:]):
+            try:
+                data, _ = _DECODER.raw_decode(candidate)
+            except ValueError:
+                continue
+            if isinstance(data, dict) and all(isinstance(data.get(field), str) and data[field].strip()
+                                               for field in ("intent_label", "description")):
+                data["intent_label"] = data["intent_label"].strip()
+                data["description"] = data["description"].strip()
+                data.setdefault("confidence", 0.9)
+                return data
+            break
+        start = content.find("{", start + 1)
+    raise ValueError(f"No intent JSON in router output: {content[:80]!r}")
+
+
+
+class IntentRouter:
+    """
+    SINGLE RESPONSIBILITY: Generate intent from user prompt
+    
+    ROUTER_PROMPT_MODE picks the system prompt (see prompt_prefix); the
+    compact one trades a little labeling consistency for far fewer input
+    tokens per call - measure it with python -m benchmarks.router_prompts.
+    
+    Decoding is constrained to INTENT_SCHEMA (ROUTER_STRUCTURED_OUTPUT) where
+    the endpoint supports it; an endpoint that rejects the request field
+    (400/422 naming it, and the same call succeeds without it) gets plain
+    requests from then on. Output that still doesn't parse gets one
+    short repair call before falling back to FALLBACK_INTENT_LABEL.
+    """
+    
+    def __init__(self, prompt_mode=ROUTER_PROMPT_MODE, structured_output=ROUTER_STRUCTURED_OUTPUT):
+        self.model = ROUTER_MODEL
+        self.api_key = NVIDIA_API_KEY
+        self.base_url = NVIDIA_API_BASE
+        self.prompt_mode = prompt_mode
+        self.prefix = prompt_prefix(prompt_mode)
+        self.structured_output = structured_output
+        structured_output_params(structured_output)  # fail fast on a typo
+        
+        self.stats = {"queries": 0, "calls": 0, "parse_failures": 0, "repairs": 0, "repaired": 0,
+                      "fallbacks": 0, "wasted_calls": 0, "structured_unsupported": 0}
+        self._lock = threading.Lock()
+    
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += 1
+    
+    def generate_intent(self, user_prompt):
+        """
+        Generate intent label and description from user prompt
+        
+        Args:
+            user_prompt (str): User's input query
             
-            if "confidence" not in intent_data:
-                intent_data["confidence"] = 0.9
+        Returns:
+            dict: {
+                "intent_label": str,
+                "description": str,
+                "confidence": float,
+                "prompt_tokens": int,
+                "cached_tokens": int (prompt tokens served from the server's prefix cache, if reported),
+                "completion_tokens": int,
+                "repaired": bool (output only parsed after the repair call),
+                "error": str (only on fallback)
+            }
+        """
+        self._count("queries")
+        usage = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        try:
+            content = self._complete(self.prefix + [{"role": "user", "content": user_prompt}], usage)
+            try:
+                intent_data = parse_intent(content)
+                intent_data["repaired"] = False
+            except ValueError as e:
+                # The whole round trip is lost unless a short repair call recovers it
+                logger.warning("Unparseable router output, repairing: %s", e)
+                self._count("parse_failures", "wasted_calls", "repairs")
+                content = self._complete([
+                    {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Prompt: {user_prompt}\nRouter output: {content}"}
+                ], usage)
+                try:
+                    intent_data = parse_intent(content)
+                except ValueError:
+                    self._count("parse_failures", "wasted_calls")
+                    raise
+                intent_data["repaired"] = True
+                self._count("repaired")
             
+            intent_data.update(usage)
             return intent_data
             
         except Exception as e:
-            print(f"❌ Router Error: {e}")
+            self._count("fallbacks")
+            logger.error("Router error: %s", e)
             return {
-                "intent_label": "general_query",
+                "intent_label": FALLBACK_INTENT_LABEL,
                 "description": "General query requiring generalist model",
                 "confidence": 0.5,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+    
+    def _complete(self, messages, usage):
+        """One chat completion; returns the message text and adds the call's usage"""
+        style = self.structured_output
+        response = self._post(messages, structured_output_params(style))
+        
+        if style and response.status_code in (400, 422) and STRUCTURED_FIELDS.search(response.text):
+            # Either the endpoint can't constrain decoding or this request is bad anyway
+            # (e.g. too long) - only a plain retry that succeeds says it was the field
+            self._count("wasted_calls")
+            response = self._post(messages, {})
+            if response.ok and self.structured_output == style:
+                logger.warning("Router endpoint rejected %s output, sending plain requests from now on", style)
+                self.structured_output = None
+                self._count("structured_unsupported")
+        
+        response.raise_for_status()
+        data = response.json()
+        reported = data.get('usage') or {}
+        usage["prompt_tokens"] += reported.get('prompt_tokens', 0)
+        usage["cached_tokens"] += (reported.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        usage["completion_tokens"] += reported.get('completion_tokens', 0)
+        return data['choices'][0]['message']['content']
+    
+    def _post(self, messages, structured):
+        response = requests.post(
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.0,
+                "max_tokens": 200,
+                **structured
+            },
+            timeout=30
+        )
+        self._count("calls")
+        return response
+    
+    def get_status(self):
+        """Call counters plus parse failure (per call), fallback (per query) and wasted call rates"""
+        with self._lock:
+            stats = dict(self.stats)
+        rate = lambda count, total: round(count / total, 4) if total else 0.0
+        stats["structured_output"] = self.structured_output
+        stats["parse_failure_rate"] = rate(stats["parse_failures"], stats["calls"])
+        stats["fallback_rate"] = rate(stats["fallbacks"], stats["queries"])
+        stats["wasted_call_rate"] = rate(stats["wasted_calls"], stats["calls"])
+        return stats
@@ -0,0 +1,285 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+from config import SIMILARITY_THRESHOLD
+from config import HIERARCHICAL_PROBES, INDEX_RERANK
+from core.memory_bank import MemoryBank
+from core.quantization import QuantizedIndex
+from core.specialist_clusters import SpecialistClusters
+from core.log import get_logger
+from core.storage import JsonStore
+
+logger = get_logger(__name__)
+
+_VERSION = struct.Struct('<Q')
+
+def _default_shm_dir(bank_file):
+    """One segment directory per bank file, in RAM (/dev/shm) when available"""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    digest = hashlib.sha1(os.path.abspath(bank_file).encode()).hexdigest()[:12]
+    return os.path.join(base, f"findingnemo-bank-{digest}")
+
+
+class SharedMemoryBank(MemoryBank):
+    """
+    SINGLE RESPONSIBILITY: Share one memory bank between processes
+
+    Every published bank is an immutable generation in the segment directory:
+    gen-N.npy (normalized embedding matrix, mmap'd read-only by every process),
+    gen-N.owners.npy (matrix row -> specialist), gen-N.json (specialists
+    without embeddings or vectors) and, for banks large enough
+    for two-level search, gen-N.clusters.npz (centroids and assignments) and
+    gen-N.quantized.npz (compressed index, see QuantizedIndex). A 64-bit version counter
+    in a shared mmap names the current generation.
+
+    Readers never lock: each search compares the counter with the generation
+    it has mapped and switches when it moved. Writers serialize on a file
+    lock, persist data/memory_bank.json, write the new generation and then
+    bump the counter, so a generation is complete before anyone can see it.
+
+    Thresholds stay in the bank file (no thresholds file) so that every
+    process sees them with the generation they were published in.
+    """
+
+    def __init__(self, bank_file='data/memory_bank.json', shm_dir=None, keep_generations=3):
+        """
+        Args:
+            bank_file (str): JSON file the bank is persisted to
+            shm_dir (str): Segment directory (default: /dev/shm/findingnemo-bank-<hash>)
+            keep_generations (int): Old generations kept for readers still switching
+        """
+        self.shm_dir = shm_dir or _default_shm_dir(bank_file)
+        self.keep_generations = keep_generations
+        self._generation = 0
+        os.makedirs(self.shm_dir, exist_ok=True)
+
+        with self._file_lock():
+            fd = os.open(os.path.join(self.shm_dir, "version"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < _VERSION.size:
+                    os.ftruncate(fd, _VERSION.size)
+                self._control = mmap.mmap(fd, _VERSION.size)
+            finally:
+                os.close(fd)
+
+        self.bank_file = bank_file
+        self.store = JsonStore(bank_file, indent=2, backup=True)
+        self.thresholds_store = None
+        self._thresholds = {}
+        self.threshold = SIMILARITY_THRESHOLD
+        self.probes = HIERARCHICAL_PROBES
+        self.rerank = INDEX_RERANK
+        self.hierarchical = True
+        self.calibrated_thresholds = True
+        self._index = ([], None, None, None, None, None)
+        self._write_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+        if self.version:
+            self._refresh()
+            logger.info("Attached to shared memory bank generation %d (%d specialists)",
+                        self._generation, len(self._index[0]))
+        else:
+            self.load()
+
+    @property
+    def version(self):
+        """Generation currently published by any process"""
+        return _VERSION.unpack_from(self._control, 0)[0]
+
+    @property
+    def specialists(self):
+        self._refresh()
+        return self._index[0]
+
+    @specialists.setter
+    def specialists(self, specialists):
+        with self._write_lock, self._file_lock():
+            self._write_bank_file(specialists)
+            self._publish(specialists)
+
+    @contextmanager
+    def _file_lock(self):
+        """Cross-process writer lock"""
+        with open(os.path.join(self.shm_dir, "lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _paths(self, generation):
+        prefix = os.path.join(self.shm_dir, f"gen-{generation}")
+        return (f"{prefix}.npy", f"{prefix}.json", f"{prefix}.clusters.npz", f"{prefix}.owners.npy",
+                f"{prefix}.quantized.npz")
+
+    def _refresh(self):
+        """Switch to the published generation if it moved (no locks)"""
+        while True:
+            generation = self.version
+            if generation == self._generation:
+                return
+            matrix_path, meta_path, clusters_path, owners_path, quantized_path = self._paths(generation)
+            try:
+                with open(meta_path) as f:
+                    specialists = json.load(f)
+                matrix = owners = clusters = quantized = None
+                if specialists:
+                    matrix = np.load(matrix_path, mmap_mode='r')
+                    owners = np.load(owners_path, mmap_mode='r')
+                    clusters = self._load_clusters(clusters_path)
+                    quantized = self._load_quantized(quantized_path)
+            except FileNotFoundError:
+                # Superseded and cleaned up while we were switching - read the counter again
+                continue
+            self._index = (specialists, matrix, clusters, owners,
+                           self._row_thresholds(specialists, owners) if specialists else None, quantized)
+            self._generation = generation
+            return
+
+    def _publish(self, specialists):
+        """Write a new generation and make it current (caller holds the file lock)"""
+        # Previous clusters (possibly a generation behind) only seed the re-clustering
+        specialists, matrix, clusters, owners, thresholds, quantized = self._build_index(specialists, self._index)
+        generation = self.version + 1
+        matrix_path, meta_path, clusters_path, owners_path, quantized_path = self._paths(generation)
+
+        metadata = [{k: v for k, v in spec.items() if k not in ('embedding', 'vectors')} for spec in specialists]
+        if matrix is not None:
+            for path, array in ((matrix_path, matrix), (owners_path, owners)):
+                with open(f"{path}.tmp", 'wb') as f:
+                    np.save(f, array)
+                os.replace(f"{path}.tmp", path)
+        if clusters is not None:
+            with open(f"{clusters_path}.tmp", 'wb') as f:
+                np.savez(f, centroids=clusters.centroids, labels=clusters.labels,
+                         clustered_size=clusters.clustered_size)
+            os.replace(f"{clusters_path}.tmp", clusters_path)
+        if quantized is not None:
+            arrays = {name: getattr(quantized, name) for name in ('mean', 'components', 'scale', 'codebooks')
+                      if getattr(quantized, name) is not None}
+            with open(f"{quantized_path}.tmp", 'wb') as f:
+                np.savez(f, codes=quantized.codes, reduction=quantized.reduction or "",
+                         method=quantized.method or "", fitted_size=quantized.fitted_size, **arrays)
+            os.replace(f"{quantized_path}.tmp", quantized_path)
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump(metadata, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        # Aligned 8-byte store - readers see the old or the new generation, never a mix
+        _VERSION.pack_into(self._control, 0, generation)
+
+        if matrix is not None:
+            matrix, owners = np.load(matrix_path, mmap_mode='r'), np.load(owners_path, mmap_mode='r')
+        self._index = (metadata, matrix, clusters, owners, thresholds, quantized)
+        self._generation = generation
+
+        for old in range(generation - self.keep_generations, 0, -1):
+            paths = [p for p in self._paths(old) if os.path.exists(p)]
+            if not paths:
+                break
+            for path in paths:
+                os.remove(path)
+
+        logger.info("Published memory bank generation %d (%d specialists)", generation, len(specialists))
+
+    @staticmethod
+    def _load_clusters(path):
+        """Clusters published with a generation, None for banks searched flat"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return SpecialistClusters(data['centroids'], data['labels'], int(data['clustered_size']))
+
+    @staticmethod
+    def _load_quantized(path):
+        """Compressed index published with a generation, None if the bank has none"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            arrays = {name: data[name] if name in data else None
+                      for name in ('mean', 'components', 'scale', 'codebooks')}
+            return QuantizedIndex(str(data['reduction']) or None, method=str(data['method']) or None,
+                                  codes=data['codes'], fitted_size=int(data['fitted_size']), **arrays)
+
+    def _read_bank_file(self):
+        data = self.store.read()
+        if data is None:
+            logger.warning("Memory bank not found, creating new")
+            return []
+        return data.get('specialists', [])
+
+    def _write_bank_file(self, specialists):
+        self.store.write({"specialists": specialists})
+
+    def load(self):
+        """Re-read the bank file and publish it to every process"""
+        with self._write_lock, self._file_lock():
+            specialists = self._read_bank_file()
+            if not os.path.exists(self.bank_file):
+                self._write_bank_file(specialists)
+            self._publish(specialists)
+
+    def save(self):
+        """Nothing to do - every publish already persisted the bank file"""
+
+    def closest(self, query_embedding):
+        self._refresh()
+        return super().closest(query_embedding)
+
+    def closest_batch(self, query_embeddings):
+        self._refresh()
+        return super().closest_batch(query_embeddings)
+
+    def update_specialists(self, fields_by_label):
+        """Replace fields of several specialists in one generation, visible to all processes on return"""
+        with self._write_lock, self._file_lock():
+            specialists = self._read_bank_file()
+            known = {spec['intent_label'] for spec in specialists}
+            for label in fields_by_label:
+                if label not in known:
+                    logger.warning("Specialist '%s' not found", label)
+            updated = [label for label in fields_by_label if label in known]
+            if updated:
+                specialists = [dict(spec, **fields_by_label[spec['intent_label']])
+                               if spec['intent_label'] in updated else spec for spec in specialists]
+                self._write_bank_file(specialists)
+                self._publish(specialists)
+
+        for label in updated:
+            logger.info("Updated specialist: %s (%s)", label, ", ".join(fields_by_label[label]))
+        return updated
+
+    def add_specialist(self, intent_label, description, endpoint, embedding, metadata=None):
+        """
+        Add specialist with PRE-COMPUTED embedding, visible to all processes on return
+
+        Reads the bank file under the writer lock so concurrent adds from
+        different processes don't overwrite each other
+        """
+        with self._write_lock, self._file_lock():
+            specialists = self._read_bank_file()
+            if any(spec['intent_label'] == intent_label for spec in specialists):
+                logger.warning("Specialist '%s' already exists", intent_label)
+                return False
+
+            specialists.append({
+                "intent_label": intent_label,
+                "description": description,
+                "endpoint": endpoint,
+                "embedding": embedding,
+                "metadata": metadata or {}
+            })
+            self._write_bank_file(specialists)
+            self._publish(specialists)
+
+        logger.info("Added specialist: %s", intent_label)
+        return True
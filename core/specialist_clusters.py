@@ -0,0 +1,162 @@
+import numpy as np
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+def kmeans(matrix, k, iterations=20, seed=0, centroids=None):
+    """
+    Spherical k-means (cosine) over unit rows
+
+    Args:
+        matrix (np.ndarray): (n, d) float32 unit rows
+        k (int): Clusters
+        iterations (int): Max Lloyd iterations
+        seed (int): Seed for k-means++ init
+        centroids (np.ndarray): Start from these instead of k-means++
+
+    Returns:
+        tuple: (centroids (k, d) unit rows, labels (n,) int32)
+    """
+    rng = np.random.default_rng(seed)
+    if centroids is None:
+        centroids = _kmeans_plus_plus(matrix, k, rng)
+
+    labels = None
+    for _ in range(iterations):
+        new_labels = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+        if labels is not None and np.array_equal(new_labels, labels):
+            return centroids, labels
+        labels = new_labels
+        centroids = _centroids(matrix, labels, len(centroids), fallback=centroids)
+    # Out of iterations: the last update moved the centroids, label the rows against the ones returned
+    return centroids, np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+
+
+def _kmeans_plus_plus(matrix, k, rng):
+    """k-means++ seeding with cosine distance (1 - similarity)"""
+    centroids = np.empty((k, matrix.shape[1]), dtype=np.float32)
+    centroids[0] = matrix[rng.integers(len(matrix))]
+    distance = 1 - matrix @ centroids[0]
+    for i in range(1, k):
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        j = rng.choice(len(matrix), p=weights / total) if total > 0 else rng.integers(len(matrix))
+        centroids[i] = matrix[j]
+        distance = np.minimum(distance, 1 - matrix @ centroids[i])
+    return centroids
+
+
+def _centroids(matrix, labels, k, fallback):
+    """Normalized cluster means; empty clusters keep their previous centroid"""
+    sums = np.zeros((k, matrix.shape[1]), dtype=np.float32)
+    np.add.at(sums, labels, matrix)
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    empty = norms[:, 0] == 0
+    centroids = sums / np.where(norms == 0, 1, norms)
+    centroids[empty] = fallback[empty]
+    return centroids
+
+
+def kmedoids(matrix, k, iterations=20, seed=0):
+    """
+    k-medoids (cosine) over unit rows - like k-means, but every center is one of the rows
+
+    Returns:
+        np.ndarray: Row indices of the k medoids
+    """
+    n = len(matrix)
+    if k >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    similarity = matrix @ matrix.T
+
+    # k-means++ style seeding on the precomputed similarities
+    medoids = [int(rng.integers(n))]
+    distance = 1 - similarity[medoids[0]]
+    for _ in range(1, k):
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        medoids.append(int(rng.choice(n, p=weights / total)) if total > 0 else
+                       int(next(i for i in range(n) if i not in medoids)))
+        distance = np.minimum(distance, 1 - similarity[medoids[-1]])
+    medoids = np.array(medoids)
+
+    for _ in range(iterations):
+        labels = np.argmax(similarity[:, medoids], axis=1)
+        updated = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            if len(members):
+                # The member closest to all the others
+                updated[c] = members[np.argmax(similarity[np.ix_(members, members)].sum(axis=1))]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+    return medoids
+
+
+class SpecialistClusters:
+    """
+    SINGLE RESPONSIBILITY: Coarse level of two-level specialist search
+
+    Specialists are grouped by k-means over their embeddings (about sqrt(n)
+    clusters). A query is compared with the centroids first and then only
+    with the members of the `probes` closest clusters, instead of with every
+    specialist. Immutable - rebuilt along with the memory bank index.
+    """
+
+    def __init__(self, centroids, labels, clustered_size):
+        """
+        Args:
+            centroids (np.ndarray): (k, d) unit rows
+            labels (np.ndarray): (n,) cluster of each matrix row
+            clustered_size (int): Bank size at the last full k-means run
+        """
+        self.centroids = centroids
+        self.labels = labels
+        self.clustered_size = clustered_size
+
+        order = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        self.members = [order[offsets[c]:offsets[c + 1]] for c in range(len(centroids))]
+
+    @classmethod
+    def build(cls, matrix, previous=None, growth=0.1, seed=0):
+        """
+        Cluster the matrix rows
+
+        While the bank is within `growth` of the size it was last fully
+        clustered at, rows are reassigned to the previous centroids and the
+        centroids refreshed (one Lloyd step, a single matmul). Beyond that
+        k-means runs from scratch with k = sqrt(n).
+
+        Args:
+            matrix (np.ndarray): (n, d) unit rows
+            previous (SpecialistClusters): Clusters of the previous index
+            growth (float): Relative size change that triggers a full re-cluster
+            seed (int): k-means seed
+
+        Returns:
+            SpecialistClusters
+        """
+        n = len(matrix)
+        if previous is not None and previous.centroids.shape[1] == matrix.shape[1] and \
+                abs(n - previous.clustered_size) <= growth * previous.clustered_size:
+            centroids, labels = kmeans(matrix, len(previous.centroids), iterations=1,
+                                       centroids=previous.centroids)
+            return cls(centroids, labels, previous.clustered_size)
+
+        k = max(1, int(round(np.sqrt(n))))
+        centroids, labels = kmeans(matrix, k, seed=seed)
+        logger.info("Clustered %d specialists into %d clusters", n, k)
+        return cls(centroids, labels, n)
+
+    def candidates(self, query_vec, probes):
+        """
+        Rows worth comparing with a (unit) query
+
+        Returns:
+            np.ndarray: Row indices of the members of the closest clusters
+        """
+        closest = np.argsort(self.centroids @ query_vec)[::-1][:probes]
+        return np.concatenate([self.members[c] for c in closest])
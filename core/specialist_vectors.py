@@ -0,0 +1,199 @@
+"""
+Multi-vector specialists from logged query traffic
+
+A specialist is embedded from one long hand-written description, which short
+router intents often match poorly. This picks a few representative vectors
+(k-medoids) out of the intent descriptions logged for the specialist's intent
+and stores them as the specialist's `vectors`; MemoryBank then matches on the
+best of the description embedding and those vectors.
+
+Queries belong to a specialist when their intent label is the specialist's
+intent_label or listed in its metadata "intents".
+
+Usage (from the repo root):
+    python -m core.specialist_vectors --evaluate   # hit rate before/after on held-out queries
+    python -m core.specialist_vectors              # refresh vectors in data/memory_bank.json
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+from config import SPECIALIST_VECTORS, SPECIALIST_VECTORS_MIN_QUERIES, SPECIALIST_VECTORS_SAMPLE
+from core.memory_bank import MemoryBank
+from core.specialist_clusters import kmedoids
+from core.log import get_logger, configure_logging
+
+logger = get_logger(__name__)
+
+def logged_descriptions(query_logger, specialist):
+    """Intent descriptions of the logged queries belonging to a specialist (prompt for older logs)"""
+    labels = [specialist['intent_label']] + specialist.get('metadata', {}).get('intents', [])
+    logs = query_logger.get_all_logs()
+    return [query.get('description') or query['prompt']
+            for label in labels if label in logs
+            for query in logs[label].get('queries', [])]
+
+
+def _sample(items, size, seed=0):
+    """Up to size items, picked at random but kept in their original order"""
+    if len(items) <= size:
+        return list(items)
+    rng = np.random.default_rng(seed)
+    return [items[i] for i in np.sort(rng.choice(len(items), size=size, replace=False))]
+
+
+def representatives(embeddings, k=SPECIALIST_VECTORS, sample_size=SPECIALIST_VECTORS_SAMPLE):
+    """
+    Pick k representative vectors (medoids, so real query vectors) from embeddings
+
+    k-medoids compares every pair, so at most sample_size embeddings are used.
+
+    Returns:
+        list: Up to k vectors as lists
+    """
+    embeddings = _sample(embeddings, sample_size)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    return [embeddings[i] for i in sorted(kmedoids(matrix, k))]
+
+
+def _grouped_embeddings(embedding_service, texts_by_label):
+    """Embed every specialist's texts in one batch call"""
+    texts = [text for group in texts_by_label.values() for text in group]
+    embeddings = embedding_service.create_embeddings_batch(texts) if texts else []
+    grouped, start = {}, 0
+    for label, group in texts_by_label.items():
+        grouped[label] = embeddings[start:start + len(group)]
+        start += len(group)
+    return grouped
+
+
+def build_vectors(specialists, query_logger, embedding_service, k=SPECIALIST_VECTORS,
+                  min_queries=SPECIALIST_VECTORS_MIN_QUERIES, sample_size=SPECIALIST_VECTORS_SAMPLE):
+    """
+    Representative vectors for every specialist with enough logged queries
+    (a sample of sample_size of them is embedded, see representatives)
+
+    Returns:
+        dict: intent_label -> list of vectors
+    """
+    texts = {spec['intent_label']: logged_descriptions(query_logger, spec) for spec in specialists}
+    texts = {label: _sample(group, sample_size) for label, group in texts.items() if len(group) >= min_queries}
+    return {label: representatives(embeddings, k, sample_size)
+            for label, embeddings in _grouped_embeddings(embedding_service, texts).items()}
+
+
+def refresh_vectors(memory_bank, query_logger, embedding_service, k=SPECIALIST_VECTORS,
+                    min_queries=SPECIALIST_VECTORS_MIN_QUERIES, sample_size=SPECIALIST_VECTORS_SAMPLE):
+    """
+    Rebuild and store the vectors of every specialist with enough logged queries
+    (one update, so the index is rebuilt and the bank written once)
+
+    Returns:
+        dict: intent_label -> number of vectors stored
+    """
+    vectors = build_vectors(memory_bank.get_all_specialists(), query_logger, embedding_service, k, min_queries,
+                            sample_size)
+    updated = memory_bank.update_specialists({label: {"vectors": group} for label, group in vectors.items()})
+    return {label: len(vectors[label]) for label in updated}
+
+
+def routing_rates(memory_bank, embeddings_by_label):
+    """
+    Route query embeddings and count where they land
+
+    Args:
+        embeddings_by_label (dict): intent_label of the specialist the queries belong to -> embeddings
+
+    Returns:
+        dict: {queries, hit_rate (routed to their specialist), misroute_rate (to another one)}
+    """
+    queries = hits = misroutes = 0
+    for label, embeddings in embeddings_by_label.items():
+        for embedding in embeddings:
+            result = memory_bank.search(embedding)
+            queries += 1
+            if result and result['specialist']['intent_label'] == label:
+                hits += 1
+            elif result:
+                misroutes += 1
+    return {
+        "queries": queries,
+        "hit_rate": round(hits / queries, 3) if queries else None,
+        "misroute_rate": round(misroutes / queries, 3) if queries else None
+    }
+
+
+def evaluate(memory_bank, query_logger, embedding_service, k=SPECIALIST_VECTORS,
+             min_queries=SPECIALIST_VECTORS_MIN_QUERIES, holdout_every=4):
+    """
+    Hit rate before/after multi-vector specialists on held-out logged queries
+
+    Every holdout_every-th query of a specialist is held out; vectors are
+    built from the rest and both banks route the held-out queries.
+
+    Returns:
+        dict: {"before": routing_rates, "after": routing_rates, "specialists": n}
+    """
+    specialists = [{field: value for field, value in spec.items() if field != 'vectors'}
+                   for spec in memory_bank.get_all_specialists()]
+    texts = {spec['intent_label']: logged_descriptions(query_logger, spec) for spec in specialists}
+    embedded = _grouped_embeddings(embedding_service, {label: group for label, group in texts.items() if group})
+
+    train, held_out = {}, {}
+    for label, embeddings in embedded.items():
+        held_out[label] = embeddings[::holdout_every]
+        train[label] = [e for i, e in enumerate(embeddings) if i % holdout_every]
+
+    scratch = tempfile.mkdtemp(prefix="findingnemo-vectors-")
+    before = MemoryBank(bank_file=os.path.join(scratch, "before.json"))
+    after = MemoryBank(bank_file=os.path.join(scratch, "after.json"))
+    for bank in (before, after):
+        bank.threshold, bank.probes = memory_bank.threshold, memory_bank.probes
+    before.specialists = specialists
+    after.specialists = [
+        dict(spec, vectors=representatives(train[spec['intent_label']], k))
+        if len(train.get(spec['intent_label'], [])) >= min_queries else spec
+        for spec in specialists
+    ]
+
+    return {
+        "before": routing_rates(before, held_out),
+        "after": routing_rates(after, held_out),
+        "specialists": sum(1 for spec in after.specialists if spec.get('vectors'))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-vector specialists from logged queries")
+    parser.add_argument("--evaluate", action="store_true", help="Only report hit rate before/after (held-out queries)")
+    parser.add_argument("-k", type=int, default=SPECIALIST_VECTORS, help="Max vectors per specialist")
+    parser.add_argument("--bank", default="data/memory_bank.json")
+    parser.add_argument("--logs", default="data/query_logs.json")
+    args = parser.parse_args()
+
+    from core.embeddings import EmbeddingService
+    from core.query_logger import QueryLogger
+
+    configure_logging()
+    memory_bank = MemoryBank(bank_file=args.bank)
+    query_logger = QueryLogger(log_file=args.logs)
+    embedding_service = EmbeddingService()
+
+    if args.evaluate:
+        report = evaluate(memory_bank, query_logger, embedding_service, k=args.k)
+        print(f"Specialists with vectors: {report['specialists']}")
+        for name in ("before", "after"):
+            rates = report[name]
+            print(f"{name:>6}: hit rate {rates['hit_rate']}, misroutes {rates['misroute_rate']} "
+                  f"({rates['queries']} held-out queries)")
+        return
+
+    stored = refresh_vectors(memory_bank, query_logger, embedding_service, k=args.k)
+    for label, count in stored.items():
+        print(f"{label}: {count} vectors")
+    if not stored:
+        print(f"No specialist has {SPECIALIST_VECTORS_MIN_QUERIES}+ logged queries")
+
+if __name__ == "__main__":
+    main()
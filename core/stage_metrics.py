@@ -0,0 +1,200 @@
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+# Prometheus histogram buckets (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers (None if empty)"""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def worker_textfile(textfile, worker):
+    """Per-worker text file path: findingnemo.prom -> findingnemo.<worker>.prom (None = shared path)"""
+    if worker is None:
+        return textfile
+    root, ext = os.path.splitext(textfile)
+    return f"{root}.{worker}{ext}"
+
+class StageTimer:
+    """
+    SINGLE RESPONSIBILITY: Time the stages of one request with perf_counter
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; repeated stages (e.g. fallback model calls) add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def as_metadata(self):
+        """Timings rounded for result['metadata']"""
+        return {name: round(seconds, 4) for name, seconds in self.timings.items()}
+
+
+class StageMetrics:
+    """
+    SINGLE RESPONSIBILITY: Aggregate per-stage timings across requests
+    Keeps rolling samples for p50/p95/p99, optionally writes a Prometheus
+    text file (node_exporter textfile collector) and forwards to extra sinks
+
+    Counters are per process: in multi-worker mode each worker writes its own
+    file (see worker_textfile) with a worker label, and the collector adds
+    them up.
+    """
+
+    def __init__(self, window_size=1000, textfile=None, flush_interval=10.0, worker=None):
+        """
+        Args:
+            window_size (int): Recent samples kept per stage for percentiles
+            textfile (str): Optional path for the Prometheus text exposition file
+            flush_interval (float): Min seconds between text file writes
+            worker (int): Worker id (pid) in multi-worker mode, None = the only process
+        """
+        self.window_size = window_size
+        self.textfile = worker_textfile(textfile, worker) if textfile else None
+        self.flush_interval = flush_interval
+        self.worker = worker
+
+        self.samples = {}  # stage -> deque of seconds
+        self.histograms = {}  # stage -> {"buckets": [...], "sum": float, "count": int}
+        self.requests = {}  # routed_to -> count
+        self.sinks = []
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """
+        Forward every observation to another exporter (e.g. an OpenTelemetry histogram)
+
+        Args:
+            sink (callable): fn(timings dict, labels dict)
+        """
+        self.sinks.append(sink)
+
+    def observe(self, timings, labels=None):
+        """
+        Record one request's stage timings
+
+        Args:
+            timings (dict): stage -> seconds (StageTimer.timings)
+            labels (dict): Optional labels, "routed_to" is counted
+        """
+        labels = labels or {}
+
+        with self._lock:
+            for stage, seconds in timings.items():
+                if stage not in self.samples:
+                    self.samples[stage] = deque(maxlen=self.window_size)
+                    self.histograms[stage] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+                self.samples[stage].append(seconds)
+
+                histogram = self.histograms[stage]
+                histogram['sum'] += seconds
+                histogram['count'] += 1
+                for i, bound in enumerate(BUCKETS):
+                    if seconds <= bound:
+                        histogram['buckets'][i] += 1
+
+            routed_to = labels.get('routed_to')
+            if routed_to:
+                self.requests[routed_to] = self.requests.get(routed_to, 0) + 1
+
+            flush = self.textfile and time.monotonic() - self._last_flush >= self.flush_interval
+            if flush:
+                self._last_flush = time.monotonic()
+
+        for sink in self.sinks:
+            try:
+                sink(timings, labels)
+            except Exception as e:
+                logger.warning("Metrics sink error: %s", e)
+
+        if flush:
+            # Metrics never fail a request
+            try:
+                self.write_textfile()
+            except Exception as e:
+                logger.warning("Metrics textfile error: %s", e)
+
+    def summary(self):
+        """
+        Rolling latency percentiles per stage
+
+        Returns:
+            dict: stage -> {count, p50, p95, p99, mean} in seconds
+        """
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self.samples.items()}
+
+        result = {}
+        for stage, values in snapshot.items():
+            if not values:
+                continue
+            result[stage] = {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "mean": round(sum(values) / len(values), 4)
+            }
+        return result
+
+    def render_prometheus(self):
+        """Render all stages in the Prometheus text exposition format"""
+        lines = [
+            "# HELP findingnemo_stage_latency_seconds Time spent in each process_query stage",
+            "# TYPE findingnemo_stage_latency_seconds histogram"
+        ]
+
+        worker = f',worker="{self.worker}"' if self.worker is not None else ""
+
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                labels = f'stage="{stage}"{worker}'
+                for bound, count in zip(BUCKETS, histogram['buckets']):
+                    lines.append(f'findingnemo_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'findingnemo_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+                lines.append(f'findingnemo_stage_latency_seconds_sum{{{labels}}} {histogram["sum"]:.6f}')
+                lines.append(f'findingnemo_stage_latency_seconds_count{{{labels}}} {histogram["count"]}')
+
+            lines.append("# HELP findingnemo_requests_total Requests by routing outcome")
+            lines.append("# TYPE findingnemo_requests_total counter")
+            for routed_to, count in sorted(self.requests.items()):
+                lines.append(f'findingnemo_requests_total{{routed_to="{routed_to}"{worker}}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self):
+        """
+        Write the text file atomically so the collector never reads a partial file
+        (each write has its own temp file, so concurrent writes don't collide)
+        """
+        if not self.textfile:
+            return
+        directory = os.path.dirname(os.path.abspath(self.textfile))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.textfile)}.")
+        try:
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, self.textfile)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,216 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from config import STORAGE_FSYNC
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+class StorageError(ValueError):
+    """A store file is unreadable and no valid backup exists"""
+
+
+class JsonStore:
+    """
+    SINGLE RESPONSIBILITY: Durable JSON snapshots on disk
+
+    - Writes go to one temp file that is renamed over the target, so readers
+      only ever see a complete old or new snapshot - no more work than a
+      plain json.dump. fsync (crash durability) is opt-in, see STORAGE_FSYNC
+    - With backup=True, <path>.sha256 holds the checksum of the last
+      snapshot we wrote and <path>.bak the one before it; a file that no
+      longer parses falls back to the backup instead of silently resetting.
+      Worth it for rarely written files (the memory bank, the training queue),
+      not for the query log
+    - <path>.lock (flock) serializes read-modify-write across processes;
+      lock() is reentrant within a process so it can be held throughout.
+      A bare write only takes it to keep the backup and checksums consistent
+    - Leading "//" comment lines (e.g. "///threshold is 5") are ignored
+
+    Files stay plain JSON so other tools can keep reading (and writing) them,
+    so the checksum is not enforced on the primary file: one that doesn't
+    match but parses is treated as an external edit and accepted. In practice
+    the checksum protects the .bak - a corrupt file only falls back to a
+    backup whose checksum matches.
+    """
+
+    def __init__(self, path, fsync=STORAGE_FSYNC, indent=None, backup=False):
+        """
+        Args:
+            path (str): JSON file
+            fsync (bool): fsync file and directory on write (crash durability)
+            indent (int): JSON indent, None = compact (fastest)
+            backup (bool): Keep the previous snapshot as <path>.bak, with checksums
+        """
+        self.path = path
+        self.fsync = fsync
+        self.indent = indent
+        self.backup = backup
+        self.stamp = None  # (mtime_ns, size, inode) of the snapshot we last read or wrote
+        self._written = None  # stamp right after our last write, i.e. the file <path>.sha256 describes
+
+        self._rlock = threading.RLock()
+        self._lock_file = None
+        self._depth = 0
+
+    @contextmanager
+    def lock(self):
+        """Exclusive cross-process lock on the store (reentrant in this process)"""
+        with self._rlock:
+            if self._depth == 0:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._lock_file = open(f"{self.path}.lock", 'a')
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def modified(self):
+        """Has someone else replaced the file since we last read or wrote it?"""
+        return self._stat() != self.stamp
+
+    @staticmethod
+    def _parse(raw):
+        text = raw.decode('utf-8')
+        if text.lstrip().startswith("//"):
+            lines = text.splitlines(keepends=True)
+            while lines and lines[0].lstrip().startswith("//"):
+                logger.info("Ignoring comment line: %s", lines.pop(0).strip())
+            text = "".join(lines)
+        return json.loads(text)
+
+    @staticmethod
+    def _read_checksum(path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def read(self, default=None):
+        """
+        Load the snapshot (a parseable file is accepted even if its checksum
+        differs - see the class docstring; only the backup is verified)
+
+        Args:
+            default: Returned if the file doesn't exist
+
+        Returns:
+            Parsed JSON (or default)
+
+        Raises:
+            StorageError: File is corrupt and there is no valid backup
+        """
+        stamp = self._stat()
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            self.stamp = None
+            return default
+
+        try:
+            data = self._parse(raw)
+        except ValueError as e:
+            data = self._read_backup(e)
+        else:
+            expected = self._read_checksum(f"{self.path}.sha256")
+            if expected and expected != hashlib.sha256(raw).hexdigest():
+                logger.info("%s was changed outside the store (checksum differs), accepting it", self.path)
+
+        self.stamp = stamp
+        return data
+
+    def _read_backup(self, error):
+        backup = f"{self.path}.bak"
+        try:
+            with open(backup, 'rb') as f:
+                raw = f.read()
+            data = self._parse(raw)
+        except (OSError, ValueError):
+            raise StorageError(f"{self.path} is corrupt ({error}) and has no readable backup") from error
+
+        expected = self._read_checksum(f"{backup}.sha256")
+        if expected and expected != hashlib.sha256(raw).hexdigest():
+            raise StorageError(f"{self.path} is corrupt ({error}) and its backup fails the checksum") from error
+        logger.warning("%s is corrupt (%s), recovered the previous snapshot", self.path, error)
+        return data
+
+    def write(self, data):
+        """Atomically replace the snapshot"""
+        raw = json.dumps(data, indent=self.indent).encode('utf-8')
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        if not self.backup:
+            os.replace(self._write_temp(directory, raw), self.path)
+            self._sync_directory(directory)
+            self.stamp = self._written = self._stat()
+            return
+
+        with self.lock():
+            tmp_path = self._write_temp(directory, raw)
+            tmp_sum = self._write_temp(directory, hashlib.sha256(raw).hexdigest().encode())
+
+            if os.path.exists(self.path):
+                # Hard links: the old snapshot becomes the backup without copying it.
+                # Its checksum only carries over if nobody edited the file since we wrote it
+                ours = self._stat() == self._written
+                self._link_over(self.path, f"{self.path}.bak")
+                if ours and os.path.exists(f"{self.path}.sha256"):
+                    self._link_over(f"{self.path}.sha256", f"{self.path}.bak.sha256")
+                elif os.path.exists(f"{self.path}.bak.sha256"):
+                    os.unlink(f"{self.path}.bak.sha256")
+
+            os.replace(tmp_sum, f"{self.path}.sha256")
+            os.replace(tmp_path, self.path)
+            self._sync_directory(directory)
+            self.stamp = self._written = self._stat()
+
+    def _sync_directory(self, directory):
+        if not self.fsync:
+            return
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _write_temp(self, directory, raw):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.")
+        try:
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    @staticmethod
+    def _link_over(source, target):
+        tmp = f"{target}.tmp"
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        os.link(source, tmp)
+        os.replace(tmp, target)
@@ -0,0 +1,318 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from config import (COSTS, TENANTS_DIR, TENANT_MAX_LOADED, TENANT_MAX_SPECIALISTS, TENANT_QPS_WINDOW,
+                    TENANT_ALLOWLIST)
+from core.memory_bank import MemoryBank
+from core.query_logger import QueryLogger
+from core.metrics_store import MetricsStore
+from core.decision_engine import DecisionEngine
+from core.decision_worker import DecisionWorker
+from core.threshold_calibrator import ThresholdCalibrator
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TENANT = "default"
+
+_TENANT_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# settings.json keys -> DecisionEngine attributes
+DECISION_SETTINGS = {
+    "query_threshold": "threshold",
+    "query_rate_threshold": "rate_threshold",
+    "training_cost": "training_cost",
+    "max_break_even_days": "max_break_even_days",
+}
+
+
+class UnknownTenantError(LookupError):
+    """No such tenant: no directory under TENANTS_DIR and not on TENANT_ALLOWLIST"""
+
+
+def validate_tenant_id(tenant_id):
+    """Tenant ids become directory names, so only allow a safe subset"""
+    if not isinstance(tenant_id, str) or not _TENANT_ID.match(tenant_id):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    return tenant_id
+
+
+def request_cost(kind, response):
+    """Dollars for one model call, priced like DecisionEngine.check_bottleneck"""
+    prompt_tokens = response.get('prompt_tokens', 0)
+    completion_tokens = response.get('completion_tokens', 0)
+    if kind == "specialist":
+        return (prompt_tokens + completion_tokens) * COSTS['specialist'] / 1_000_000
+    return (prompt_tokens * COSTS['generalist_input'] + completion_tokens * COSTS['generalist_output']) / 1_000_000
+
+
+class TenantUsage:
+    """
+    SINGLE RESPONSIBILITY: Count one tenant's traffic and spend
+    Outlives eviction of the tenant's bank and logs
+    """
+
+    def __init__(self, window=TENANT_QPS_WINDOW):
+        self.window = window
+        self.requests = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.by_route = {}
+        self._arrivals = deque()
+        self._lock = threading.Lock()
+
+    def record(self, routed_to, response):
+        kind = "specialist" if routed_to == "specialist" else "generalist"
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.tokens += response.get('tokens_used', 0)
+            self.cost += request_cost(kind, response)
+            self.by_route[routed_to] = self.by_route.get(routed_to, 0) + 1
+            self._arrivals.append(now)
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._arrivals and now - self._arrivals[0] > self.window:
+            self._arrivals.popleft()
+
+    def qps(self):
+        """Requests per second over the last window"""
+        with self._lock:
+            self._trim(time.monotonic())
+            return len(self._arrivals) / self.window
+
+    def get_status(self):
+        qps = self.qps()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "qps": round(qps, 3),
+                "tokens": self.tokens,
+                "cost": round(self.cost, 6),
+                "routed_to": dict(self.by_route)
+            }
+
+
+class Tenant:
+    """
+    Everything scoped to one tenant: its memory bank (and the calibrator
+    tuning its thresholds), query logs, metrics, decision engine and the
+    background worker that writes its logs
+    """
+
+    def __init__(self, tenant_id, memory_bank, query_logger, metrics_store, decision_engine, decision_worker):
+        self.tenant_id = tenant_id
+        self.memory_bank = memory_bank
+        self.query_logger = query_logger
+        self.metrics_store = metrics_store
+        self.decision_engine = decision_engine
+        self.decision_worker = decision_worker
+        self.threshold_calibrator = ThresholdCalibrator(memory_bank)
+
+    def job_key(self, intent_label):
+        """Training jobs share one scheduler, so qualify labels outside the default tenant"""
+        if self.tenant_id == DEFAULT_TENANT:
+            return intent_label
+        return f"{self.tenant_id}:{intent_label}"
+
+    def footprint(self):
+        """Specialists loaded - used as the memory measure for eviction"""
+        return len(self.memory_bank.specialists)
+
+    def submit(self, intent_label, intent_description, user_prompt):
+        """
+        Hand a log event to the background worker
+
+        A request that fetched the tenant just before it was evicted finds the
+        worker stopped; the event is then written directly (no decision).
+        """
+        try:
+            self.decision_worker.submit(intent_label, intent_description, user_prompt)
+        except RuntimeError:
+            logger.info("Tenant '%s' was closed mid-request, logging directly", self.tenant_id)
+            self.query_logger.log_query(intent_label, intent_description, user_prompt)
+
+    def submit_batch(self, events):
+        """Hand many log events to the worker as one (see submit)"""
+        try:
+            self.decision_worker.submit_batch(events)
+        except RuntimeError:
+            logger.info("Tenant '%s' was closed mid-request, logging directly", self.tenant_id)
+            self.query_logger.log_queries([(label, description, prompt, None) for label, description, prompt in events])
+
+    def close(self):
+        """Flush pending logs and stop background threads"""
+        self.decision_worker.flush()
+        self.decision_worker.stop()
+        self.threshold_calibrator.flush()
+        self.memory_bank.stop_watching()
+
+
+def load_settings(tenant_dir):
+    """Optional per-tenant overrides from <tenant_dir>/settings.json"""
+    try:
+        with open(os.path.join(tenant_dir, "settings.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def open_tenant(tenant_id, tenants_dir=TENANTS_DIR, allowlist=TENANT_ALLOWLIST):
+    """
+    Load a tenant from <tenants_dir>/<tenant_id>/
+
+    Only existing tenants (or ids on the allowlist) are opened, and opening
+    writes nothing: memory_bank.json and query_logs.json are created on
+    first write. settings.json (optional) overrides similarity_threshold and
+    any of DECISION_SETTINGS for this tenant only.
+
+    Returns:
+        Tenant
+
+    Raises:
+        UnknownTenantError: No directory for the tenant and not on the allowlist
+    """
+    tenant_dir = os.path.join(tenants_dir, validate_tenant_id(tenant_id))
+    if not os.path.isdir(tenant_dir) and tenant_id not in allowlist:
+        raise UnknownTenantError(f"Unknown tenant: {tenant_id!r}")
+    settings = load_settings(tenant_dir)
+
+    memory_bank = MemoryBank(bank_file=os.path.join(tenant_dir, "memory_bank.json"), create=False)
+    if "similarity_threshold" in settings:
+        memory_bank.threshold = settings['similarity_threshold']
+
+    query_logger = QueryLogger(log_file=os.path.join(tenant_dir, "query_logs.json"), create=False)
+    metrics_store = MetricsStore()
+    decision_engine = DecisionEngine(metrics_store=metrics_store)
+    for key, attribute in DECISION_SETTINGS.items():
+        if key in settings:
+            setattr(decision_engine, attribute, settings[key])
+
+    decision_worker = DecisionWorker(query_logger, decision_engine)
+    return Tenant(tenant_id, memory_bank, query_logger, metrics_store, decision_engine, decision_worker)
+
+
+class TenantRegistry:
+    """
+    SINGLE RESPONSIBILITY: Hand out tenants, loading lazily and evicting LRU
+
+    Tenants are loaded on first use by the factory and evicted least recently
+    used when more than max_loaded are resident or their banks hold more than
+    max_specialists rows in total. The default tenant is pinned. Loads run
+    outside the registry lock (concurrent lookups of the same cold tenant
+    wait for one load), so a cold tenant never blocks the others.
+    """
+
+    def __init__(self, factory, default, max_loaded=TENANT_MAX_LOADED, max_specialists=TENANT_MAX_SPECIALISTS):
+        """
+        Args:
+            factory (callable): tenant_id -> Tenant
+            default (Tenant): Pinned tenant used when no tenant id is given
+            max_loaded (int): Max resident tenants besides the default
+            max_specialists (int): Max specialists across resident tenants besides the default
+        """
+        self.factory = factory
+        self.default = default
+        self.max_loaded = max_loaded
+        self.max_specialists = max_specialists
+
+        self.loaded = OrderedDict()  # tenant_id -> Tenant, least recently used first
+        self._loading = {}  # tenant_id -> Future of the load in progress
+        self.usage = {DEFAULT_TENANT: TenantUsage()}
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id=None):
+        """
+        Get a tenant, loading it if needed
+
+        Args:
+            tenant_id (str): Tenant id, None for the default tenant
+
+        Returns:
+            Tenant
+
+        Raises:
+            UnknownTenantError: From the factory, for tenants that don't exist
+        """
+        if tenant_id is None or tenant_id == DEFAULT_TENANT:
+            return self.default
+        validate_tenant_id(tenant_id)
+
+        with self._lock:
+            tenant = self.loaded.get(tenant_id)
+            if tenant:
+                self.loaded.move_to_end(tenant_id)
+                return tenant
+            loading = self._loading.get(tenant_id)
+            if loading is None:
+                loading = self._loading[tenant_id] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return loading.result()
+
+        try:
+            tenant = self.factory(tenant_id)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[tenant_id]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[tenant_id]
+            self.loaded[tenant_id] = tenant
+            self.usage.setdefault(tenant_id, TenantUsage())
+            evicted = self._evict()
+            logger.info("Loaded tenant '%s' (%d specialists)", tenant_id, tenant.footprint())
+        loading.set_result(tenant)
+
+        for old in evicted:
+            old.close()
+        return tenant
+
+    def _evict(self):
+        """Pop LRU tenants until within limits (never the one just loaded)"""
+        evicted = []
+        while len(self.loaded) > 1:
+            footprint = sum(tenant.footprint() for tenant in self.loaded.values())
+            if len(self.loaded) <= self.max_loaded and footprint <= self.max_specialists:
+                break
+            tenant_id, tenant = self.loaded.popitem(last=False)
+            evicted.append(tenant)
+            self.evictions += 1
+            logger.info("Evicted tenant '%s'", tenant_id)
+        return evicted
+
+    def record(self, tenant, routed_to, response):
+        """Count a served request against its tenant"""
+        usage = self.usage.get(tenant.tenant_id)
+        if usage is None:
+            with self._lock:
+                usage = self.usage.setdefault(tenant.tenant_id, TenantUsage())
+        usage.record(routed_to, response)
+
+    def get_status(self):
+        with self._lock:
+            loaded = list(self.loaded)
+            usage = dict(self.usage)
+        return {
+            "loaded": loaded,
+            "evictions": self.evictions,
+            "usage": {tenant_id: u.get_status() for tenant_id, u in usage.items()}
+        }
+
+    def close(self):
+        with self._lock:
+            tenants = list(self.loaded.values())
+            self.loaded.clear()
+        for tenant in tenants:
+            tenant.close()
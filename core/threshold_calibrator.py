@@ -0,0 +1,176 @@
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import (THRESHOLD_MIN, THRESHOLD_MAX, THRESHOLD_MIN_SAMPLES, THRESHOLD_RECALIBRATE_EVERY,
+                    THRESHOLD_EXPLORE_RATE, THRESHOLD_EXPLORE_MARGIN, THRESHOLD_FALLBACK_PENALTY,
+                    THRESHOLD_MAX_STEP)
+from core.log import get_logger
+
+logger = get_logger(__name__)
+
+def calibrate(samples, penalty=THRESHOLD_FALLBACK_PENALTY, low=THRESHOLD_MIN, high=THRESHOLD_MAX,
+              current=None, max_step=THRESHOLD_MAX_STEP):
+    """
+    Threshold that best separates accepted from fallback queries
+
+    Picks the cut maximizing accepted - penalty * fallbacks among the
+    samples at or above it: every accepted query above the cut is a specialist
+    hit, every fallback above it a wasted specialist call. When no cut scores
+    above zero the samples give no direction and the current threshold stays.
+
+    Args:
+        samples (iterable): (similarity, accepted) pairs
+        penalty (float): Cost of a wasted call relative to the gain of a hit
+        low (float): Lowest threshold allowed
+        high (float): Highest threshold allowed
+        current (float): Threshold in use (None = unknown, moves are not capped)
+        max_step (float): Furthest one recalibration may move away from current
+
+    Returns:
+        float or None: Threshold, current (None) without samples in range or a positive cut
+    """
+    samples = sorted((similarity, accepted) for similarity, accepted in samples if low <= similarity <= high)
+    if not samples:
+        return current
+
+    # Sweep cuts from the top; ties share one cut
+    best, best_score, score = None, 0.0, 0.0
+    for i in range(len(samples) - 1, -1, -1):
+        similarity, accepted = samples[i]
+        score += 1.0 if accepted else -penalty
+        if i == 0 or samples[i - 1][0] < similarity:
+            if score > best_score:
+                best, best_score = similarity, score
+
+    if best is None or current is None:
+        return best if best is not None else current
+    return min(max(best, current - max_step), current + max_step)
+
+
+def served_intents(specialist):
+    """Router intents a specialist record answers for: its intent_label plus its metadata "intents" list"""
+    return [specialist['intent_label']] + specialist.get('metadata', {}).get('intents', [])
+
+
+class ThresholdCalibrator:
+    """
+    SINGLE RESPONSIBILITY: Learn a similarity threshold per specialist from routing outcomes
+
+    Every specialist call is recorded with the query's similarity and whether
+    it was a good match (accepted): the specialist answered and the router's
+    intent for the query is one the specialist serves (its intent_label or
+    metadata "intents"). A fallback to the generalist or an intent the
+    specialist does not serve counts against the match - an answer alone is
+    no evidence, a specialist answers almost anything it is sent. Transport
+    errors (timeouts, 5xx, outages) say nothing about the match and are not
+    recorded. Every few calls the specialist's
+    threshold is recalibrated (see calibrate, at most THRESHOLD_MAX_STEP per
+    round) and, when it moved, stored with its memory bank record ("threshold"
+    and "calibration", see MemoryBank.update_specialist) by a background thread.
+
+    Samples only exist above the current threshold, so a small share of
+    queries just below it are explored (sent to the specialist anyway) -
+    that is what lets a too-strict threshold come down. Explored queries
+    without a router intent are not recorded: they would only show that the
+    specialist answered, and would walk the threshold down to THRESHOLD_MIN.
+    """
+
+    def __init__(self, memory_bank, window_size=500, explore_rate=THRESHOLD_EXPLORE_RATE,
+                 explore_margin=THRESHOLD_EXPLORE_MARGIN, seed=None):
+        """
+        Args:
+            memory_bank (MemoryBank): Bank whose specialist records get the thresholds
+            window_size (int): Recent outcomes kept per specialist
+            explore_rate (float): Share of near misses routed to the specialist anyway (0 = never)
+            explore_margin (float): How far below the threshold a near miss can be
+            seed (int): Exploration RNG seed
+        """
+        self.memory_bank = memory_bank
+        self.window_size = window_size
+        self.explore_rate = explore_rate
+        self.explore_margin = explore_margin
+
+        self.samples = {}  # intent_label -> deque of (similarity, accepted)
+        self.pending = {}  # intent_label -> outcomes since the last calibration
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="threshold")
+
+    def explore(self, candidate):
+        """
+        Should a query below its specialist's threshold go to the specialist anyway?
+
+        Args:
+            candidate (dict): MemoryBank.closest() result
+
+        Returns:
+            bool
+        """
+        if not self.explore_rate or candidate['similarity'] < candidate['threshold'] - self.explore_margin:
+            return False
+        with self._lock:
+            return self._random.random() < self.explore_rate
+
+    def record(self, candidate, accepted, transport_error=False, intent_label=None):
+        """
+        Record the outcome of a specialist call
+
+        Args:
+            candidate (dict): MemoryBank.closest() result the call was routed on
+            accepted (bool): Specialist answered (False = fell back to the generalist)
+            transport_error (bool): The fallback was the endpoint's fault, not the match's (ignored)
+            intent_label (str): Router intent of the query (None = unknown)
+        """
+        if transport_error and not accepted:
+            return
+        specialist = candidate['specialist']
+        if intent_label is not None:
+            accepted = accepted and intent_label in served_intents(specialist)
+        elif candidate.get('explored'):
+            return
+        label = specialist['intent_label']
+        with self._lock:
+            samples = self.samples.setdefault(label, deque(maxlen=self.window_size))
+            samples.append((candidate['similarity'], accepted))
+            self.pending[label] = self.pending.get(label, 0) + 1
+            if self.pending[label] < THRESHOLD_RECALIBRATE_EVERY or len(samples) < THRESHOLD_MIN_SAMPLES:
+                return
+            self.pending[label] = 0
+            snapshot = list(samples)
+
+        threshold = calibrate(snapshot, current=candidate['threshold'])
+        if threshold is None or abs(threshold - candidate['threshold']) < 0.005:
+            return
+
+        accepted_count = sum(1 for _, ok in snapshot if ok)
+        calibration = {
+            "samples": len(snapshot),
+            "accepted": accepted_count,
+            "fallbacks": len(snapshot) - accepted_count,
+            "updated": datetime.now().isoformat()
+        }
+        logger.info("Threshold for '%s': %.3f -> %.3f (%d samples, %d fallbacks)",
+                    label, candidate['threshold'], threshold, len(snapshot), calibration['fallbacks'])
+        self._writer.submit(self._store, label, round(threshold, 3), calibration)
+
+    def _store(self, label, threshold, calibration):
+        try:
+            self.memory_bank.update_specialist(label, threshold=threshold, calibration=calibration)
+        except Exception:
+            logger.exception("Could not store threshold for '%s'", label)
+
+    def flush(self):
+        """Wait for queued threshold writes"""
+        self._writer.submit(lambda: None).result()
+
+    def get_status(self):
+        with self._lock:
+            return {
+                label: {
+                    "samples": len(samples),
+                    "fallback_rate": round(sum(1 for _, ok in samples if not ok) / len(samples), 3)
+                }
+                for label, samples in self.samples.items() if samples
+            }
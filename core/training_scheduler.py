@@ -0,0 +1,258 @@
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import COSTS
+from core.log import get_logger
+from core.storage import JsonStore
+
+logger = get_logger(__name__)
+
+def _owner_alive(owner):
+    """Is the process that started a job still running? (owners on other hosts are assumed alive)"""
+    if not owner:
+        return False
+    if owner.get('host') != socket.gethostname():
+        return True
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingScheduler:
+    """
+    SINGLE RESPONSIBILITY: Queue and dispatch specialist training jobs
+    Orders jobs by projected savings, dedupes per intent, caps concurrency and spend
+
+    Jobs only start when someone will do the work: the configured runner, or
+    an external trainer that claims them (dispatch(claim=True)) and reports
+    back with complete_job. A running job records the process that owns it;
+    several processes can share the queue file, and a job goes back in the
+    queue (its cost refunded) only once its owner process is gone.
+    """
+
+    def __init__(self, credits_available, training_cost, queue_file='data/training_queue.json',
+                 max_concurrent=1, runner=None, examples_per_job=2000, tokens_per_example=768):
+        """
+        Args:
+            credits_available (float): Total training budget in dollars
+            training_cost (float): Fine-tuning cost per job in dollars
+            queue_file (str): Where the queue is persisted
+            max_concurrent (int): Max jobs running at once
+            runner (callable): Optional fn(job) -> bool that does the training work
+            examples_per_job (int): Synthetic examples generated per job
+            tokens_per_example (int): Generator tokens per example (prompt + response)
+        """
+        self.queue_file = queue_file
+        self.credits_available = credits_available
+        self.training_cost = training_cost
+        self.max_concurrent = max_concurrent
+        self.runner = runner
+        self.examples_per_job = examples_per_job
+        self.tokens_per_example = tokens_per_example
+
+        self.jobs = {}  # intent_label -> job dict
+        self.spent = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent) if runner else None
+        self.store = JsonStore(queue_file, indent=2, backup=True)
+        self.load()
+
+    def load(self):
+        """Load queue from disk; running jobs whose owner process died go back in the queue"""
+        with self._lock, self.store.lock():
+            data = self.store.read()
+            if data is None:
+                self.jobs = {}
+                self.spent = 0.0
+                self.save()
+                return
+
+            self.jobs = {job['intent_label']: job for job in data.get('jobs', [])}
+            self.spent = data.get('spent', 0.0)
+            if self._reclaim():
+                self.save()
+
+        logger.info("Loaded %d training jobs", len(self.jobs))
+
+    def _reclaim(self):
+        """Re-queue running jobs whose owner process is gone (store lock held)"""
+        reclaimed = [job for job in self.get_running() if not _owner_alive(job.get('owner'))]
+        for job in reclaimed:
+            logger.warning("Training job for '%s' lost its owner %s, re-queued", job['intent_label'], job.get('owner'))
+            job['status'] = "queued"
+            job['started_at'] = None
+            job['owner'] = None
+            self.spent -= job['estimated_cost']
+        return bool(reclaimed)
+
+    def save(self):
+        """Save queue to disk"""
+        self.store.write({"spent": round(self.spent, 4), "jobs": list(self.jobs.values())})
+
+    def _sync(self):
+        """Pick up writes from other processes before a read-modify-write (store lock held)"""
+        if self.store.modified():
+            data = self.store.read({})
+            self.jobs = {job['intent_label']: job for job in data.get('jobs', [])}
+            self.spent = data.get('spent', 0.0)
+            logger.debug("Reloaded training queue changed by another process")
+
+    def estimate_job_cost(self):
+        """
+        Estimate dollars for one job: synthetic data generation priced with COSTS
+        plus the fixed fine-tuning cost
+        """
+        generation_tokens = self.examples_per_job * self.tokens_per_example
+        generation_cost = generation_tokens * COSTS['generalist_output'] / 1_000_000
+        return round(generation_cost + self.training_cost, 4)
+
+    def submit(self, intent_label, description, decision):
+        """
+        Queue a training job for an approved intent
+
+        Args:
+            intent_label (str): Intent label
+            description (str): Intent description
+            decision (dict): Result of DecisionEngine.make_decision
+
+        Returns:
+            dict: The (possibly already existing) job
+        """
+        bottleneck = decision['details'].get('bottleneck', {})
+
+        with self._lock, self.store.lock():
+            self._sync()
+            existing = self.jobs.get(intent_label)
+            if existing and existing['status'] in ("queued", "running", "completed"):
+                # Same intent already scheduled - just refresh its priority
+                if existing['status'] == "queued":
+                    existing['projected_savings'] = bottleneck.get('estimated_savings', 0.0)
+                    self.save()
+                return existing
+
+            job = {
+                "intent_label": intent_label,
+                "description": description,
+                "status": "queued",
+                "projected_savings": bottleneck.get('estimated_savings', 0.0),
+                "break_even_days": bottleneck.get('break_even_days'),
+                "estimated_cost": self.estimate_job_cost(),
+                "submitted_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "owner": None
+            }
+            self.jobs[intent_label] = job
+            self.save()
+
+        logger.info("Queued training job for '%s' (savings $%.4f/day)", intent_label, job['projected_savings'])
+        self.dispatch()
+        return job
+
+    def get_queue(self):
+        """Queued jobs, highest projected savings first"""
+        queued = [job for job in self.jobs.values() if job['status'] == "queued"]
+        return sorted(queued, key=lambda job: job['projected_savings'], reverse=True)
+
+    def get_running(self):
+        """Jobs currently running"""
+        return [job for job in self.jobs.values() if job['status'] == "running"]
+
+    def remaining_budget(self):
+        """Credits not yet committed to running or finished jobs"""
+        return self.credits_available - self.spent
+
+    def dispatch(self, claim=False):
+        """
+        Start as many queued jobs as concurrency and budget allow
+
+        Without a runner nothing is started unless the caller claims the jobs,
+        i.e. will train them itself and call complete_job.
+
+        Args:
+            claim (bool): Start jobs for an external trainer (this process owns them)
+
+        Returns:
+            list: Jobs started by this call
+        """
+        if not self._executor and not claim:
+            return []
+        started = []
+
+        with self._lock, self.store.lock():
+            self._sync()
+            reclaimed = self._reclaim()
+            for job in self.get_queue():
+                if len(self.get_running()) >= self.max_concurrent:
+                    break
+                if job['estimated_cost'] > self.remaining_budget():
+                    # Cheaper jobs further down may still fit
+                    continue
+
+                job['status'] = "running"
+                job['started_at'] = datetime.now().isoformat()
+                job['owner'] = {"pid": os.getpid(), "host": socket.gethostname()}
+                self.spent += job['estimated_cost']
+                started.append(job)
+
+            if started or reclaimed:
+                self.save()
+
+        for job in started:
+            logger.info("Started training job for '%s'", job['intent_label'])
+            if self._executor:
+                self._executor.submit(self._run, job)
+
+        return started
+
+    def _run(self, job):
+        """Run a job with the configured runner and record the outcome"""
+        try:
+            success = bool(self.runner(job))
+        except Exception as e:
+            logger.exception("Training job '%s' crashed: %s", job['intent_label'], e)
+            success = False
+        self.complete_job(job['intent_label'], success)
+
+    def complete_job(self, intent_label, success=True):
+        """
+        Mark a running job as finished and start the next ones
+
+        Args:
+            intent_label (str): Intent label of the job
+            success (bool): Whether training succeeded
+        """
+        with self._lock, self.store.lock():
+            self._sync()
+            job = self.jobs.get(intent_label)
+            if not job or job['status'] != "running":
+                return False
+
+            job['status'] = "completed" if success else "failed"
+            job['finished_at'] = datetime.now().isoformat()
+            job['owner'] = None
+            self.save()
+
+        logger.log(logging.INFO if success else logging.ERROR, "Training job for '%s' %s", intent_label, job['status'])
+        self.dispatch()
+        return True
+
+    def get_status(self):
+        """Summary for system status"""
+        counts = {}
+        for job in self.jobs.values():
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+
+        return {
+            "jobs": counts,
+            "spent": round(self.spent, 4),
+            "remaining_budget": round(self.remaining_budget(), 4),
+            "queue": [job['intent_label'] for job in self.get_queue()]
+        }
@@ -1,6 +1,7 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import json
+from config import INTENT_MERGE_THRESHOLD
 
 class IntentMerger:
     """
@@ -14,7 +15,7 @@ class IntentMerger:
             print("Loading embedding model for intent merging...")
             self.model = SentenceTransformer('all-MiniLM-L6-v2')
         
-        self.merge_threshold = 0.30  # 75% similarity = same intent
+        self.merge_threshold = INTENT_MERGE_THRESHOLD
     
     def calculate_similarity(self, text1, text2):
         """Calculate cosine similarity between two texts"""
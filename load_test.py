@@ -0,0 +1,203 @@
+"""
+Load generator for NemotronMetaAgent
+
+Drives process_query at a target QPS (open loop, so a slow system shows up
+as latency instead of a lower offered rate) and reports throughput,
+p50/p95/p99 latency and a per-stage breakdown. By default it starts the
+local mock NIM server and runs against a scratch copy of data/, so it
+works offline and leaves the real query logs untouched.
+
+Usage:
+    python load_test.py --qps 20 --duration 30 --latency-ms 400 --error-rate 0.05
+    python load_test.py --base-url http://my-nim:8000/v1 --qps 5   # real endpoint
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_nim import MockNIMConfig, MockNIMServer
+
+DEFAULT_PROMPTS = [
+    "Write SQL to find top customers",
+    "Plan a 7 day trip to Kyoto and Osaka",
+    "Write a python function to merge two sorted lists",
+    "What should I know about etiquette in Japanese temples?",
+    "Compare electric cars with hybrids",
+    "Write a short poem about a lonely robot",
+    "How do I use a dictionary in python?",
+    "Explain window functions in SQL",
+]
+
+def run_load(agent, prompts, qps, duration, max_workers=64, seed=None):
+    """
+    Send queries at a fixed arrival rate and collect per-request results
+
+    Args:
+        agent: NemotronMetaAgent (anything with process_query)
+        prompts (list): Prompts sampled uniformly
+        qps (float): Target arrivals per second
+        duration (float): Seconds to keep sending
+        max_workers (int): Max in-flight requests
+        seed (int): Optional seed for prompt sampling
+
+    Returns:
+        tuple: (samples list, wall-clock seconds)
+    """
+    rng = random.Random(seed)
+    samples = []
+    lock = threading.Lock()
+
+    def one(prompt):
+        start = time.perf_counter()
+        try:
+            result = agent.process_query(prompt)
+            metadata = result['metadata']
+            sample = {
+                "latency": time.perf_counter() - start,
+                "routed_to": metadata['routed_to'],
+                "stages": metadata.get('stages', {}),
+                "error": None
+            }
+        except Exception as e:
+            sample = {"latency": time.perf_counter() - start, "routed_to": "exception", "stages": {}, "error": str(e)}
+        with lock:
+            samples.append(sample)
+
+    interval = 1.0 / qps
+    total = int(qps * duration)
+    begin = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="load") as pool:
+        for i in range(total):
+            # Schedule against the start time so submission jitter doesn't lower the offered rate
+            delay = begin + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, rng.choice(prompts))
+
+    return samples, time.perf_counter() - begin
+
+
+def summarize(samples, elapsed, target_qps):
+    """
+    Aggregate load test samples
+
+    Returns:
+        dict: throughput, latency percentiles, per-stage breakdown, routing counts
+    """
+    from core.stage_metrics import StageMetrics
+
+    metrics = StageMetrics(window_size=max(1, len(samples)))
+    routing = {}
+    for sample in samples:
+        metrics.observe(dict(sample['stages'], total=sample['latency']), {"routed_to": sample['routed_to']})
+        routing[sample['routed_to']] = routing.get(sample['routed_to'], 0) + 1
+
+    stages = metrics.summary()
+    return {
+        "requests": len(samples),
+        "target_qps": target_qps,
+        "throughput_qps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(1 for s in samples if s['error']),
+        "latency": stages.pop("total", {}),
+        "stages": stages,
+        "routed_to": routing
+    }
+
+
+def print_report(report):
+    print("\n" + "="*60)
+    print("LOAD TEST REPORT")
+    print("="*60 + "\n")
+    print(f"Requests: {report['requests']} ({report['errors']} exceptions)")
+    print(f"Throughput: {report['throughput_qps']} qps (target {report['target_qps']})")
+
+    latency = report['latency']
+    if latency:
+        print(f"Latency: p50 {latency['p50']}s / p95 {latency['p95']}s / p99 {latency['p99']}s")
+
+    print("\nStages (p50 / p95 / p99):")
+    for stage, stats in report['stages'].items():
+        print(f"  - {stage}: {stats['p50']}s / {stats['p95']}s / {stats['p99']}s")
+
+    print("\nRouted to:")
+    for routed_to, count in sorted(report['routed_to'].items()):
+        print(f"  - {routed_to}: {count}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive NemotronMetaAgent at a target QPS")
+    parser.add_argument("--qps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-workers", type=int, default=64)
+    parser.add_argument("--prompts", help="File with one prompt per line")
+    parser.add_argument("--base-url", help="Use a running endpoint instead of the built-in mock")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--router-latency-ms", type=float, default=80.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--in-place", action="store_true", help="Use ./data instead of a scratch copy")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        os.environ["NVIDIA_API_BASE"] = args.base_url
+    else:
+        server = MockNIMServer(MockNIMConfig(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            router_latency_ms=args.router_latency_ms,
+            error_rate=args.error_rate,
+            completion_tokens=args.completion_tokens,
+            seed=args.seed
+        )).start()
+        os.environ["NVIDIA_API_BASE"] = server.base_url
+        os.environ.setdefault("NVIDIA_API_KEY", "mock")
+        os.environ.setdefault("ROUTER_MODEL", "mock/router")
+        os.environ.setdefault("GENERALIST_MODEL", "mock/generalist")
+        print(f"Mock NIM listening on {server.base_url}")
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts) as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    output = os.path.abspath(args.output) if args.output else None
+
+    # Run against a scratch copy so logs, queues and training jobs stay out of ./data
+    root = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, root)
+    if not args.in_place:
+        workdir = tempfile.mkdtemp(prefix="findingnemo-load-")
+        shutil.copytree(os.path.join(root, "data"), os.path.join(workdir, "data"))
+        os.chdir(workdir)
+
+    # Import after the environment is set - config reads it at import time
+    from core.nematron_meta_agent import NemotronMetaAgent
+    agent = NemotronMetaAgent()
+
+    samples, elapsed = run_load(agent, prompts, args.qps, args.duration, args.max_workers, args.seed)
+    agent.decision_worker.flush()
+    report = summarize(samples, elapsed, args.qps)
+    if server:
+        report['mock_server'] = dict(server.config.stats)
+        server.stop()
+
+    print_report(report)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
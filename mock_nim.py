@@ -0,0 +1,247 @@
+"""
+Local OpenAI-compatible mock of the NVIDIA NIM API for offline load testing
+
+Serves POST /v1/chat/completions (and /chat/completions), including
+stream=True SSE responses. Router calls (a system prompt asking for
+intent JSON) get a deterministic intent back, everything else gets filler
+text with the configured token counts.
+
+Usage:
+    python mock_nim.py --port 8000 --latency-ms 400 --error-rate 0.02
+    NVIDIA_API_BASE=http://127.0.0.1:8000/v1 python main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Intents handed out by the mock router, picked by hashing the prompt
+DEFAULT_INTENTS = [
+    ("Python Programming", "Request for Python code or an explanation of a Python concept."),
+    ("SQL Queries", "Request for an SQL query that retrieves or aggregates data from tables."),
+    ("Japan Geography", "Question about the cities, regions and geography of Japan."),
+    ("Creative Writing", "Request for a creative writing piece such as a poem or short story."),
+    ("Electric Vehicles", "Explanation or comparison of electric cars and their trade-offs."),
+]
+
+class MockNIMConfig:
+    """
+    SINGLE RESPONSIBILITY: Hold the latency/error/token knobs of the mock server
+    """
+
+    def __init__(self, latency_ms=300.0, latency_sigma=0.3, router_latency_ms=80.0,
+                 error_rate=0.0, error_status=500, prompt_tokens=60, completion_tokens=200,
+                 token_interval_ms=5.0, intents=None, malformed_rate=0.0, structured_output=True, seed=None):
+        """
+        Args:
+            latency_ms (float): Median model latency (lognormal)
+            latency_sigma (float): Lognormal sigma, 0 = fixed latency
+            router_latency_ms (float): Median latency for router (intent) calls
+            error_rate (float): Fraction of requests answered with error_status
+            error_status (int): HTTP status used for injected errors (500, 429, 503...)
+            prompt_tokens (int): Reported prompt tokens, None = estimate from the messages (~4 chars/token)
+            completion_tokens (int): Completion tokens generated per answer
+            token_interval_ms (float): Gap between streamed chunks
+            intents (list): (intent_label, description) pairs for router calls
+            malformed_rate (float): Fraction of unconstrained router answers that are prose, not JSON
+            structured_output (bool): Honor response_format / nvext.guided_json (False = reject with 400)
+            seed (int): Optional RNG seed for reproducible runs
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.router_latency_ms = router_latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.token_interval_ms = token_interval_ms
+        self.intents = intents or DEFAULT_INTENTS
+        self.malformed_rate = malformed_rate
+        self.structured_output = structured_output
+
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "router": 0, "streams": 0}
+        self._lock = threading.Lock()
+
+    def sample_latency(self, median_ms):
+        """Seconds to sleep before answering"""
+        with self._lock:
+            if self.latency_sigma <= 0:
+                return median_ms / 1000
+            return median_ms * self.random.lognormvariate(0, self.latency_sigma) / 1000
+
+    def should_fail(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def should_garble(self):
+        with self._lock:
+            return self.random.random() < self.malformed_rate
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip('/') not in ("/v1/chat/completions", "/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        config = self.server.config
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        config.count("requests")
+
+        messages = body.get('messages', [])
+        is_router = any(m.get('role') == "system" and "intent_label" in m.get('content', '') for m in messages)
+        user_prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == "user"), "")
+        # Constrained decoding - mock output always matches the schema anyway
+        structured = 'response_format' in body or 'guided_json' in (body.get('nvext') or {})
+        if structured and not config.structured_output:
+            return self._send_json(400, {"error": {"message": "response_format is not supported"}})
+
+        if is_router:
+            config.count("router")
+        time.sleep(config.sample_latency(config.router_latency_ms if is_router else config.latency_ms))
+
+        if config.should_fail():
+            config.count("errors")
+            return self._send_json(config.error_status, {"error": {"message": "Injected mock error"}})
+
+        model = body.get('model', "mock-model")
+        if is_router:
+            label, description = config.intents[zlib.crc32(user_prompt.encode()) % len(config.intents)]
+            content = json.dumps({"intent_label": label, "description": description})
+            if not structured and config.should_garble():
+                content = f"This looks like a question about {label}."
+            completion_tokens = 30
+        else:
+            completion_tokens = min(config.completion_tokens, body.get('max_tokens') or config.completion_tokens)
+            content = " ".join(["token"] * completion_tokens)
+
+        prompt_tokens = config.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(len(m.get('content', '')) // 4 + 1 for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        if body.get('stream'):
+            config.count("streams")
+            return self._send_stream(model, completion_tokens, usage)
+
+        self._send_json(200, {
+            "id": f"mock-{time.time_ns()}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model, completion_tokens, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        interval = self.server.config.token_interval_ms / 1000
+        for i in range(completion_tokens):
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": "token "}}]}
+            if i == completion_tokens - 1:
+                chunk['usage'] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if interval:
+                time.sleep(interval)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockNIMServer(ThreadingHTTPServer):
+    """
+    SINGLE RESPONSIBILITY: Serve the mock API on a local port
+    """
+    daemon_threads = True
+    request_queue_size = 128  # Bursts of concurrent clients (load tests, batches) overflow the default of 5
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        """
+        Args:
+            config (MockNIMConfig): Behaviour knobs (defaults if None)
+            host (str): Bind address
+            port (int): Port, 0 = pick a free one
+        """
+        super().__init__((host, port), _Handler)
+        self.config = config or MockNIMConfig()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Value for NVIDIA_API_BASE"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock NIM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--router-latency-ms", type=float, default=80.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = MockNIMConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        router_latency_ms=args.router_latency_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        completion_tokens=args.completion_tokens,
+        seed=args.seed
+    )
+    server = MockNIMServer(config, args.host, args.port)
+    print(f"Mock NIM listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+HTTP serving front end for NemotronMetaAgent
+
+A plain ASGI app (no framework) served by uvicorn in pre-forked worker
+processes. The master loads the embedding model once and forks, so every
+worker shares the model weights copy-on-write. The memory bank is a
+SharedMemoryBank: the matrix is mmap'd from one shared segment and a
+specialist added by any worker is searched by all of them on their next
+request. Each worker builds its own agent after the fork (the agent
+starts background threads, which must not cross a fork).
+
+Endpoints:
+    POST /query          {"prompt": "...", "tenant": "..."} -> process_query result
+    POST /query/stream   {"prompt": "...", "tenant": "..."} -> text/event-stream of chunks, then the result
+
+    The tenant can also come from an X-Tenant-ID header; without either the
+    default tenant (data/memory_bank.json, data/query_logs.json) is used.
+    Unknown tenants (no data/tenants/<id>/, not on TENANT_ALLOWLIST) get a 404.
+    GET  /status         get_system_status()
+    GET  /health         {"status": "ok", "pid": ...}
+    POST /reload         reload the memory bank (published to every worker)
+
+Signals (master):
+    SIGHUP   reload the memory bank from disk and publish it to every worker
+             (the master also polls data/memory_bank.json, see MEMORY_BANK_WATCH_INTERVAL)
+    SIGTERM  graceful shutdown (workers finish in-flight requests)
+
+Usage:
+    python server.py --workers 4 --port 8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import MEMORY_BANK_WATCH_INTERVAL, METRICS_TEXTFILE
+from core.log import get_logger, configure_logging, reconfigure_after_fork
+from core.stage_metrics import worker_textfile
+from core.tenants import UnknownTenantError, validate_tenant_id
+
+logger = get_logger(__name__)
+
+class AgentApp:
+    """
+    SINGLE RESPONSIBILITY: Translate HTTP requests into NemotronMetaAgent calls
+    process_query is blocking, so it runs on a thread pool off the event loop
+    """
+
+    def __init__(self, agent, max_concurrency=32):
+        """
+        Args:
+            agent (NemotronMetaAgent): Agent owned by this worker
+            max_concurrency (int): Threads running process_query at once
+        """
+        self.agent = agent
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope['type'] != "http":
+            return
+
+        route = (scope['method'], scope['path'].rstrip('/') or '/')
+        loop = asyncio.get_running_loop()
+
+        if route == ("GET", "/health"):
+            return await self._json(send, 200, {"status": "ok", "pid": os.getpid()})
+
+        if route == ("GET", "/status"):
+            status = await loop.run_in_executor(self.executor, self.agent.get_system_status)
+            return await self._json(send, 200, status)
+
+        if route == ("POST", "/reload"):
+            count = await loop.run_in_executor(self.executor, reload_memory_bank, self.agent)
+            return await self._json(send, 200, {"specialists": count, "pid": os.getpid()})
+
+        if route in (("POST", "/query"), ("POST", "/query/stream")):
+            try:
+                body = json.loads(await self._read_body(receive) or b"{}")
+                prompt = body['prompt']
+            except (ValueError, KeyError, TypeError):
+                return await self._json(send, 400, {"error": "Expected JSON body with a 'prompt' field"})
+
+            tenant_id = body.get('tenant') or self._header(scope, b"x-tenant-id")
+            if tenant_id is not None:
+                try:
+                    validate_tenant_id(tenant_id)
+                except ValueError as e:
+                    return await self._json(send, 400, {"error": str(e)})
+                try:
+                    # Loads it (off the loop) so unknown tenants fail before a stream starts
+                    await loop.run_in_executor(self.executor, self.agent.tenants.get, tenant_id)
+                except UnknownTenantError as e:
+                    return await self._json(send, 404, {"error": str(e)})
+
+            if route[1] == "/query/stream":
+                return await self._stream(send, receive, prompt, tenant_id)
+
+            result = await loop.run_in_executor(self.executor, self.agent.process_query, prompt, tenant_id)
+            return await self._json(send, 200, result)
+
+        await self._json(send, 404, {"error": f"No route for {route[0]} {route[1]}"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message['type'] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                self.agent.decision_worker.stop()
+                self.agent.tenants.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    def _header(scope, name):
+        for key, value in scope.get('headers', []):
+            if key.lower() == name:
+                return value.decode('latin-1')
+        return None
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b""))
+            if not message.get('more_body'):
+                return b"".join(chunks)
+
+    async def _json(self, send, status, payload):
+        body = json.dumps(payload, default=str).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream(self, send, receive, prompt, tenant_id=None):
+        """
+        Relay process_query_stream events as server-sent events
+
+        If the client disconnects (or a send fails) the generator is closed,
+        which lets the agent settle the abandoned specialist call.
+        """
+        events = self.agent.process_query_stream(prompt, tenant_id)
+        disconnected = asyncio.ensure_future(self._disconnect(receive))
+        step, waiter, finished = None, None, False
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]
+            })
+            while True:
+                step = self.executor.submit(next, events, None)
+                waiter = asyncio.wrap_future(step)
+                await asyncio.wait({waiter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not waiter.done():
+                    logger.info("Client disconnected mid-stream")
+                    return
+                event = waiter.result()
+                if event is None:
+                    finished = True
+                    break
+                await send({"type": "http.response.body", "body": f"data: {json.dumps(event)}\n\n".encode(),
+                            "more_body": True})
+            await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+        finally:
+            disconnected.cancel()
+            if waiter is not None:
+                waiter.cancel()
+            if not finished:
+                # A generator can't be closed while a step is running - close it after that step, off the loop
+                self.executor.submit(_close_stream, events, step)
+
+    @staticmethod
+    async def _disconnect(receive):
+        """Returns once the client has gone away"""
+        while (await receive())['type'] != "http.disconnect":
+            pass
+
+
+def _close_stream(events, step=None):
+    """Close a process_query_stream generator once its running step (a Future) is done"""
+    if step is not None:
+        wait([step])
+    events.close()
+
+
+def reload_memory_bank(agent):
+    """Reload specialists from disk; searches keep using the old generation until the swap"""
+    agent.memory_bank.load()
+    return len(agent.memory_bank.specialists)
+
+
+def _run_worker(sock, host, port, embedding_service, memory_bank, max_concurrency, worker=None):
+    """Body of one worker process (or the only process when workers == 1, worker None)"""
+    import uvicorn
+    from core.nematron_meta_agent import NemotronMetaAgent
+
+    agent = NemotronMetaAgent(embedding_service=embedding_service, memory_bank=memory_bank, worker=worker)
+    app = AgentApp(agent, max_concurrency=max_concurrency)
+
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock] if sock else None)
+
+
+def serve(host="0.0.0.0", port=8080, workers=1, max_concurrency=32, shm_dir=None):
+    """
+    Run the server
+
+    Args:
+        host (str): Bind address
+        port (int): Bind port
+        workers (int): Worker processes (forked from a master that preloads shared state)
+        max_concurrency (int): process_query threads per worker
+        shm_dir (str): Shared memory bank segment directory (default under /dev/shm)
+    """
+    import uvicorn  # noqa: F401 - fail before loading the model if uvicorn is missing
+    from core.embeddings import EmbeddingService
+    from core.shared_memory_bank import SharedMemoryBank
+
+    configure_logging()
+
+    # Loaded once, before forking - workers share these pages copy-on-write
+    embedding_service = EmbeddingService()
+    memory_bank = SharedMemoryBank(shm_dir=shm_dir)
+
+    # SIGHUP: reload the bank off the signal handler; searches keep using the old generation meanwhile
+    signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=memory_bank.load, daemon=True).start())
+
+    if workers <= 1:
+        if MEMORY_BANK_WATCH_INTERVAL:
+            memory_bank.watch(MEMORY_BANK_WATCH_INTERVAL)
+        return _run_worker(None, host, port, embedding_service, memory_bank, max_concurrency)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    children = set()
+    shutting_down = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(sig, signal.SIG_DFL if sig != signal.SIGHUP else signal.SIG_IGN)
+            reconfigure_after_fork()
+            try:
+                _run_worker(sock, host, port, embedding_service, memory_bank, max_concurrency, worker=os.getpid())
+            finally:
+                os._exit(0)
+        children.add(pid)
+        logger.info("Started worker %d", pid)
+
+    def stop(_sig, _frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+
+    # Only the master watches the bank file (after forking, so no thread or lock crosses a fork);
+    # each change is published once and every worker picks it up
+    if MEMORY_BANK_WATCH_INTERVAL:
+        memory_bank.watch(MEMORY_BANK_WATCH_INTERVAL)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Serving on http://%s:%d with %d workers (master %d)", host, port, workers, os.getpid())
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        # A gone worker's metrics file would be collected forever
+        if METRICS_TEXTFILE:
+            try:
+                os.unlink(worker_textfile(METRICS_TEXTFILE, pid))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not remove metrics file of worker %d: %s", pid, e)
+        if not shutting_down:
+            logger.warning("Worker %d exited (status %d), restarting", pid, status)
+            spawn()
+
+    sock.close()
+    logger.info("Server stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve NemotronMetaAgent over HTTP")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--shm-dir", help="Shared memory bank segment directory")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.max_concurrency, args.shm_dir)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import random
 from tqdm import tqdm
 from openai import OpenAI
 from dotenv import load_dotenv
+from training_dedup import TrainingDeduplicator
+from core.embeddings import EmbeddingService
 
 load_dotenv()
 
@@ -17,6 +19,10 @@ if not NVIDIA_API_KEY:
 NVIDIA_API_BASE = "https://integrate.api.nvidia.com/v1"
 REWARD_MODEL_NAME = "nvidia/llama-3.1-nemotron-70b-reward"
 
+# Near-duplicate cutoffs applied before scoring (each removed sample saves a reward call)
+DEDUP_JACCARD_THRESHOLD = 0.7
+DEDUP_EMBEDDING_THRESHOLD = 0.92
+
 client = OpenAI(
     base_url=NVIDIA_API_BASE,
     api_key=NVIDIA_API_KEY
@@ -26,6 +32,15 @@ client = OpenAI(
 with open("generated_test_cases.json", "r", encoding="utf-8") as f:
     data = json.load(f)
 
+# --- Drop near-duplicates before paying for reward calls ---
+deduplicator = TrainingDeduplicator(
+    embedding_service=EmbeddingService(),
+    jaccard_threshold=DEDUP_JACCARD_THRESHOLD,
+    embedding_threshold=DEDUP_EMBEDDING_THRESHOLD
+)
+data, dedup_report = deduplicator.deduplicate(data)
+deduplicator.print_dedup_report(dedup_report)
+
 results = []
 
 # --- Main Loop ---
@@ -84,4 +99,5 @@ with open("reward_results.json", "w", encoding="utf-8") as f:
     json.dump(filtered_results, f, indent=2, ensure_ascii=False)
 
 print(f"✅ Processed {len(results)} test cases.")
+print(f"🧹 Skipped {dedup_report['reward_calls_saved']} near-duplicate reward calls.")
 print(f"📊 Saved top {top_k} entries (75%) to reward_results.json.")
@@ -0,0 +1,99 @@
+import sys
+import os
+import tempfile
+import threading
+sys.path.append('..')
+
+import core.model_caller
+from mock_nim import MockNIMConfig, MockNIMServer, DEFAULT_INTENTS
+from core.memory_bank import MemoryBank
+from core.nematron_meta_agent import NemotronMetaAgent
+from benchmarks import generators
+
+class TableEmbeddings:
+    """Stands in for EmbeddingService with precomputed vectors per text"""
+
+    def __init__(self, table):
+        self.table = table
+        self.batches = 0
+        self.single = 0
+
+    def create_embedding(self, text):
+        self.single += 1
+        return self.table[text]
+
+    def create_embeddings_batch(self, texts):
+        self.batches += 1
+        return [self.table[text] for text in texts]
+
+def test_batch():
+    server = MockNIMServer(MockNIMConfig(latency_ms=20, router_latency_ms=1, latency_sigma=0, seed=1)).start()
+    settings = (core.model_caller.NVIDIA_API_KEY, core.model_caller.NVIDIA_API_BASE, core.model_caller.GENERALIST_MODEL)
+    core.model_caller.NVIDIA_API_KEY = "mock"
+    core.model_caller.NVIDIA_API_BASE = server.base_url
+    core.model_caller.GENERALIST_MODEL = "mock/generalist"
+
+    print("\n" + "="*60)
+    print("TESTING BATCH ROUTING")
+    print("="*60 + "\n")
+
+    # Every mock description gets its own vector; SQL and Japan have specialists
+    vectors = generators.embeddings(len(DEFAULT_INTENTS))
+    table = {description: vector.tolist() for (_, description), vector in zip(DEFAULT_INTENTS, vectors)}
+    bank = MemoryBank(bank_file=os.path.join(tempfile.mkdtemp(), "memory_bank.json"))
+    bank.add_specialist("sql", "SQL", "mock/sql", vectors[1].tolist())
+    bank.add_specialist("japan", "Japan", "mock/japan", vectors[2].tolist())
+    embeddings = TableEmbeddings(table)
+
+    try:
+        agent = NemotronMetaAgent(embedding_service=embeddings, memory_bank=bank)
+    finally:
+        core.model_caller.NVIDIA_API_KEY, core.model_caller.NVIDIA_API_BASE, core.model_caller.GENERALIST_MODEL = settings
+    agent.router.base_url = server.base_url
+    agent.router.api_key = "mock"
+    agent.hedging_enabled = False
+
+    # Count specialist calls in flight per endpoint
+    in_flight, peak, lock = {}, {}, threading.Lock()
+    call_specialist = agent.model_caller.call_specialist
+    def counting_call(endpoint, user_prompt, **kwargs):
+        with lock:
+            in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+            peak[endpoint] = max(peak.get(endpoint, 0), in_flight[endpoint])
+        try:
+            return call_specialist(endpoint, user_prompt, **kwargs)
+        finally:
+            with lock:
+                in_flight[endpoint] -= 1
+    agent.model_caller.call_specialist = counting_call
+
+    prompts = [f"Question {i}" for i in range(40)]
+    try:
+        results = agent.process_batch(prompts, max_concurrency=16, endpoint_concurrency=2)
+        agent.decision_worker.flush()
+
+        # Same routing as query-by-query, in prompt order, with one embedding call
+        assert len(results) == 40 and embeddings.batches == 1 and embeddings.single == 0
+        expected = [agent.process_query(prompt) for prompt in prompts[:10]]
+        agent.decision_worker.flush()
+        for result, single in zip(results, expected):
+            assert result['metadata']['intent_label'] == single['metadata']['intent_label']
+            assert result['metadata']['routed_to'] == single['metadata']['routed_to']
+        routed = [result['metadata']['routed_to'] for result in results]
+        print(f"Routed: {dict((r, routed.count(r)) for r in set(routed))}, peak in flight: {peak}")
+        assert routed.count("specialist") > 0 and routed.count("generalist") > 0
+        assert all(result['metadata']['batch'] == {"size": 40, "index": i} for i, result in enumerate(results))
+        assert peak and max(peak.values()) <= 2, "Specialist calls stay within the per-endpoint limit"
+
+        # Generalist-routed queries were logged, specialist-routed ones were not
+        logged = sum(agent.query_logger.get_count(label) for label, _ in DEFAULT_INTENTS)
+        assert logged == routed.count("generalist") + sum(1 for r in expected if r['metadata']['routed_to'] == "generalist")
+        assert agent.query_logger.get_count("SQL Queries") == 0
+
+        assert agent.process_batch([]) == []
+    finally:
+        agent.decision_worker.stop()
+        server.stop()
+
+if __name__ == "__main__":
+    test_batch()
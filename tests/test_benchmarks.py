@@ -0,0 +1,30 @@
+import sys
+sys.path.append('..')
+
+from benchmarks import generators
+from benchmarks.bench import measure, compare
+
+def test_benchmarks():
+    print("\n" + "="*60)
+    print("TESTING BENCHMARK HARNESS")
+    print("="*60 + "\n")
+
+    # Generators are deterministic so results are comparable across commits
+    assert generators.specialists(5) == generators.specialists(5)
+    assert len(generators.specialists(5)[0]['embedding']) == generators.DIMENSIONS
+    history = generators.query_history(50, n_intents=5)
+    assert sum(entry['count'] for entry in history.values()) == 50
+
+    stats = measure(lambda: sum(range(100)), repeat=5)
+    print(f"sum(range(100)): {stats}")
+    assert stats['min'] <= stats['median'] <= stats['p95']
+    assert stats['number'] > 1, "Fast calls should be batched"
+
+    baseline = {"results": {"memory_bank.search": {"10": {"median": 1.0}, "1000": {"skipped": "x"}}}}
+    current = {"results": {"memory_bank.search": {"10": {"median": 1.5}, "1000": {"median": 2.0}}}}
+    rows = compare(baseline, current)
+    print(f"Compare: {rows}")
+    assert rows == [("memory_bank.search", "10", 1.5, True)]
+
+if __name__ == "__main__":
+    test_benchmarks()
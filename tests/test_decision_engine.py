@@ -2,6 +2,7 @@ import sys
 sys.path.append('..')
 
 from core.decision_engine import DecisionEngine
+from core.metrics_store import MetricsStore
 def test_decision_engine():
     engine = DecisionEngine()
     
@@ -64,6 +65,41 @@ def test_decision_engine():
     print(f"Decision: {result['decision']}")
     for reason in result['reasons']:
         print(reason)
+    
+    print("\n" + "="*60 + "\n")
+    
+    # Test Case 5: ROI from observed tokens, latency and query rate
+    print("Test Case 5: Observed heavy traffic (measured ROI)")
+    print("-" * 60)
+    store = MetricsStore(min_rate_window=60)
+    for _ in range(200):
+        store.record("sql_generation", "generalist", {
+            "prompt_tokens": 80, "completion_tokens": 900, "latency": 4.2, "error": None
+        })
+    store.record("japan_travel", "specialist", {
+        "prompt_tokens": 80, "completion_tokens": 300, "latency": 0.6, "error": None
+    })
+    measured_engine = DecisionEngine(metrics_store=store)
+    result = measured_engine.make_decision("sql_generation", count=200)
+    print(f"Decision: {result['decision']}")
+    for reason in result['reasons']:
+        print(reason)
+    roi = result['details']['bottleneck']['roi']
+    print(f"ROI inputs: {roi}")
+    assert roi['rate_source'] == "observed"
+    assert result['decision'] == "TRAIN", "200 queries/minute should pay back quickly"
+    
+    # Same intent with a trickle of traffic should not be approved
+    result = engine.make_decision("sql_generation", count=5)
+    assert not result['details']['bottleneck']['approved'], "5 queries/day should not pay back"
+    
+    # A large lifetime count whose traffic has since died down is priced at the decayed rate
+    result = engine.make_decision("sql_generation", count=50000, rate=0.1)
+    roi = result['details']['bottleneck']['roi']
+    print(f"Decayed rate: {roi['daily_queries']} queries/day ({roi['rate_source']})")
+    assert roi['rate_source'] == "decayed" and roi['daily_queries'] == 2.4
+    assert not result['details']['bottleneck']['approved']
+    assert engine.make_decision("sql_generation", count=50000)['details']['bottleneck']['roi']['rate_source'] == "count"
 
 if __name__ == "__main__":
     test_decision_engine()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import sys
+import os
+import tempfile
+import time
+sys.path.append('..')
+
+from core.query_logger import QueryLogger
+from core.decision_engine import DecisionEngine
+from core.decision_worker import DecisionWorker
+
+def test_decision_worker():
+    logger = QueryLogger(log_file=os.path.join(tempfile.mkdtemp(), "query_logs.json"))
+    engine = DecisionEngine()
+    engine.training_cost = 0.001  # Make ROI trivially positive so only the threshold matters
+    worker = DecisionWorker(logger, engine)
+
+    print("\n" + "="*60)
+    print("TESTING DECISION WORKER")
+    print("="*60 + "\n")
+
+    published = []
+    worker.subscribe(lambda label, description, decision: published.append((label, decision['decision'])))
+
+    # Submitting only queues the event
+    for i in range(engine.threshold):
+        worker.submit("sql_generation", "Generate SQL queries", f"SQL query #{i}")
+    worker.flush()
+
+    print(f"Published: {published}")
+    print(f"Latest decision: {worker.get_decision('sql_generation')}")
+
+    assert logger.get_count("sql_generation") == engine.threshold
+    assert published[0] == ("sql_generation", "WAIT"), "First event should be evaluated"
+    assert published[-1] == ("sql_generation", "TRAIN"), "Crossing the threshold should publish TRAIN"
+    assert len(published) == 2, "Events between first and crossing should not re-evaluate"
+    assert 'plan' in worker.get_decision("sql_generation")
+
+    worker.stop()
+    try:
+        worker.submit("sql_generation", "Generate SQL queries", "After stop")
+        assert False, "Expected RuntimeError - the event would be lost"
+    except RuntimeError:
+        pass
+
+    # A failing sweep is logged, the worker keeps going
+    sweeping = DecisionWorker(logger, engine, interval=0.01)
+    def broken(**kwargs):
+        raise IOError("disk gone")
+    logger.get_bottlenecks = broken
+    time.sleep(0.1)
+    sweeping.submit("python_help", "Python questions", "After a failed sweep")
+    sweeping.flush()
+    assert logger.get_count("python_help") == 1
+    sweeping.stop()
+    del logger.get_bottlenecks
+
+    # A dead worker makes flush fail instead of blocking forever
+    dead = DecisionWorker(logger, engine)
+    dead.events.put(dead._STOP)  # thread exits with an event still queued behind it
+    dead.events.put({"intent_label": "python_help", "description": "Python questions", "prompt": "Never handled"})
+    try:
+        dead.flush()
+        assert False, "Expected RuntimeError"
+    except RuntimeError as e:
+        print(f"Dead worker: {e}")
+
+if __name__ == "__main__":
+    test_decision_worker()
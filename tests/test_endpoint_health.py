@@ -0,0 +1,51 @@
+import sys
+import time
+sys.path.append('..')
+
+from core.endpoint_health import EndpointHealth
+
+def test_endpoint_health():
+    health = EndpointHealth(consecutive_failures=3, cooldown=0.2)
+    endpoint = "nvidia/llama-3.1-nemotron-70b-instruct"
+
+    print("\n" + "="*60)
+    print("TESTING ENDPOINT HEALTH")
+    print("="*60 + "\n")
+
+    # Healthy calls keep the circuit closed
+    for latency in (0.5, 0.7, 0.6):
+        assert health.allow_request(endpoint)
+        health.record(endpoint, True, latency)
+    print(f"Healthy: {health.get_status()[endpoint]}")
+    assert health.get_status()[endpoint]['state'] == "closed"
+
+    # Three failures in a row trip the breaker
+    for _ in range(3):
+        health.record(endpoint, False, 60.0)
+    print(f"After failures: {health.get_status()[endpoint]}")
+    assert health.get_status()[endpoint]['state'] == "open"
+    assert not health.allow_request(endpoint), "Open circuit should skip the specialist"
+
+    # After the cooldown exactly one probe goes through
+    time.sleep(0.25)
+    assert health.allow_request(endpoint), "Cooldown over - probe allowed"
+    assert not health.allow_request(endpoint), "Only one probe while half-open"
+
+    health.record(endpoint, True, 0.4)
+    print(f"After probe: {health.get_status()[endpoint]}")
+    assert health.get_status()[endpoint]['state'] == "closed"
+
+    # A probe abandoned without an outcome frees its slot; one that never reports back times out
+    flaky = EndpointHealth(consecutive_failures=1, cooldown=0.0, probe_timeout=0.2)
+    flaky.record(endpoint, False)
+    assert flaky.allow_request(endpoint) and not flaky.allow_request(endpoint)
+    flaky.release(endpoint)
+    assert flaky.allow_request(endpoint), "Released probe - the next request probes"
+    assert not flaky.allow_request(endpoint)
+    time.sleep(0.25)
+    assert flaky.allow_request(endpoint), "Lost probe - replaced after probe_timeout"
+    flaky.record(endpoint, True, 0.4)
+    assert flaky.get_status()[endpoint]['state'] == "closed"
+
+if __name__ == "__main__":
+    test_endpoint_health()
@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+import time
+sys.path.append('..')
+
+import core.model_caller
+from core.memory_bank import MemoryBank
+from core.nematron_meta_agent import NemotronMetaAgent
+from benchmarks import generators
+
+class TableEmbeddings:
+    """Stands in for EmbeddingService with precomputed vectors per text"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def create_embedding(self, text):
+        return self.table[text]
+
+class FixedRouter:
+    """Stands in for IntentRouter"""
+
+    def generate_intent(self, user_prompt):
+        return {"intent_label": "SQL Queries", "description": "sql", "confidence": 0.9}
+
+class StubModelCaller:
+    """Stands in for ModelCaller with scripted delays and errors per side"""
+
+    def __init__(self):
+        self.script = {"specialist": (0.0, None), "generalist": (0.0, None)}
+
+    def _answer(self, side, model):
+        delay, error = self.script[side]
+        start = time.perf_counter()
+        time.sleep(delay)
+        return {"answer": f"Error: {error}" if error else f"{side} answer", "model": model, "tokens_used": 10,
+                "latency": round(time.perf_counter() - start, 3), "error": error, "transport_error": bool(error)}
+
+    def call_specialist(self, endpoint, user_prompt, max_tokens=500):
+        return self._answer("specialist", endpoint)
+
+    def call_generalist(self, user_prompt, max_tokens=500):
+        return self._answer("generalist", "mock/generalist")
+
+def test_hedging():
+    vector = generators.embeddings(1)[0].tolist()
+    bank = MemoryBank(bank_file=os.path.join(tempfile.mkdtemp(), "memory_bank.json"))
+    bank.add_specialist("sql", "SQL", "mock/sql", vector)
+
+    settings = (core.model_caller.NVIDIA_API_KEY, core.model_caller.NVIDIA_API_BASE, core.model_caller.GENERALIST_MODEL)
+    core.model_caller.NVIDIA_API_KEY = "mock"
+    core.model_caller.NVIDIA_API_BASE = "http://127.0.0.1:9"
+    core.model_caller.GENERALIST_MODEL = "mock/generalist"
+    try:
+        agent = NemotronMetaAgent(embedding_service=TableEmbeddings({"sql": vector}), memory_bank=bank)
+    finally:
+        core.model_caller.NVIDIA_API_KEY, core.model_caller.NVIDIA_API_BASE, core.model_caller.GENERALIST_MODEL = settings
+    agent.router = FixedRouter()
+    agent.model_caller = caller = StubModelCaller()
+    agent.hedging_enabled = True
+
+    print("\n" + "="*60)
+    print("TESTING HEDGED SPECIALIST CALLS")
+    print("="*60 + "\n")
+
+    def ask(specialist, generalist):
+        caller.script = {"specialist": specialist, "generalist": generalist}
+        result = agent.process_query("Top customers by revenue")
+        print(f"{result['metadata']['routed_to']}: {result['metadata']['hedge']}")
+        return result
+
+    try:
+        # No latency history yet - no deadline, no hedge
+        result = ask((0.05, None), (0.0, None))
+        assert result['metadata']['routed_to'] == "specialist"
+        assert result['metadata']['hedge'] == {"fired": False, "deadline": None, "winner": "specialist", "rate": 0.0}
+
+        for _ in range(200):
+            agent.endpoint_health.record("mock/sql", True, 0.02)
+
+        # Fast specialist - the deadline never fires
+        result = ask((0.0, None), (0.0, None))
+        assert result['metadata']['routed_to'] == "specialist" and not result['metadata']['hedge']['fired']
+        assert result['metadata']['hedge']['deadline'] == 0.02
+
+        # Slow specialist, fast generalist - the deadline fires and the generalist wins
+        result = ask((0.5, None), (0.0, None))
+        assert result['metadata']['routed_to'] == "generalist (hedged)" and result['answer'] == "generalist answer"
+        assert result['metadata']['hedge']['fired'] and result['metadata']['hedge']['winner'] == "generalist"
+
+        # Deadline fires but the specialist still finishes first
+        result = ask((0.1, None), (0.6, None))
+        assert result['metadata']['routed_to'] == "specialist" and result['answer'] == "specialist answer"
+        assert result['metadata']['hedge']['fired'] and result['metadata']['hedge']['winner'] == "specialist"
+
+        # Both fail - the generalist's error is reported, no second fallback
+        result = ask((0.1, "HTTP Error 503"), (0.0, "HTTP Error 503"))
+        assert result['metadata']['routed_to'] == "generalist (hedged)" and result['metadata']['hedge']['winner'] is None
+        assert result['answer'] == "Error: HTTP Error 503"
+
+        # Rate: fired / eligible over every hedged call so far
+        assert agent.hedge_stats == {"eligible": 5, "fired": 3}
+        assert result['metadata']['hedge']['rate'] == 0.6
+    finally:
+        agent.decision_worker.stop()
+
+if __name__ == "__main__":
+    test_hedging()
@@ -0,0 +1,76 @@
+import sys
+import os
+import atexit
+import io
+import json
+import logging
+import tempfile
+import warnings
+sys.path.append('..')
+
+import core.log
+from core.log import JsonFormatter, get_logger, configure_logging, reconfigure_after_fork
+
+def test_log():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+
+    logger = get_logger("test")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    print("\n" + "="*60)
+    print("TESTING STRUCTURED LOGGING")
+    print("="*60 + "\n")
+
+    class Expensive:
+        formatted = 0
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    # Debug records are dropped before any formatting happens
+    logger.debug("Full response: %s", Expensive())
+    assert Expensive.formatted == 0, "Disabled levels should not format their arguments"
+
+    logger.info("Routed to %s", "specialist", extra={"intent_label": "code_help", "latency": 0.42})
+    entry = json.loads(stream.getvalue().strip())
+    print(entry)
+
+    assert entry['level'] == "INFO"
+    assert entry['message'] == "Routed to specialist"
+    assert entry['intent_label'] == "code_help" and entry['latency'] == 0.42
+
+    logger.removeHandler(handler)
+
+    # A forked worker (server.py) gets its own queue listener, so its records still come out
+    root = logging.getLogger(core.log.ROOT_LOGGER)
+    saved = (root.handlers[:], root.level, core.log._listener)
+    root.handlers = []
+    with tempfile.TemporaryFile('w+') as out:
+        try:
+            configure_logging(level="INFO", fmt="json", use_queue=True, stream=out)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)  # fork() with the listener thread running
+                pid = os.fork()
+            if pid == 0:
+                try:
+                    reconfigure_after_fork()
+                    get_logger("worker").info("Hello from worker %d", os.getpid())
+                    core.log._listener.stop()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+            get_logger("master").info("Hello from master")
+            atexit.unregister(core.log._listener.stop)
+            core.log._listener.stop()
+        finally:
+            root.handlers, root.level, core.log._listener = saved
+        out.seek(0)
+        messages = [json.loads(line)['message'] for line in out]
+    print(f"Forked logging: {messages}")
+    assert messages == [f"Hello from worker {pid}", "Hello from master"]
+
+if __name__ == "__main__":
+    test_log()
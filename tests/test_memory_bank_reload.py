@@ -0,0 +1,65 @@
+import sys
+import os
+import json
+import time
+import tempfile
+sys.path.append('..')
+
+from core.memory_bank import MemoryBank
+from benchmarks import generators
+
+def write_bank(path, specialists):
+    with open(path, 'w') as f:
+        json.dump({"specialists": specialists}, f)
+
+def test_memory_bank_reload():
+    bank_file = os.path.join(tempfile.mkdtemp(), "memory_bank.json")
+    specialists = generators.specialists(3)
+    write_bank(bank_file, specialists[:2])
+
+    print("\n" + "="*60)
+    print("TESTING MEMORY BANK HOT RELOAD")
+    print("="*60 + "\n")
+
+    bank = MemoryBank(bank_file=bank_file)
+    assert not bank.reload_if_changed(), "Nothing changed since load"
+    old_matrix = bank._index[1]
+
+    # An external tool appends a specialist
+    write_bank(bank_file, specialists)
+    assert bank.reload_if_changed()
+    assert len(bank.specialists) == 3
+    assert (bank._index[1][:2] == old_matrix).all(), "Unchanged rows are reused"
+    assert bank.search(specialists[2]['embedding'])['specialist']['intent_label'] == "specialist_2"
+
+    # A half-written file keeps the current bank
+    with open(bank_file, 'w') as f:
+        f.write('{"specialists": [')
+    assert not bank.reload_if_changed()
+    assert len(bank.specialists) == 3
+
+    # Our own writes don't trigger a reload; the watcher picks up external ones
+    write_bank(bank_file, specialists[:1])
+    bank.watch(interval=0.05)
+    deadline = time.time() + 2
+    while len(bank.specialists) != 1 and time.time() < deadline:
+        time.sleep(0.05)
+    bank.stop_watching()
+    print(f"Specialists after watched reload: {[s['intent_label'] for s in bank.specialists]}")
+    assert len(bank.specialists) == 1
+
+    bank.add_specialist("new_one", "New", "mock/new", specialists[2]['embedding'])
+    assert not bank.reload_if_changed()
+
+    # Another process writing the same file: neither add nor update drops the other's changes
+    other = MemoryBank(bank_file=bank_file)
+    other.add_specialist("from_other", "Other", "mock/other", specialists[1]['embedding'])
+    bank.update_specialist("new_one", threshold=0.7)
+    other.update_specialist("from_other", threshold=0.6)
+    final = MemoryBank(bank_file=bank_file)
+    print(f"Specialists after concurrent writers: {[s['intent_label'] for s in final.specialists]}")
+    assert [s['intent_label'] for s in final.specialists] == ["specialist_0", "new_one", "from_other"]
+    assert final.specialists[1]['threshold'] == 0.7 and final.specialists[2]['threshold'] == 0.6
+
+if __name__ == "__main__":
+    test_memory_bank_reload()
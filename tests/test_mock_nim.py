@@ -0,0 +1,50 @@
+import sys
+import requests
+sys.path.append('..')
+
+from mock_nim import MockNIMConfig, MockNIMServer
+from core.router import IntentRouter
+from load_test import summarize
+
+def test_mock_nim():
+    server = MockNIMServer(MockNIMConfig(latency_ms=5, router_latency_ms=1, completion_tokens=20, seed=1)).start()
+
+    print("\n" + "="*60)
+    print("TESTING MOCK NIM SERVER")
+    print("="*60 + "\n")
+
+    try:
+        # Router calls get a parseable intent back
+        router = IntentRouter()
+        router.base_url = server.base_url
+        intent = router.generate_intent("Write SQL to find top customers")
+        print(f"Intent: {intent}")
+        assert "error" not in intent
+        assert intent == router.generate_intent("Write SQL to find top customers"), "Same prompt, same intent"
+
+        # Model calls report the configured usage
+        response = requests.post(f"{server.base_url}/chat/completions", json={
+            "model": "mock/specialist",
+            "messages": [{"role": "user", "content": "hi"}],
+            "max_tokens": 500
+        }, timeout=5).json()
+        assert response['usage']['completion_tokens'] == 20
+
+        # Injected errors
+        server.config.error_rate = 1.0
+        status = requests.post(f"{server.base_url}/chat/completions", json={"messages": []}, timeout=5).status_code
+        assert status == 500
+        print(f"Server stats: {server.config.stats}")
+    finally:
+        server.stop()
+
+    samples = [{"latency": 0.1 * (i + 1), "routed_to": "specialist", "stages": {"router": 0.01}, "error": None}
+               for i in range(10)]
+    report = summarize(samples, elapsed=2.0, target_qps=5)
+    print(f"Report: {report}")
+    assert report['throughput_qps'] == 5.0
+    assert report['latency']['p99'] == 1.0
+    assert "router" in report['stages'] and "total" not in report['stages']
+
+if __name__ == "__main__":
+    test_mock_nim()
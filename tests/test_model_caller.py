@@ -196,6 +196,37 @@ def test_token_limits():
     
     print(f"\n✅ TEST 7 PASSED")
 
+def test_generalist_streaming():
+    """Test 8: Streaming generalist call"""
+    print_separator("TEST 8: Streaming Generalist Call")
+    
+    caller = ModelCaller()
+    query = "List three facts about Mount Fuji"
+    print(f"Query: {query}")
+    print("-" * 70)
+    
+    chunks = []
+    final = None
+    for event in caller.stream_generalist(query, max_tokens=200):
+        if event['type'] == "chunk":
+            chunks.append(event['text'])
+            print(event['text'], end="", flush=True)
+        else:
+            final = event
+    
+    print(f"\n\n✅ Result:")
+    print(f"  Chunks: {len(chunks)}")
+    print(f"  TTFT: {final['ttft']}s")
+    print(f"  Latency: {final['latency']}s")
+    print(f"  Tokens: {final['tokens_used']}")
+    print(f"  Error: {final['error']}")
+    
+    assert final['error'] is None, "Stream should finish without error"
+    assert final['answer'] == "".join(chunks), "Final answer should be the joined chunks"
+    assert final['ttft'] <= final['latency'], "First token should arrive before the end"
+    
+    print(f"\n✅ TEST 8 PASSED")
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "="*70)
@@ -210,6 +241,7 @@ def run_all_tests():
         ("Error Handling", test_error_handling),
         ("Response Structure", test_response_structure),
         ("Token Limits", test_token_limits),
+        ("Streaming", test_generalist_streaming),
     ]
     
     results = []
@@ -266,6 +298,7 @@ if __name__ == "__main__":
             "5": test_error_handling,
             "6": test_response_structure,
             "7": test_token_limits,
+            "8": test_generalist_streaming,
         }
         
         if test_num in test_map:
@@ -0,0 +1,81 @@
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append('..')
+
+import core.memory_bank
+from core.memory_bank import MemoryBank
+from core.shared_memory_bank import SharedMemoryBank
+from core.quantization import QuantizedIndex
+from benchmarks import generators
+
+def test_quantization():
+    workdir = tempfile.mkdtemp()
+    matrix = generators.clustered_embeddings(5000)
+    queries = generators.nearby(matrix, 50, seed=1)
+
+    print("\n" + "="*60)
+    print("TESTING COMPRESSED INDEX")
+    print("="*60 + "\n")
+
+    for reduction, method in ((None, "int8"), ("pca", None), ("pca", "int8"), ("pca", "pq"), ("truncate", "int8")):
+        quantized = QuantizedIndex.build(matrix, reduction, 128, method, subvectors=16)
+        bank = MemoryBank.from_matrix(matrix, range(len(matrix)), os.path.join(workdir, "memory_bank.json"), quantized)
+        bank.rerank = 32
+        report = bank.measure_recall(queries)
+        print(f"{reduction or 'full'}/{method or 'float32'}: {quantized.nbytes / 1e6:.2f} MB "
+              f"(matrix {matrix.nbytes / 1e6:.2f} MB), recall {report['recall']:.2f}")
+        assert quantized.nbytes < matrix.nbytes / 2
+        assert report['recall'] >= 0.9, "Exact re-rank of the candidates recovers the flat result"
+        if reduction != "truncate":
+            assert report['recall'] >= 0.96
+
+    # Only the encoding is redone while the bank stays close to its fitted size
+    quantized = QuantizedIndex.build(matrix, "pca", 128, "pq", subvectors=16)
+    grown = QuantizedIndex.build(np.vstack([matrix, queries]), "pca", 128, "pq", subvectors=16, previous=quantized)
+    assert grown.codebooks is quantized.codebooks and grown.codes.shape == (16, len(matrix) + len(queries))
+
+    # ... and only for new rows when the unchanged ones are known
+    changed = np.vstack([matrix[:100], queries[:1], matrix[101:]])
+    reuse = np.arange(len(matrix))
+    reuse[100] = -1
+    for reduction, method in (("pca", "pq"), (None, "int8")):
+        quantized = QuantizedIndex.build(matrix, reduction, 128, method, subvectors=16)
+        full = QuantizedIndex.build(changed, reduction, 128, method, subvectors=16, previous=quantized)
+        partial = QuantizedIndex.build(changed, reduction, 128, method, subvectors=16, previous=quantized, reuse=reuse)
+        codes, old, new = (partial.codes, quantized.codes, full.codes) if method != "pq" else \
+            (partial.codes.T, quantized.codes.T, full.codes.T)
+        assert np.array_equal(codes[100], new[100]), "The new row is encoded"
+        assert np.array_equal(np.delete(codes, 100, axis=0), np.delete(old, 100, axis=0)), "The rest keep their codes"
+
+    # Subvectors must divide the reduced dimensions
+    try:
+        QuantizedIndex.build(matrix, "pca", 100, "pq", subvectors=16)
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+    # Configured banks build the index themselves, shared banks publish it with the generation
+    settings = {"INDEX_REDUCTION": "pca", "INDEX_DIMENSIONS": 16, "INDEX_QUANTIZATION": "pq",
+                "INDEX_PQ_SUBVECTORS": 4, "INDEX_MIN_SPECIALISTS": 100}
+    previous = {name: getattr(core.memory_bank, name) for name in settings}
+    try:
+        for name, value in settings.items():
+            setattr(core.memory_bank, name, value)
+        specialists = generators.specialists(300, clustered=True)
+        shared_file = os.path.join(workdir, "shared.json")
+        shared = SharedMemoryBank(bank_file=shared_file, shm_dir=os.path.join(workdir, "shm"))
+        shared.specialists = specialists
+    finally:
+        for name, value in previous.items():
+            setattr(core.memory_bank, name, value)
+
+    attached = SharedMemoryBank(bank_file=shared_file, shm_dir=os.path.join(workdir, "shm"))
+    quantized = attached._index[5]
+    assert quantized is not None and quantized.method == "pq" and quantized.codes.shape == (4, 300)
+    assert np.array_equal(quantized.codes, shared._index[5].codes)
+    assert attached.search(specialists[7]['embedding'])['specialist']['intent_label'] == "specialist_7"
+
+if __name__ == "__main__":
+    test_quantization()
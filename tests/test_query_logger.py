@@ -1,10 +1,14 @@
 import sys
+import os
+import time
+import tempfile
+from datetime import datetime
 sys.path.append('..')
 
 from core.query_logger import QueryLogger
 
 def test_query_logger():
-    logger = QueryLogger()
+    logger = QueryLogger(log_file=os.path.join(tempfile.mkdtemp(), "query_logs.json"))
     
     print("\n" + "="*60)
     print("TESTING QUERY LOGGER")
@@ -38,6 +42,34 @@ def test_query_logger():
             print(f"   - {b['intent_label']}: {b['count']} queries")
     else:
         print("❌ No bottlenecks found")
+    
+    print("\n" + "-"*60 + "\n")
+    
+    # Decayed rates: same lifetime count, very different traffic
+    print("Checking decayed rates (half-life 1h)...")
+    rate_logger = QueryLogger(log_file=os.path.join(tempfile.mkdtemp(), "query_logs.json"), half_life_hours=1.0)
+    for _ in range(5):
+        rate_logger.log_query("busy_intent", "Busy", "query")
+    now = time.time()
+    busy_rate = rate_logger.get_rate("busy_intent", now=now)
+    stale_rate = rate_logger.get_rate("busy_intent", now=now + 24 * 3600)
+    print(f"busy_intent now: {busy_rate:.2f} queries/hour")
+    print(f"busy_intent a day later: {stale_rate:.6f} queries/hour")
+    
+    assert abs(busy_rate - 5 / rate_logger.tau * 3600) < 0.01
+    assert stale_rate < 0.001, "Rate should decay away once traffic stops"
+    assert rate_logger.get_bottlenecks(min_rate=1.0)[0]['intent_label'] == "busy_intent"
+
+    # Replayed queries count at their own timestamps, in any order, not as "now"
+    day_ago = datetime.fromtimestamp(now - 24 * 3600).isoformat()
+    hour_ago = datetime.fromtimestamp(now - 3600).isoformat()
+    rate_logger.log_queries([("replayed_intent", "Replayed", "query", day_ago) for _ in range(50)])
+    replayed_rate = rate_logger.get_rate("replayed_intent", now=now)
+    print(f"replayed_intent (50 queries a day ago): {replayed_rate:.6f} queries/hour")
+    assert replayed_rate < 0.001
+    rate_logger.log_queries([("late_intent", "Late", "query", timestamp) for timestamp in (hour_ago, day_ago)])
+    rate_logger.log_queries([("ordered_intent", "Ordered", "query", timestamp) for timestamp in (day_ago, hour_ago)])
+    assert abs(rate_logger.get_rate("late_intent", now=now) - rate_logger.get_rate("ordered_intent", now=now)) < 1e-9
 
 if __name__ == "__main__":
     test_query_logger()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import sys
+import os
+import json
+import tempfile
+import numpy as np
+sys.path.append('..')
+
+from core.memory_bank import MemoryBank
+from core.query_logger import QueryLogger
+from core.replay import IntentCache, ReplayEngine, jsonl_records, query_log_records, main as replay_main
+from benchmarks import generators
+
+class TableEmbeddings:
+    """Stands in for EmbeddingService with precomputed vectors per text"""
+
+    def __init__(self, table):
+        self.table = table
+        self.batches = 0
+
+    def create_embeddings_batch(self, texts):
+        self.batches += 1
+        return [self.table[text] for text in texts]
+
+class CountingRouter:
+    """Stands in for IntentRouter"""
+
+    def __init__(self, intents):
+        self.intents = intents
+        self.calls = 0
+
+    def generate_intent(self, user_prompt):
+        self.calls += 1
+        return dict(self.intents[user_prompt], confidence=0.9)
+
+def test_replay():
+    workdir = tempfile.mkdtemp()
+    sql, japan, unrelated = generators.embeddings(3)
+    near_sql = generators.nearby(np.array([sql] * 8), 8, noise=0.5, seed=1)
+    far = generators.embeddings(6, seed=2)
+
+    print("\n" + "="*60)
+    print("TESTING QUERY REPLAY")
+    print("="*60 + "\n")
+
+    bank = MemoryBank(bank_file=os.path.join(workdir, "memory_bank.json"))
+    bank.add_specialist("sql", "SQL", "mock/sql", sql.tolist(), metadata={"intents": ["SQL Query"]})
+    bank.add_specialist("japan", "Japan", "mock/japan", japan.tolist())
+
+    # Logged traffic: SQL questions close to the specialist, other topics far from both
+    table = {}
+    query_logger = QueryLogger(log_file=os.path.join(workdir, "query_logs.json"))
+    for i in range(6):
+        table[f"sql description {i}"] = near_sql[i].tolist()
+        query_logger.log_query("SQL Query", f"sql description {i}", f"sql prompt {i}")
+    for i in range(4):
+        table[f"other description {i}"] = far[i].tolist()
+        query_logger.log_query("Other", f"other description {i}", f"other prompt {i}")
+
+    # Request files carry prompts only - the router classifies them once, then they come from the cache
+    requests_file = os.path.join(workdir, "requests.jsonl")
+    with open(requests_file, 'w') as f:
+        f.write(json.dumps({"prompt": "new sql prompt"}) + "\n")
+        f.write("\n" + json.dumps({"request_id": "r2", "title": "Unrelated", "body": "question"}) + "\n")
+    table["new sql description"] = near_sql[6].tolist()
+    table["unrelated description"] = far[4].tolist()
+    router = CountingRouter({
+        "new sql prompt": {"intent_label": "SQL Query", "description": "new sql description"},
+        "Unrelated\n\nquestion": {"intent_label": "Unrelated", "description": "unrelated description"}
+    })
+
+    def records():
+        return list(query_log_records(query_logger.get_all_logs())) + list(jsonl_records(requests_file))
+
+    embeddings = TableEmbeddings(table)
+    cache_file = os.path.join(workdir, "intents.json")
+    decisions_file = os.path.join(workdir, "decisions.jsonl")
+    engine = ReplayEngine(bank, embeddings, IntentCache(cache_file, router), batch_size=5)
+    report = engine.run(records(), decisions_file=decisions_file)
+    print(f"Replay: {report}")
+    assert report['queries'] == 12 and embeddings.batches == 3, "One embedding batch per 5 records"
+    assert report['intents'] == {"logged": 10, "cached": 2, "prompt": 0} and router.calls == 2
+    assert report['routed_to'] == {"specialist": 7, "generalist": 5}
+    assert report['by_specialist'] == {"sql": 7} and report['misroutes'] == 0
+    assert report['covered'] == 7 and report['covered_hit_rate'] == 1.0
+    assert report['hit_rate'] == round(7 / 12, 4) and report['baseline_hit_rate'] == 0
+    assert report['cost']['delta'] < 0, "Specialist calls are cheaper than the generalist"
+    with open(decisions_file) as f:
+        decisions = [json.loads(line) for line in f]
+    assert len(decisions) == 12 and decisions[0]['routed_to'] == "specialist"
+
+    # Cached intents need no router; a strict threshold sends everything to the generalist
+    bank.threshold = 0.99
+    strict = ReplayEngine(bank, embeddings, IntentCache(cache_file)).run(records())
+    assert strict['intents']['cached'] == 2 and strict['routed_to']['specialist'] == 0
+    assert strict['cost']['delta'] == 0
+
+    # Batch search matches query-by-query search, per-specialist thresholds included
+    bank.threshold = 0.35
+    bank.update_specialist("japan", threshold=0.2)
+    queries = np.vstack([near_sql, far, [np.zeros_like(sql)]])
+    batch = bank.closest_batch(queries)
+    assert batch[-1] is None
+    for match, query in zip(batch[:-1], queries):
+        expected = bank.closest(query)
+        assert match['specialist'] is expected['specialist'] and match['matched'] == expected['matched']
+        assert match['threshold'] == expected['threshold'] and abs(match['similarity'] - expected['similarity']) < 1e-5
+
+    # Trying another threshold overrides the calibrated ones too (in memory only)
+    bank.calibrated_thresholds = False
+    assert all(match['threshold'] == 0.35 for match in bank.closest_batch(queries[:-1]))
+    assert bank.closest(japan)['threshold'] == 0.35
+    assert MemoryBank(bank_file=bank.bank_file).closest(japan)['threshold'] == 0.2, "Nothing was written"
+    bank.calibrated_thresholds = True
+
+    # A wrong bank path is an error, not a new empty bank
+    missing = os.path.join(workdir, "missing.json")
+    argv = sys.argv
+    sys.argv = ["replay", "--bank", missing]
+    try:
+        replay_main()
+        assert False, "Expected SystemExit"
+    except SystemExit as e:
+        assert e.code == 2 and not os.path.exists(missing)
+    finally:
+        sys.argv = argv
+
+if __name__ == "__main__":
+    test_replay()
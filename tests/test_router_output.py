@@ -0,0 +1,85 @@
+import sys
+sys.path.append('..')
+
+from mock_nim import MockNIMConfig, MockNIMServer
+from core.router import IntentRouter, FALLBACK_INTENT_LABEL, parse_intent, structured_output_params
+
+def test_router_output():
+    print("\n" + "="*60)
+    print("TESTING ROUTER OUTPUT PARSING")
+    print("="*60 + "\n")
+
+    # Fences, prose, trailing commas, truncation and leading non-intent objects are tolerated
+    outputs = [
+        '```json\n{"intent_label": "SQL Queries", "description": "Top customers query.",}\n```',
+        'Sure! {"intent_label": " SQL Queries ", "description": "Top customers query."} Hope that helps.',
+        '{"note": {"x": 1}} {"intent_label": "SQL Queries", "description": "Top customers query."}',
+        '{"intent_label": "SQL Queries", "description": "Top customers query.',
+    ]
+    for output in outputs:
+        intent = parse_intent(output)
+        assert intent['intent_label'] == "SQL Queries" and intent['description'] == "Top customers query."
+    for output in ("This is about SQL.", '{"intent_label": "", "description": "x"}', None):
+        try:
+            parse_intent(output)
+            assert False, f"Expected ValueError for {output!r}"
+        except ValueError:
+            pass
+    assert structured_output_params("off") == {} and "nvext" in structured_output_params("guided_json")
+
+    server = MockNIMServer(MockNIMConfig(router_latency_ms=1, latency_sigma=0, malformed_rate=1.0, seed=3)).start()
+    prompts = [f"Question {i} about databases" for i in range(30)]
+    try:
+        def make_router(structured_output):
+            router = IntentRouter(structured_output=structured_output)
+            router.base_url = server.base_url
+            return router
+
+        # Constrained decoding: garbling model, every answer parses on the first call
+        router = make_router("json_schema")
+        assert all("error" not in router.generate_intent(prompt) for prompt in prompts)
+        status = router.get_status()
+        print(f"json_schema: {status}")
+        assert status['calls'] == 30 and status['parse_failures'] == 0 and status['wasted_call_rate'] == 0
+
+        # Unconstrained: half the answers are prose - one repair call each, fallback if that fails too
+        server.config.malformed_rate = 0.5
+        router = make_router("off")
+        intents = [router.generate_intent(prompt) for prompt in prompts]
+        status = router.get_status()
+        print(f"off: {status}")
+        fallbacks = [intent for intent in intents if intent.get('error')]
+        assert status['repaired'] > 0 and status['fallbacks'] == len(fallbacks) > 0
+        assert status['repairs'] == status['repaired'] + status['fallbacks']
+        assert status['calls'] == 30 + status['repairs']
+        assert status['parse_failures'] == status['wasted_calls'] == status['repairs'] + status['fallbacks']
+        assert all(intent['intent_label'] == FALLBACK_INTENT_LABEL for intent in fallbacks)
+        assert sum(intent.get('repaired', False) for intent in intents) == status['repaired']
+
+        # A 400 about the request itself (e.g. context length) keeps structured output on
+        server.config.malformed_rate = 0.0
+        server.config.error_rate, server.config.error_status = 1.0, 400
+        router = make_router("json_schema")
+        assert router.generate_intent(prompts[0]).get('error')
+        status = router.get_status()
+        assert status['calls'] == 1 and status['structured_output'] == "json_schema"
+
+        # So does a rejection naming the field when the plain retry fails too
+        server.config.structured_output = False
+        router = make_router("json_schema")
+        assert router.generate_intent(prompts[0]).get('error')
+        status = router.get_status()
+        assert status['calls'] == 2 and status['structured_output'] == "json_schema"
+        assert status['structured_unsupported'] == 0
+        server.config.error_rate = 0.0
+
+        # Endpoints without structured output are detected once, then sent plain requests
+        router = make_router("guided_json")
+        assert all("error" not in router.generate_intent(prompt) for prompt in prompts[:3])
+        status = router.get_status()
+        assert status['structured_unsupported'] == 1 and status['calls'] == 4 and status['structured_output'] is None
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    test_router_output()
@@ -0,0 +1,51 @@
+import sys
+import json
+sys.path.append('..')
+
+from mock_nim import MockNIMConfig, MockNIMServer, DEFAULT_INTENTS
+from core.router import IntentRouter, prompt_prefix
+from benchmarks.router_prompts import compare_modes, load_labeled
+
+def test_router_prompts():
+    server = MockNIMServer(MockNIMConfig(router_latency_ms=1, latency_sigma=0, prompt_tokens=None, seed=1)).start()
+
+    print("\n" + "="*60)
+    print("TESTING ROUTER PROMPT MODES")
+    print("="*60 + "\n")
+
+    # The prefix is byte-identical on every call, only the last message varies
+    for mode in ("full", "compact"):
+        assert json.dumps(prompt_prefix(mode)) == json.dumps(prompt_prefix(mode))
+        assert prompt_prefix(mode)[0]['role'] == "system" and prompt_prefix(mode)[-1]['role'] != "user"
+    try:
+        prompt_prefix("tiny")
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+    def make_router(mode):
+        router = IntentRouter(prompt_mode=mode)
+        router.base_url = server.base_url
+        return router
+
+    try:
+        intent = make_router("compact").generate_intent("Write SQL to find top customers")
+        print(f"Compact intent: {intent}")
+        assert "error" not in intent and intent['prompt_tokens'] > 0 and intent['completion_tokens'] > 0
+
+        # The mock labels by prompt, so both modes agree and accept every mock label
+        labeled = [dict(item, labels=[label for label, _ in DEFAULT_INTENTS]) for item in load_labeled()]
+        report = compare_modes(labeled, ("full", "compact"), make_router)
+        print(f"Report: {report}")
+    finally:
+        server.stop()
+
+    full, compact = report['full'], report['compact']
+    assert full['queries'] == compact['queries'] == len(labeled)
+    assert full['accuracy'] == compact['accuracy'] == 1.0 and compact['agreement'] == 1.0
+    assert compact['prompt_tokens'] < full['prompt_tokens'] / 2
+    assert compact['saved_tokens_per_query'] == round(full['prompt_tokens'] - compact['prompt_tokens'], 1)
+    assert full['saved_tokens_per_query'] == 0 and compact['saved_cost_per_1k_queries'] > 0
+
+if __name__ == "__main__":
+    test_router_prompts()
@@ -0,0 +1,102 @@
+import sys
+import json
+import asyncio
+import threading
+import time
+sys.path.append('..')
+
+from server import AgentApp
+from core.tenants import UnknownTenantError
+
+class KnownTenants:
+    """Stands in for TenantRegistry"""
+
+    def get(self, tenant_id=None):
+        if tenant_id not in (None, "acme"):
+            raise UnknownTenantError(f"Unknown tenant: {tenant_id!r}")
+
+class EchoAgent:
+    """Stands in for NemotronMetaAgent so the HTTP layer can be tested on its own"""
+
+    tenants = KnownTenants()
+
+    def process_query(self, user_prompt, tenant_id=None):
+        return {"answer": user_prompt.upper(), "metadata": {"routed_to": "generalist", "tenant": tenant_id}}
+
+    def process_query_stream(self, user_prompt, tenant_id=None):
+        for word in user_prompt.split():
+            yield {"type": "chunk", "text": word}
+        yield {"type": "result", "answer": user_prompt}
+
+class EndlessAgent:
+    """Streams until it is closed, and says when that happened"""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def process_query_stream(self, user_prompt, tenant_id=None):
+        try:
+            while True:
+                time.sleep(0.01)
+                yield {"type": "chunk", "text": "more"}
+        finally:
+            self.closed.set()
+
+def request(app, method, path, body=None, disconnect=False):
+    """Drive one ASGI request and collect the response (disconnect: the client leaves after sending)"""
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect:
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({"type": "http", "method": method, "path": path}, receive, send))
+    body = b"".join(m.get('body', b"") for m in sent if m['type'] == "http.response.body")
+    return sent[0]['status'], body
+
+def test_server():
+    app = AgentApp(EchoAgent(), max_concurrency=2)
+
+    print("\n" + "="*60)
+    print("TESTING SERVER")
+    print("="*60 + "\n")
+
+    status, body = request(app, "POST", "/query", {"prompt": "hello there"})
+    print(f"/query: {status} {body}")
+    assert status == 200 and json.loads(body)['answer'] == "HELLO THERE"
+
+    status, body = request(app, "POST", "/query/stream", {"prompt": "hello there"})
+    events = [line[6:] for line in body.decode().split("\n\n") if line.startswith("data: ")]
+    print(f"/query/stream: {events}")
+    assert json.loads(events[0]) == {"type": "chunk", "text": "hello"}
+    assert events[-1] == "[DONE]"
+
+    status, body = request(app, "POST", "/query", {"prompt": "hi", "tenant": "acme"})
+    assert status == 200 and json.loads(body)['metadata']['tenant'] == "acme"
+    status, _ = request(app, "POST", "/query", {"prompt": "hi", "tenant": "../etc"})
+    assert status == 400
+    status, _ = request(app, "POST", "/query/stream", {"prompt": "hi", "tenant": "randomclient123"})
+    assert status == 404
+
+    status, _ = request(app, "POST", "/query", {"wrong": 1})
+    assert status == 400
+    status, _ = request(app, "GET", "/nope")
+    assert status == 404
+
+    # A client leaving mid-stream closes the agent's generator (its finally blocks settle the call)
+    endless = EndlessAgent()
+    status, body = request(AgentApp(endless, max_concurrency=2), "POST", "/query/stream", {"prompt": "hi"},
+                           disconnect=True)
+    assert status == 200 and b"[DONE]" not in body
+    assert endless.closed.wait(timeout=2), "Stream generator was not closed after the disconnect"
+
+if __name__ == "__main__":
+    test_server()
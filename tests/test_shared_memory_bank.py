@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+import tempfile
+import multiprocessing
+sys.path.append('..')
+
+from core.shared_memory_bank import SharedMemoryBank
+from benchmarks import generators
+
+def _add_from_other_process(bank_file, shm_dir, embedding):
+    bank = SharedMemoryBank(bank_file=bank_file, shm_dir=shm_dir)
+    bank.add_specialist("sql_help", "SQL specialist", "mock/sql", embedding)
+
+def test_shared_memory_bank():
+    workdir = tempfile.mkdtemp()
+    bank_file = os.path.join(workdir, "memory_bank.json")
+    shm_dir = os.path.join(workdir, "shm")
+    vectors = generators.embeddings(3).tolist()
+
+    print("\n" + "="*60)
+    print("TESTING SHARED MEMORY BANK")
+    print("="*60 + "\n")
+
+    reader = SharedMemoryBank(bank_file=bank_file, shm_dir=shm_dir)
+    assert reader.search(vectors[0]) is None
+    reader.add_specialist("japan_travel", "Japan specialist", "mock/japan", vectors[0])
+
+    # A writer in another process publishes a new generation
+    process = multiprocessing.get_context("spawn").Process(
+        target=_add_from_other_process, args=(bank_file, shm_dir, vectors[1])
+    )
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    result = reader.search(vectors[1])
+    print(f"Generation {reader.version}: {result['specialist']['intent_label']} ({result['similarity']:.3f})")
+    assert result['specialist']['intent_label'] == "sql_help", "Reader should see the other process's add"
+    assert [s['intent_label'] for s in reader.get_all_specialists()] == ["japan_travel", "sql_help"]
+
+    # A new process attaches to the published generation, and the bank file has both
+    late = SharedMemoryBank(bank_file=bank_file, shm_dir=shm_dir)
+    assert late.version == reader.version and len(late.specialists) == 2
+    with open(bank_file) as f:
+        assert len(json.load(f)['specialists'][1]['embedding']) == len(vectors[1]), "Embeddings persist to the bank file"
+
+if __name__ == "__main__":
+    test_shared_memory_bank()
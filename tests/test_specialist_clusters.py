@@ -0,0 +1,78 @@
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append('..')
+
+import core.memory_bank
+from core.memory_bank import MemoryBank
+from core.shared_memory_bank import SharedMemoryBank
+from core.specialist_clusters import kmeans
+from benchmarks import generators
+
+def test_specialist_clusters():
+    workdir = tempfile.mkdtemp()
+    min_specialists = core.memory_bank.HIERARCHICAL_MIN_SPECIALISTS
+    core.memory_bank.HIERARCHICAL_MIN_SPECIALISTS = 100  # cluster small test banks
+    try:
+        check_hierarchical_routing(workdir)
+    finally:
+        core.memory_bank.HIERARCHICAL_MIN_SPECIALISTS = min_specialists
+
+def check_hierarchical_routing(workdir):
+    print("\n" + "="*60)
+    print("TESTING HIERARCHICAL ROUTING")
+    print("="*60 + "\n")
+
+    # k-means recovers well separated groups
+    vectors = generators.clustered_embeddings(300, topics=3, spread=0.2)
+    centroids, labels = kmeans(vectors, 3)
+    assert len(set(labels)) == 3 and centroids.shape == (3, generators.DIMENSIONS)
+
+    # Labels always belong to the centroids returned, even when iterations run out before convergence
+    spread = generators.embeddings(500)
+    for iterations in (1, 2):
+        centroids, labels = kmeans(spread, 16, iterations=iterations)
+        assert (labels == np.argmax(spread @ centroids.T, axis=1)).all()
+
+    # Small banks stay flat
+    bank = MemoryBank(bank_file=os.path.join(workdir, "memory_bank.json"))
+    bank.specialists = generators.specialists(50, clustered=True)
+    assert bank._index[2] is None
+
+    # Large enough banks are clustered, and two-level search matches the flat scan
+    specialists = generators.specialists(400, clustered=True)
+    bank.specialists = specialists
+    clusters = bank._index[2]
+    queries = generators.nearby(bank._index[1], 100, seed=1)
+    recall = bank.measure_recall(queries)
+    print(f"400 specialists: {recall}")
+    assert recall['clusters'] == 20 and recall['recall'] >= 0.95 and recall['candidates'] < 0.5
+
+    # ... and can still be searched flat
+    bank.hierarchical = False
+    assert bank.measure_recall(queries) == {"recall": 1.0, "candidates": 1.0, "clusters": 0, "index_mb": 0}
+    assert [r['specialist']['intent_label'] for r in bank.closest_batch(queries[:5])] == \
+        [bank.closest(query)['specialist']['intent_label'] for query in queries[:5]]
+    bank.hierarchical = True
+
+    # Adding re-clusters incrementally (same k, new row assigned) ...
+    extra = generators.specialists(450, clustered=True, seed=7)[400:]
+    bank.add_specialist("new_intent", "New", "mock/new", extra[0]['embedding'])
+    assert bank._index[2] is not clusters and bank._index[2].clustered_size == 400
+    assert len(bank._index[2].labels) == 401
+    assert bank.search(extra[0]['embedding'])['specialist']['intent_label'] == "new_intent"
+
+    # ... until the bank grew past RECLUSTER_GROWTH, then k-means runs again
+    bank.specialists = bank.specialists + [dict(spec, intent_label=f"extra_{i}") for i, spec in enumerate(extra[1:])]
+    assert bank._index[2].clustered_size == 450
+
+    # Clusters are published with shared generations
+    shared = SharedMemoryBank(bank_file=os.path.join(workdir, "shared_bank.json"), shm_dir=os.path.join(workdir, "shm"))
+    shared.specialists = specialists
+    attached = SharedMemoryBank(bank_file=os.path.join(workdir, "shared_bank.json"), shm_dir=os.path.join(workdir, "shm"))
+    assert attached._index[2] is not None and len(attached._index[2].centroids) == 20
+    assert attached.search(specialists[5]['embedding'])['specialist']['intent_label'] == "specialist_5"
+
+if __name__ == "__main__":
+    test_specialist_clusters()
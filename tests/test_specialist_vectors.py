@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append('..')
+
+from core.memory_bank import MemoryBank
+from core.query_logger import QueryLogger
+from core.specialist_vectors import evaluate, refresh_vectors, representatives
+from benchmarks import generators
+
+class TableEmbeddings:
+    """Stands in for EmbeddingService with precomputed vectors per text"""
+
+    def __init__(self, table):
+        self.table = table
+        self.batches = 0
+
+    def create_embeddings_batch(self, texts):
+        self.batches += 1
+        self.embedded = len(texts)
+        return [self.table[text] for text in texts]
+
+def unit(vector):
+    return vector / np.linalg.norm(vector)
+
+def test_specialist_vectors():
+    workdir = tempfile.mkdtemp()
+    rng = np.random.default_rng(0)
+    description, other, style_a, style_b = generators.embeddings(4)
+
+    print("\n" + "="*60)
+    print("TESTING MULTI-VECTOR SPECIALISTS")
+    print("="*60 + "\n")
+
+    # Short intents come in two phrasings that sit below the threshold against the long description
+    table = {}
+    query_logger = QueryLogger(log_file=os.path.join(workdir, "query_logs.json"))
+    for i in range(40):
+        style = style_a if i % 2 else style_b
+        noise = 0.3 * rng.standard_normal(len(description)) / np.sqrt(len(description))
+        vector = unit(0.25 * description + style + noise)
+        text = f"Phrasing {i % 2} of a japan question ({i})"
+        table[text] = vector.tolist()
+        query_logger.log_query("japan_travel", text, f"prompt {i}")
+
+    bank = MemoryBank(bank_file=os.path.join(workdir, "memory_bank.json"))
+    bank.add_specialist("japan_travel", "Long description", "mock/japan", description.tolist())
+    bank.add_specialist("other", "Unrelated", "mock/other", other.tolist())
+    embedding_service = TableEmbeddings(table)
+
+    report = evaluate(bank, query_logger, embedding_service, k=4)
+    print(f"Held-out routing: {report}")
+    assert report['before']['hit_rate'] < 0.2 and report['after']['hit_rate'] > 0.9
+    assert report['after']['misroute_rate'] == 0
+    assert embedding_service.batches == 1, "All logged queries are embedded in one batch"
+
+    # Medoids are actual query vectors
+    vectors = list(table.values())
+    picked = representatives(vectors, k=4)
+    assert len(picked) == 4 and all(vector in vectors for vector in picked)
+
+    # Stored vectors: one contiguous matrix, max-sim per specialist
+    stored = refresh_vectors(bank, query_logger, embedding_service, k=4)
+    assert stored == {"japan_travel": 4}
+    assert bank._index[1].shape[0] == 6 and list(bank._index[3]) == [0, 0, 0, 0, 0, 1]
+    result = bank.search(vectors[0])
+    print(f"Query routed to {result['specialist']['intent_label']} ({result['similarity']:.3f})")
+    assert result['specialist']['intent_label'] == "japan_travel"
+
+    reloaded = MemoryBank(bank_file=os.path.join(workdir, "memory_bank.json"))
+    assert len(reloaded.specialists[0]['vectors']) == 4
+    assert reloaded.search(other.tolist())['specialist']['intent_label'] == "other"
+
+    # Large logs are sampled before embedding; all specialists are stored with one write
+    for i in range(40):
+        text = f"Other question {i}"
+        table[text] = unit(other + 0.1 * rng.standard_normal(len(other))).tolist()
+        query_logger.log_query("other", text, f"other prompt {i}")
+    saves = []
+    save = bank.save
+    bank.save = lambda: saves.append(1) or save()
+    stored = refresh_vectors(bank, query_logger, embedding_service, k=4, sample_size=10)
+    print(f"Sampled refresh: {stored}, {embedding_service.embedded} embedded, {len(saves)} write(s)")
+    assert stored == {"japan_travel": 4, "other": 4} and embedding_service.embedded == 20 and len(saves) == 1
+    assert bank._index[1].shape[0] == 10
+    picked = representatives(vectors, k=4, sample_size=10)
+    assert len(picked) == 4 and all(vector in vectors for vector in picked)
+
+if __name__ == "__main__":
+    test_specialist_vectors()
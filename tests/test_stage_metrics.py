@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+sys.path.append('..')
+
+from core.stage_metrics import StageTimer, StageMetrics, percentile, worker_textfile
+
+def test_stage_metrics():
+    textfile = os.path.join(tempfile.mkdtemp(), "findingnemo.prom")
+    metrics = StageMetrics(textfile=textfile, flush_interval=0)
+
+    print("\n" + "="*60)
+    print("TESTING STAGE METRICS")
+    print("="*60 + "\n")
+
+    forwarded = []
+    metrics.add_sink(lambda timings, labels: forwarded.append(labels['routed_to']))
+
+    for i in range(20):
+        timer = StageTimer()
+        with timer.stage("router"):
+            time.sleep(0.001)
+        with timer.stage("model"):
+            time.sleep(0.005 if i < 19 else 0.05)
+        metrics.observe(timer.timings, {"routed_to": "generalist"})
+
+    summary = metrics.summary()
+    for stage, stats in summary.items():
+        print(f"{stage}: {stats}")
+
+    assert set(summary) == {"router", "model"}
+    assert summary['model']['p50'] < summary['model']['p99'], "Slow outlier should show in the tail"
+    assert summary['model']['p50'] > summary['router']['p50'], "Model stage should dominate"
+    assert len(forwarded) == 20, "Every observation goes to extra sinks"
+
+    with open(textfile) as f:
+        exposition = f.read()
+    print("\n" + exposition.splitlines()[2])
+    assert 'findingnemo_stage_latency_seconds_count{stage="model"} 20' in exposition
+    assert 'findingnemo_requests_total{routed_to="generalist"} 20' in exposition
+
+    # Workers writing the same file at once each use their own temp file
+    others = [StageMetrics(textfile=textfile, flush_interval=0) for _ in range(8)]
+    errors = []
+    def write(m):
+        try:
+            for _ in range(50):
+                m.write_textfile()
+        except OSError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=write, args=(m,)) for m in others]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and os.listdir(os.path.dirname(textfile)) == ["findingnemo.prom"]
+
+    # Forked workers each write their own file, labelled so the collector can add them up
+    workers = [StageMetrics(textfile=textfile, flush_interval=0, worker=pid) for pid in (101, 102)]
+    for worker in workers:
+        worker.observe({"model": 0.01}, {"routed_to": "specialist"})
+    assert sorted(os.listdir(os.path.dirname(textfile))) == ["findingnemo.101.prom", "findingnemo.102.prom",
+                                                              "findingnemo.prom"]
+    with open(worker_textfile(textfile, 102)) as f:
+        assert 'findingnemo_requests_total{routed_to="specialist",worker="102"} 1' in f.read()
+
+    # An unwritable text file is logged, the request goes on
+    broken = StageMetrics(textfile=os.path.join(textfile, "missing", "findingnemo.prom"), flush_interval=0)
+    broken.observe({"model": 0.01}, {"routed_to": "generalist"})
+    assert broken.summary()['model']['count'] == 1
+
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2 and percentile(range(101), 95) == 95
+
+if __name__ == "__main__":
+    test_stage_metrics()
@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.append('..')
+
+from core.storage import JsonStore, StorageError
+from core.query_logger import QueryLogger
+
+def test_storage():
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "store.json")
+    store = JsonStore(path, fsync=True, backup=True)
+
+    print("\n" + "="*60)
+    print("TESTING STORAGE")
+    print("="*60 + "\n")
+
+    assert store.read(default={}) == {}
+    store.write({"a": 1})
+    store.write({"a": 2})
+    assert store.read() == {"a": 2}
+    assert not store.modified()
+    assert not [f for f in os.listdir(workdir) if f.startswith(".")], "No temp files left behind"
+
+    # Legacy comment header
+    with open(path, 'w') as f:
+        f.write('///threshold is 5\n{"a": 3}')
+    assert store.modified(), "External writes are detected"
+    assert store.read() == {"a": 3}, "Comment header is skipped, external edit accepted"
+
+    # Torn write falls back to the previous snapshot
+    store.write({"a": 4})
+    with open(path, 'w') as f:
+        f.write('{"a": ')
+    recovered = store.read()
+    print(f"Recovered after torn write: {recovered}")
+    assert recovered == {"a": 3}
+
+    # Corrupt file and corrupt backup is an error, not a silent reset
+    store.write({"a": 5})
+    store.write({"a": 6})
+    with open(path, 'w') as f:
+        f.write('{"a": ')
+    with open(f"{path}.bak", 'w') as f:
+        f.write('{"a": 99}')
+    try:
+        store.read()
+        assert False, "Backup failing its checksum should raise"
+    except StorageError as e:
+        print(f"StorageError: {e}")
+
+    # By default a write is one temp file renamed over the target, nothing else
+    plain_path = os.path.join(workdir, "plain", "store.json")
+    plain = JsonStore(plain_path)
+    plain.write({"a": 1})
+    plain.write({"a": 2})
+    assert plain.read() == {"a": 2} and os.listdir(os.path.dirname(plain_path)) == ["store.json"]
+
+    # Two loggers on one file (as two worker processes would be) don't lose each other's queries
+    log_file = os.path.join(workdir, "query_logs.json")
+    first, second = QueryLogger(log_file=log_file), QueryLogger(log_file=log_file)
+    first.log_query("sql", "SQL help", "q1")
+    second.log_query("sql", "SQL help", "q2")
+    first.log_query("sql", "SQL help", "q3")
+    with open(log_file) as f:
+        on_disk = json.load(f)
+    print(f"Count on disk: {on_disk['sql']['count']}")
+    assert on_disk['sql']['count'] == 3
+
+if __name__ == "__main__":
+    test_storage()
@@ -0,0 +1,135 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+sys.path.append('..')
+
+from core.tenants import (TenantRegistry, TenantUsage, UnknownTenantError, open_tenant, validate_tenant_id,
+                          DEFAULT_TENANT)
+from benchmarks import generators
+
+def write_tenant(tenants_dir, tenant_id, specialists, settings=None):
+    tenant_dir = os.path.join(tenants_dir, tenant_id)
+    os.makedirs(tenant_dir)
+    with open(os.path.join(tenant_dir, "memory_bank.json"), 'w') as f:
+        json.dump({"specialists": specialists}, f)
+    if settings:
+        with open(os.path.join(tenant_dir, "settings.json"), 'w') as f:
+            json.dump(settings, f)
+
+def test_tenants():
+    tenants_dir = tempfile.mkdtemp()
+    specialists = generators.specialists(4)
+    write_tenant(tenants_dir, "acme", specialists[:2], {"query_threshold": 10, "similarity_threshold": 0.9})
+    write_tenant(tenants_dir, "globex", specialists[2:])
+
+    print("\n" + "="*60)
+    print("TESTING TENANTS")
+    print("="*60 + "\n")
+
+    opened = []
+    def factory(tenant_id):
+        opened.append(tenant_id)
+        return open_tenant(tenant_id, tenants_dir=tenants_dir)
+
+    # Unknown tenants are rejected; allowlisted ones open without writing anything
+    try:
+        open_tenant("randomclient123", tenants_dir=tenants_dir)
+        assert False, "Expected UnknownTenantError"
+    except UnknownTenantError:
+        pass
+    default = open_tenant("base", tenants_dir=tenants_dir, allowlist=["base"])
+    default.tenant_id = DEFAULT_TENANT
+    assert sorted(os.listdir(tenants_dir)) == ["acme", "globex"], "Nothing created on read"
+    registry = TenantRegistry(factory, default, max_loaded=1, max_specialists=100)
+
+    # Lazy load, cached on the second call
+    acme = registry.get("acme")
+    assert registry.get("acme") is acme and opened == ["acme"]
+    assert registry.get() is default and registry.get(DEFAULT_TENANT) is default
+
+    # Per-tenant settings
+    assert acme.decision_engine.threshold == 10 and acme.memory_bank.threshold == 0.9
+    print(f"acme thresholds: query {acme.decision_engine.threshold}, similarity {acme.memory_bank.threshold}")
+
+    # No cross-tenant matches: globex's specialist is invisible to acme
+    globex_embedding = specialists[2]['embedding']
+    assert acme.memory_bank.search(globex_embedding) is None
+    globex = registry.get("globex")
+    assert globex.memory_bank.search(globex_embedding)['specialist']['intent_label'] == "specialist_2"
+    assert globex.job_key("sql") == "globex:sql" and default.job_key("sql") == "sql"
+
+    # max_loaded=1: loading globex evicted acme, the default stays pinned
+    print(f"Loaded after globex: {list(registry.loaded)}")
+    assert list(registry.loaded) == ["globex"] and registry.evictions == 1
+    assert registry.get("acme") is not acme and opened == ["acme", "globex", "acme"]
+
+    # Memory limit: two 2-specialist tenants don't fit in 3
+    registry.max_loaded = 10
+    registry.max_specialists = 3
+    registry.get("globex")
+    assert list(registry.loaded) == ["globex"]
+
+    # Usage is per tenant and survives eviction
+    registry.record(globex, "generalist", {"prompt_tokens": 1000, "completion_tokens": 1000, "tokens_used": 2000})
+    registry.record(globex, "specialist", {"prompt_tokens": 1000, "completion_tokens": 1000, "tokens_used": 2000})
+    registry.get("acme")
+    usage = registry.get_status()['usage']
+    print(f"Usage: {usage}")
+    assert usage['globex']['requests'] == 2 and usage['globex']['tokens'] == 4000
+    assert abs(usage['globex']['cost'] - (0.0024 + 0.00126)) < 1e-9
+    assert usage['globex']['qps'] > 0 and usage['acme']['requests'] == 0
+
+    # A request holding an evicted tenant still gets its log written
+    evicted = open_tenant("globex", tenants_dir=tenants_dir)
+    evicted.close()
+    evicted.submit("sql", "SQL questions", "Logged after eviction")
+    evicted.submit_batch([("sql", "SQL questions", "Batch after eviction")])
+    assert open_tenant("globex", tenants_dir=tenants_dir).query_logger.get_count("sql") == 2
+
+    # A cold load doesn't hold up lookups of other tenants
+    started, release = threading.Event(), threading.Event()
+    def slow_factory(tenant_id):
+        if tenant_id == "globex":
+            started.set()
+            release.wait(5)
+        return open_tenant(tenant_id, tenants_dir=tenants_dir)
+    slow = TenantRegistry(slow_factory, default)
+    acme_loaded = slow.get("acme")
+    loads = [threading.Thread(target=slow.get, args=("globex",)) for _ in range(2)]
+    for thread in loads:
+        thread.start()
+    started.wait(5)
+    assert slow.get("acme") is acme_loaded, "Not blocked by the globex load"
+    release.set()
+    for thread in loads:
+        thread.join()
+    assert list(slow.loaded) == ["acme", "globex"]
+    try:
+        slow.get("randomclient123")
+        assert False, "Expected UnknownTenantError"
+    except UnknownTenantError:
+        pass
+    assert not os.path.exists(os.path.join(tenants_dir, "randomclient123")) and not slow._loading
+    slow.close()
+
+    window = TenantUsage(window=10)
+    for _ in range(5):
+        window.record("specialist", {})
+    assert window.qps() == 0.5
+
+    # Tenant ids become paths
+    for bad in ("../etc", "a/b", "", ".hidden", None):
+        try:
+            validate_tenant_id(bad)
+            assert False, f"{bad!r} accepted"
+        except ValueError:
+            pass
+
+    registry.close()
+    default.close()
+    assert not registry.loaded
+
+if __name__ == "__main__":
+    test_tenants()
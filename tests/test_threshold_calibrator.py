@@ -0,0 +1,142 @@
+import sys
+import os
+import json
+import random
+import tempfile
+sys.path.append('..')
+
+from core.memory_bank import MemoryBank, thresholds_file
+from core.shared_memory_bank import SharedMemoryBank
+from core.threshold_calibrator import ThresholdCalibrator, calibrate
+from benchmarks import generators
+
+def test_threshold_calibrator():
+    workdir = tempfile.mkdtemp()
+    rng = random.Random(0)
+
+    print("\n" + "="*60)
+    print("TESTING THRESHOLD CALIBRATION")
+    print("="*60 + "\n")
+
+    # Cut between accepted (high similarity) and fallback (low) outcomes
+    samples = [(rng.uniform(0.5, 0.7), True) for _ in range(50)] + [(rng.uniform(0.3, 0.48), False) for _ in range(50)]
+    threshold = calibrate(samples)
+    print(f"Separable outcomes: threshold {threshold:.3f}")
+    assert 0.48 < threshold <= 0.5 + 0.02
+    assert calibrate([(0.3, True), (0.4, True)]) == 0.3, "All accepted - as low as observed"
+    assert calibrate([(0.5, False), (0.6, False)]) is None, "No cut scores - no direction"
+    assert calibrate([(0.5, False), (0.6, False)], current=0.4) == 0.4, "No cut scores - threshold stays"
+    assert abs(calibrate(samples, current=0.35) - 0.4) < 1e-9, "One recalibration moves at most THRESHOLD_MAX_STEP"
+    assert calibrate([]) is None and calibrate([], current=0.4) == 0.4
+
+    # Online: a broad specialist whose low-similarity calls keep falling back gets stricter
+    broad, narrow, query = generators.embeddings(3).tolist()
+    bank = MemoryBank(bank_file=os.path.join(workdir, "memory_bank.json"))
+    bank.add_specialist("broad", "Broad", "mock/broad", broad)
+    bank.add_specialist("narrow", "Narrow", "mock/narrow", narrow)
+    calibrator = ThresholdCalibrator(bank, explore_rate=0)
+    threshold = lambda: bank.specialists[0].get('threshold', bank.threshold)
+
+    def route(similarity, accepted, transport_error=False):
+        calibrator.record({"specialist": {"intent_label": "broad"}, "similarity": similarity,
+                           "threshold": threshold()}, accepted, transport_error)
+        calibrator.flush()
+
+    for similarity, accepted in samples:
+        route(similarity, accepted)
+    record = bank.specialists[0]
+    print(f"Stored: threshold {record['threshold']}, calibration {record['calibration']}")
+    assert 0.48 < record['threshold'] <= 0.52 and record['calibration']['samples'] >= 50
+    assert calibrator.get_status()['broad']['fallback_rate'] == 0.5
+    assert MemoryBank(bank_file=bank.bank_file).specialists[0]['threshold'] == record['threshold']
+
+    # Thresholds go to their own file: the index and the bank file are left alone
+    matrix, bank_stamp = bank._index[1], bank.store.stamp
+    bank.update_specialist("narrow", threshold=0.3)
+    assert bank._index[1] is matrix and bank.store.stamp == bank_stamp and not bank.store.modified()
+    assert bank.closest(narrow)['threshold'] == 0.3
+    with open(thresholds_file(bank.bank_file)) as f:
+        assert json.load(f)['narrow'] == {"threshold": 0.3}
+    other = MemoryBank(bank_file=bank.bank_file)
+    other.update_specialist("narrow", threshold=0.35)
+    assert bank.reload_if_changed() and bank._index[1] is matrix and bank.closest(narrow)['threshold'] == 0.35
+
+    # An outage (timeouts, 5xx) says nothing about the matches - nothing is recorded, nothing moves
+    calibrated = threshold()
+    for _ in range(60):
+        route(rng.uniform(0.5, 0.7), False, transport_error=True)
+    assert threshold() == calibrated and calibrator.get_status()['broad']['fallback_rate'] == 0.5
+
+    # A burst of real fallbacks at the top raises it step by step, never straight to THRESHOLD_MAX;
+    # once the specialist answers again it comes back down
+    thresholds = []
+    for _ in range(30):
+        route(rng.uniform(0.5, 0.7), False)
+        thresholds.append(threshold())
+    steps = [b - a for a, b in zip([calibrated] + thresholds, thresholds)]
+    print(f"Fallback burst: {calibrated} -> {thresholds[-1]}")
+    assert max(steps) <= 0.05 + 1e-9 and thresholds[-1] < 0.8
+    for _ in range(200):
+        route(rng.uniform(0.45, 0.7), True)
+    print(f"Recovered: {threshold()}")
+    assert threshold() <= calibrated
+
+    # A healthy specialist answers everything it is sent, near misses from other intents included -
+    # the router's intent, not the answer, decides whether a match was right, and the threshold holds
+    healthy_bank = MemoryBank(bank_file=os.path.join(workdir, "healthy.json"))
+    healthy_bank.add_specialist("sql", "SQL", "mock/sql", broad)
+    healthy_bank.add_specialist("travel", "Travel", "mock/travel", narrow, metadata={"intents": ["japan_travel"]})
+    healthy = ThresholdCalibrator(healthy_bank, explore_rate=0.5, seed=0)
+    specialist = lambda label: next(s for s in healthy_bank.specialists if s['intent_label'] == label)
+
+    def serve(label, similarity, intent_label):
+        record = specialist(label)
+        candidate = {"specialist": record, "similarity": similarity,
+                     "threshold": record.get('threshold', healthy_bank.threshold)}
+        if similarity < candidate['threshold']:
+            if not healthy.explore(candidate):
+                return
+            candidate['explored'] = True
+        healthy.record(candidate, True, intent_label=intent_label)
+        healthy.flush()
+
+    for _ in range(3000):
+        if rng.random() < 0.6:
+            serve("sql", rng.uniform(0.4, 0.9), "sql")
+        else:
+            serve("sql", rng.uniform(0.15, 0.38), rng.choice(["travel", "weather"]))
+    sql_threshold = specialist("sql")['threshold']
+    print(f"Healthy specialist: 0.35 -> {sql_threshold}")
+    assert 0.33 <= sql_threshold <= 0.42
+
+    # Explored near misses the specialist does serve bring a too-strict threshold down
+    healthy_bank.update_specialist("travel", threshold=0.7)
+    for _ in range(3000):
+        serve("travel", rng.uniform(0.45, 0.95), rng.choice(["travel", "japan_travel"]))
+    print(f"Too strict: 0.7 -> {specialist('travel')['threshold']}")
+    assert specialist('travel')['threshold'] < 0.6
+
+    # Each specialist is held to its own threshold
+    bank.update_specialist("broad", threshold=calibrated)
+    bank.update_specialist("narrow", threshold=0.2)
+    blend = [0.4 * b + 0.3 * n + 0.75 * q for b, n, q in zip(broad, narrow, query)]  # broad 0.44, narrow 0.33
+    candidate = bank.closest(blend)
+    print(f"Blend query: {candidate['specialist']['intent_label']} ({candidate['similarity']:.3f} >= {candidate['threshold']})")
+    assert candidate['specialist']['intent_label'] == "narrow" and candidate['matched']
+    assert bank.search(query) is None and not bank.closest(query)['matched']
+
+    # Near misses are explored, far misses never
+    explorer = ThresholdCalibrator(bank, explore_rate=1.0, explore_margin=0.05)
+    assert explorer.explore({"similarity": 0.32, "threshold": 0.35})
+    assert not explorer.explore({"similarity": 0.25, "threshold": 0.35})
+
+    # Shared banks publish the thresholds with the generation
+    shared_file = os.path.join(workdir, "shared.json")
+    shared = SharedMemoryBank(bank_file=shared_file, shm_dir=os.path.join(workdir, "shm"))
+    shared.add_specialist("narrow", "Narrow", "mock/narrow", narrow)
+    shared.update_specialist("narrow", threshold=0.9)
+    attached = SharedMemoryBank(bank_file=shared_file, shm_dir=os.path.join(workdir, "shm"))
+    assert attached.closest(narrow)['threshold'] == 0.9 and attached.search(narrow)
+
+if __name__ == "__main__":
+    test_threshold_calibrator()
@@ -0,0 +1,36 @@
+import sys
+sys.path.append('..')
+
+from training_dedup import TrainingDeduplicator
+
+def test_training_dedup():
+    deduplicator = TrainingDeduplicator()
+
+    print("\n" + "="*60)
+    print("TESTING TRAINING DEDUP")
+    print("="*60 + "\n")
+
+    conversations = [
+        [{"role": "user", "content": "What is the best time of year to visit Kyoto for cherry blossoms?"},
+         {"role": "assistant", "content": "Late March to early April."}],
+        [{"role": "user", "content": "what is the best time of year to visit Kyoto for cherry blossoms season?"},
+         {"role": "assistant", "content": "Usually the first week of April."}],
+        [{"role": "user", "content": "Write a short poem about Mount Fuji at dawn."},
+         {"role": "assistant", "content": "Snow cap in first light..."}],
+        [{"role": "user", "content": "Explain how the JR Pass works for a first-time traveler."},
+         {"role": "assistant", "content": "The JR Pass is a rail pass..."}],
+    ]
+
+    kept, report = deduplicator.deduplicate(conversations)
+    deduplicator.print_dedup_report(report)
+
+    for dup in report['duplicates']:
+        print(f"   #{dup['index']} duplicates #{dup['duplicate_of']} ({dup['method']}, {dup['score']})")
+
+    assert report['total'] == 4
+    assert report['kept'] == 3, "Near-identical Kyoto prompts should collapse"
+    assert report['reward_calls_saved'] == 1
+    assert kept[0] is conversations[0], "First occurrence should be kept"
+
+if __name__ == "__main__":
+    test_training_dedup()
@@ -0,0 +1,100 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+sys.path.append('..')
+
+from core.training_scheduler import TrainingScheduler
+
+def make_decision(savings):
+    return {"decision": "TRAIN", "details": {"bottleneck": {"estimated_savings": savings, "break_even_days": 30}}}
+
+def test_training_scheduler():
+    queue_file = os.path.join(tempfile.mkdtemp(), "training_queue.json")
+    scheduler = TrainingScheduler(credits_available=60, training_cost=26, queue_file=queue_file)
+    cost = scheduler.estimate_job_cost()
+
+    print("\n" + "="*60)
+    print("TESTING TRAINING SCHEDULER")
+    print("="*60 + "\n")
+    print(f"Estimated cost per job: ${cost}")
+
+    # Without a runner nothing starts by itself - no slot or credits held for work nobody does
+    scheduler.submit("sql_generation", "Generate SQL", make_decision(0.5))
+    scheduler.submit("code_review", "Review code", make_decision(2.0))
+    scheduler.submit("poetry", "Write poems", make_decision(0.1))
+
+    # Duplicate submissions for the same intent are absorbed
+    scheduler.submit("code_review", "Review code", make_decision(3.0))
+    assert len(scheduler.jobs) == 3, "Same intent should not be queued twice"
+
+    print(f"Status: {scheduler.get_status()}")
+    assert scheduler.get_running() == [] and scheduler.spent == 0 and scheduler.dispatch() == []
+    assert scheduler.get_status()['queue'] == ["code_review", "sql_generation", "poetry"], \
+        "Queue should be ordered by savings"
+
+    # An external trainer claims the top job; the single slot is taken until it reports back
+    assert [job['intent_label'] for job in scheduler.dispatch(claim=True)] == ["code_review"]
+    assert scheduler.dispatch(claim=True) == []
+    assert scheduler.get_running()[0]['owner']['pid'] == os.getpid()
+    scheduler.complete_job("code_review")
+    assert [job['intent_label'] for job in scheduler.dispatch(claim=True)] == ["sql_generation"], \
+        "The next job can be dispatched once the first one completed"
+
+    # Another process opening the queue leaves jobs with a live owner alone
+    restarted = TrainingScheduler(credits_available=60, training_cost=26, queue_file=queue_file)
+    print(f"Other process: {restarted.get_status()}")
+    assert [job['intent_label'] for job in restarted.get_running()] == ["sql_generation"]
+    assert restarted.spent == scheduler.spent
+
+    # ... and re-queues (refunding) those whose owner is gone
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with open(queue_file) as f:
+        data = json.load(f)
+    data['jobs'] = [dict(job, owner=dict(job['owner'], pid=dead.pid)) if job['owner'] else job for job in data['jobs']]
+    with open(queue_file, 'w') as f:
+        json.dump(data, f)
+    restarted = TrainingScheduler(credits_available=60, training_cost=26, queue_file=queue_file)
+    print(f"After the owner died: {restarted.get_status()}")
+    assert restarted.get_running() == [] and restarted.spent == cost
+    assert restarted.get_status()['queue'] == ["sql_generation", "poetry"]
+
+    # Budget only covers two jobs
+    restarted.dispatch(claim=True)
+    restarted.complete_job(restarted.get_running()[0]['intent_label'])
+    print(f"After two jobs: {restarted.get_status()}")
+    assert restarted.dispatch(claim=True) == [] and restarted.get_running() == [], \
+        "Third job should not fit in the budget"
+    assert restarted.remaining_budget() < cost
+
+    # With a runner, jobs start and complete on their own
+    trained = []
+    runner_file = os.path.join(tempfile.mkdtemp(), "training_queue.json")
+    runner = TrainingScheduler(credits_available=200, training_cost=26, queue_file=runner_file,
+                               runner=lambda job: trained.append(job['intent_label']) or True)
+    runner.submit("sql_generation", "Generate SQL", make_decision(0.5))
+    runner.submit("code_review", "Review code", make_decision(2.0))
+    deadline = time.time() + 5
+    while runner.get_status()['jobs'] != {"completed": 2} and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(trained) == ["code_review", "sql_generation"]
+    assert runner.get_status()['jobs'] == {"completed": 2}
+
+    # Two schedulers on one queue file don't overwrite each other's submissions
+    shared_file = os.path.join(tempfile.mkdtemp(), "training_queue.json")
+    first = TrainingScheduler(credits_available=200, training_cost=26, queue_file=shared_file)
+    second = TrainingScheduler(credits_available=200, training_cost=26, queue_file=shared_file)
+    first.submit("sql_generation", "Generate SQL", make_decision(0.5))
+    second.submit("code_review", "Review code", make_decision(2.0))
+    first.submit("poetry", "Write poems", make_decision(0.1))
+    merged = TrainingScheduler(credits_available=200, training_cost=26, queue_file=shared_file)
+    print(f"Shared queue: {sorted(merged.jobs)}")
+    assert sorted(merged.jobs) == ["code_review", "poetry", "sql_generation"]
+    assert [job['intent_label'] for job in first.dispatch(claim=True)] == ["code_review"]
+    assert second.dispatch(claim=True) == [], "Single slot is shared too"
+
+if __name__ == "__main__":
+    test_training_scheduler()
@@ -0,0 +1,169 @@
+import re
+import zlib
+import numpy as np
+
+# Large Mersenne prime used by the MinHash permutation family
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class TrainingDeduplicator:
+    """
+    Remove near-duplicate generated training examples before reward scoring
+    Stage 1: MinHash/LSH on the prompt text (cheap, catches paraphrased templates)
+    Stage 2: Embedding cosine similarity against the kept set (catches same meaning)
+    """
+
+    def __init__(self, embedding_service=None, jaccard_threshold=0.7,
+                 embedding_threshold=0.92, num_perm=128, bands=32,
+                 shingle_size=3, seed=42):
+        """
+        Args:
+            embedding_service: Optional EmbeddingService, MinHash only if None
+            jaccard_threshold (float): Estimated Jaccard at or above = duplicate
+            embedding_threshold (float): Cosine similarity at or above = duplicate
+            num_perm (int): Number of MinHash permutations
+            bands (int): Number of LSH bands (must divide num_perm)
+            shingle_size (int): Words per shingle
+            seed (int): Seed for the permutation family
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.embedding_service = embedding_service
+        self.jaccard_threshold = jaccard_threshold
+        self.embedding_threshold = embedding_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def _shingles(self, text):
+        """Hash word n-grams of normalized text to 32-bit ints"""
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < self.shingle_size:
+            grams = [" ".join(words)]
+        else:
+            grams = [
+                " ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            ]
+        return np.array(sorted({zlib.crc32(g.encode("utf-8")) for g in grams}), dtype=np.uint64)
+
+    def minhash_signature(self, text):
+        """
+        Compute the MinHash signature of a text
+
+        Args:
+            text (str): Text to sign
+
+        Returns:
+            np.ndarray: num_perm uint64 values
+        """
+        shingles = self._shingles(text)
+        hashed = (np.outer(self._a, shingles) + self._b[:, None]) % _MERSENNE_PRIME
+        return np.bitwise_and(hashed, _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature):
+        """Split a signature into hashable LSH band keys"""
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def deduplicate_texts(self, texts):
+        """
+        Greedily keep the first occurrence of each near-duplicate cluster
+
+        Args:
+            texts (list): List of strings
+
+        Returns:
+            tuple: (kept_indices list, report dict)
+        """
+        buckets = {}
+        signatures = []
+        kept = []
+        duplicates = []
+        minhash_hits = 0
+        embedding_hits = 0
+
+        # Embed everything in one batch, then grow the index as samples are kept
+        index = None
+        vectors = None
+        if self.embedding_service is not None and texts:
+            vectors = np.array(self.embedding_service.create_embeddings_batch(texts), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+            index = np.empty_like(vectors)
+
+        for i, text in enumerate(texts):
+            signature = self.minhash_signature(text)
+            signatures.append(signature)
+            keys = self._band_keys(signature)
+
+            # Stage 1: LSH candidates, confirmed by estimated Jaccard
+            match = None
+            candidates = {j for key in keys for j in buckets.get(key, ())}
+            for j in sorted(candidates):
+                jaccard = float(np.mean(signatures[j] == signature))
+                if jaccard >= self.jaccard_threshold:
+                    match = {"index": i, "duplicate_of": j, "method": "minhash", "score": round(jaccard, 3)}
+                    minhash_hits += 1
+                    break
+
+            # Stage 2: Nearest kept neighbour in embedding space
+            if match is None and index is not None and kept:
+                sims = index[:len(kept)] @ vectors[i]
+                best = int(np.argmax(sims))
+                if sims[best] >= self.embedding_threshold:
+                    match = {"index": i, "duplicate_of": kept[best], "method": "embedding", "score": round(float(sims[best]), 3)}
+                    embedding_hits += 1
+
+            if match is not None:
+                duplicates.append(match)
+                continue
+
+            if index is not None:
+                index[len(kept)] = vectors[i]
+            kept.append(i)
+            for key in keys:
+                buckets.setdefault(key, []).append(i)
+
+        report = {
+            "total": len(texts),
+            "kept": len(kept),
+            "removed": len(duplicates),
+            "minhash_duplicates": minhash_hits,
+            "embedding_duplicates": embedding_hits,
+            # test_filter.py makes one reward call per sample
+            "reward_calls_saved": len(duplicates),
+            "duplicates": duplicates
+        }
+
+        return kept, report
+
+    def deduplicate(self, conversations):
+        """
+        Deduplicate generated conversations by their user prompt
+
+        Args:
+            conversations (list): [{"role": "user", ...}, {"role": "assistant", ...}] pairs
+
+        Returns:
+            tuple: (filtered conversations list, report dict)
+        """
+        texts = [convo[0]["content"].strip() for convo in conversations]
+        kept, report = self.deduplicate_texts(texts)
+        return [conversations[i] for i in kept], report
+
+    def print_dedup_report(self, report):
+        """Pretty print dedup results"""
+        print(f"\n🧹 Dedup: kept {report['kept']}/{report['total']} examples")
+        print(f"   MinHash duplicates: {report['minhash_duplicates']} (Jaccard >= {self.jaccard_threshold})")
+        print(f"   Embedding duplicates: {report['embedding_duplicates']} (cosine >= {self.embedding_threshold})")
+        print(f"   Reward calls saved: {report['reward_calls_saved']}\n")